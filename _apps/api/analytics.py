@@ -0,0 +1,212 @@
+"""
+Indicadores derivados de las series diarias.
+
+Los indicadores se calculan con operaciones vectorizadas de NumPy sobre las
+columnas de la serie (cierre, volumen, VWAP), sin bucles por barra:
+
+- ``returns``: rentabilidad diaria simple.
+- ``sma``: media móvil simple de ``window`` barras (suma acumulada).
+- ``ema``: media móvil exponencial de ``window`` barras, iniciada con el primer
+  cierre (forma cerrada de la recurrencia con una suma acumulada, por bloques).
+- ``volatility``: desviación típica móvil de ``window`` rentabilidades, anualizada.
+- ``vwap``: VWAP acumulado desde el inicio del rango.
+- ``drawdown``: caída desde el máximo previo.
+
+NumPy se importa en las funciones que lo usan, de modo que un worker solo lo
+carga con la primera petición de indicadores.
+
+Los resultados se memorizan en el backend de la caché de series, indexados por
+(símbolo, rango, indicadores, ventana) y por la versión de la serie con la que
+se calcularon. La versión cambia cuando la serie se recarga con barras nuevas,
+de modo que las entradas antiguas dejan de leerse y expiran con la serie.
+"""
+import math
+
+from .cache import TimeSeriesCache
+
+INDICATORS = ('returns', 'sma', 'ema', 'volatility', 'vwap', 'drawdown')
+
+# Sesiones por año, para anualizar la volatilidad
+TRADING_DAYS = 252
+
+# Mayor factor de escala de la forma cerrada de ``ema`` dentro de un bloque
+EMA_MAX_SCALE = 1e100
+
+
+def to_list(values):
+    """
+    Convierte un array en una lista JSON, con ``None`` en lugar de ``NaN`` o
+    infinito (p. ej. la rentabilidad tras un cierre ``0``), que no son JSON válido.
+    """
+    import numpy as np
+
+    return np.where(np.isfinite(values), values, None).tolist()
+
+
+def to_float(value):
+    """
+    Convierte un escalar en ``float``, o en ``None`` si no es finito.
+    """
+    value = float(value)
+    return value if math.isfinite(value) else None
+
+
+def daily_returns(close):
+    import numpy as np
+
+    returns = np.full(close.shape, np.nan)
+    returns[1:] = close[1:] / close[:-1] - 1
+    return returns
+
+
+def sma(close, window):
+    import numpy as np
+
+    result = np.full(close.shape, np.nan)
+    if len(close) >= window:
+        totals = np.cumsum(np.insert(close, 0, 0.0))
+        result[window - 1:] = (totals[window:] - totals[:-window]) / window
+    return result
+
+
+def ema(close, window):
+    """
+    Media móvil exponencial con ``alpha = 2 / (window + 1)``, equivalente a
+    ``e[0] = c[0]; e[t] = alpha * c[t] + (1 - alpha) * e[t - 1]``.
+
+    Dentro de cada bloque que empieza tras el valor ``e0``, la recurrencia se
+    resuelve como ``e[j] = d^(j+1) * (e0 + alpha * sum(c[k] * d^-(k+1)))`` con
+    ``d = 1 - alpha``. El factor ``d^-k`` crece exponencialmente (con
+    ``window=2`` desborda tras unas 650 barras), así que la serie se recorre
+    en bloques en los que no supera ``EMA_MAX_SCALE``, y cada bloque parte del
+    último valor del anterior.
+    """
+    import numpy as np
+
+    result = np.empty(len(close))
+    if not len(close):
+        return result
+    alpha = 2 / (window + 1)
+    decay = 1 - alpha
+    block = max(int(np.log(EMA_MAX_SCALE) / -np.log(decay)), 1)
+    powers = decay ** np.arange(1, min(block, len(close)) + 1)
+    result[0] = previous = close[0]
+    for start in range(1, len(close), block):
+        chunk = close[start:start + block]
+        scale = powers[:len(chunk)]
+        result[start:start + len(chunk)] = scale * (previous + np.cumsum(alpha * chunk / scale))
+        previous = result[start + len(chunk) - 1]
+    return result
+
+
+def rolling_volatility(returns, window):
+    import numpy as np
+
+    result = np.full(returns.shape, np.nan)
+    if len(returns) > window:
+        windows = np.lib.stride_tricks.sliding_window_view(returns[1:], window)
+        result[window:] = windows.std(axis=1, ddof=1) * np.sqrt(TRADING_DAYS)
+    return result
+
+
+def cumulative_vwap(close, volume, vwap):
+    import numpy as np
+
+    # Las barras sin VWAP del proveedor usan el cierre
+    prices = np.where(np.isnan(vwap), close, vwap)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.cumsum(prices * volume) / np.cumsum(volume)
+
+
+def drawdown(close):
+    import numpy as np
+
+    return close / np.maximum.accumulate(close) - 1
+
+
+def compute(serie, indicators=INDICATORS, window=20):
+    """
+    Calcula los indicadores de una serie diaria.
+
+    Args:
+        serie (list): Las barras en el formato de la API, ordenadas por fecha.
+        indicators (iterable): Los indicadores a calcular (ver ``INDICATORS``).
+        window (int): Ventana, en barras, de ``sma``, ``ema`` y ``volatility``.
+
+    Returns:
+        dict: ``t`` y ``close`` por barra, una lista por indicador (``None``
+        donde no hay barras suficientes o el valor no es finito) y un ``summary`` con la rentabilidad
+        total, la máxima caída y la volatilidad anualizada del rango.
+    """
+    import numpy as np
+
+    close = np.array([bar['c'] for bar in serie], dtype=float)
+    result = {'t': [bar['t'] for bar in serie], 'close': to_list(close)}
+    # Un cierre ``0`` da divisiones por cero: sus valores no finitos se devuelven como ``None``
+    with np.errstate(invalid='ignore', divide='ignore'):
+        returns = daily_returns(close)
+        if 'returns' in indicators:
+            result['returns'] = to_list(returns)
+        if 'sma' in indicators:
+            result['sma'] = to_list(sma(close, window))
+        if 'ema' in indicators:
+            result['ema'] = to_list(ema(close, window))
+        if 'volatility' in indicators:
+            result['volatility'] = to_list(rolling_volatility(returns, window))
+        if 'vwap' in indicators:
+            volume = np.array([bar['v'] for bar in serie], dtype=float)
+            vwap = np.array([bar.get('vw', np.nan) for bar in serie], dtype=float)
+            result['vwap'] = to_list(cumulative_vwap(close, volume, vwap))
+        drawdowns = drawdown(close)
+        if 'drawdown' in indicators:
+            result['drawdown'] = to_list(drawdowns)
+
+        result['summary'] = {
+            'total_return': to_float(close[-1] / close[0] - 1) if len(close) else None,
+            'max_drawdown': to_float(np.fmin.reduce(drawdowns)) if len(close) else None,
+            'volatility': to_float(np.std(returns[1:], ddof=1) * np.sqrt(TRADING_DAYS)) if len(close) > 2 else None,
+        }
+    return result
+
+
+class IndicatorMemo:
+    """
+    Memoria de los indicadores calculados, sobre el backend de una ``TimeSeriesCache``.
+
+    Las claves incluyen la versión de la serie (ver ``TimeSeriesCache.version_of``)
+    que se usó en el cálculo, de modo que un resultado nunca se sirve para
+    una serie distinta y las barras nuevas invalidan los resultados anteriores.
+
+    Args:
+        cache (TimeSeriesCache): La caché de series, cuyo backend y TTL se reutilizan.
+        indicators (iterable): Los indicadores solicitados.
+        window (int): La ventana de los indicadores móviles.
+    """
+
+    def __init__(self, cache, indicators, window):
+        self.cache = cache
+        self.indicators = sorted(indicators)
+        self.window = window
+
+    def make_key(self, symbol, start_date, end_date, version):
+        return f'an:{symbol.upper()}:{start_date}:{end_date}:{",".join(self.indicators)}:{self.window}:{version}'
+
+    def get_many(self, symbols, start_date, end_date):
+        """
+        Retorna los resultados memorizados para la versión actual de la serie de cada símbolo.
+
+        Returns:
+            dict: Los resultados encontrados, indexados por símbolo.
+        """
+        versions = self.cache.versions(symbols, start_date, end_date)
+        keys = {self.make_key(symbol, start_date, end_date, version): symbol for symbol, version in versions.items()}
+        return {keys[key]: value for key, value in self.cache.backend.get_many(list(keys)).items()}
+
+    def compute(self, symbol, start_date, end_date, serie):
+        """
+        Calcula los indicadores de ``serie`` y los memoriza con la versión de esa serie.
+        """
+        value = compute(serie, self.indicators, self.window)
+        key = self.make_key(symbol, start_date, end_date, TimeSeriesCache.version_of(serie))
+        self.cache.backend.set(key, value, self.cache.fresh_ttl() + self.cache.stale_ttl)
+        return value
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = '_apps.api'
+
+    def ready(self):
+        # Registra el receptor que instrumenta las conexiones a la base de datos
+        from . import metrics  # noqa: F401
+        # Registra la comprobación del almacén de idempotencia (api.E001)
+        from . import idempotency  # noqa: F401
@@ -0,0 +1,843 @@
+"""
+Cachés de los datos obtenidos de polygon.io.
+
+``TimeSeriesCache`` guarda las series temporales diarias. La caché se indexa por (símbolo, fecha inicial, fecha final) y cada entrada
+tiene dos ventanas de validez:
+
+- *fresca*: hasta el próximo cierre de barra diaria (``BAR_CLOSE``). Mientras
+  la entrada es fresca se sirve sin tocar el upstream.
+- *obsoleta*: durante ``STALE_TTL`` segundos más. La entrada se sirve tal cual
+  y se lanza una única recarga en segundo plano (stale-while-revalidate).
+
+Los fallos de caché se cargan con *single-flight* (ver ``_apps.api.singleflight``),
+de modo que muchas peticiones concurrentes sobre la misma serie producen una
+sola llamada al upstream y comparten su resultado o su error; en las vistas
+asíncronas, un bloqueo por símbolo del event loop.
+
+``AccessCounter`` cuenta los accesos diarios a cada símbolo, que el comando
+``prewarm_time_series`` usa para precargar primero las series más consultadas.
+Los contadores tienen su propio backend (``ACCESS_COUNTS``), compartido entre
+procesos, para que el comando, que es otro proceso, los vea y para que no
+desalojen series de la caché.
+
+``ReferenceDataCache`` guarda los datos de referencia de cada símbolo
+(``/v3/reference/tickers``) con un TTL largo, e incluye caché negativa para los
+símbolos inválidos. Sus fallos de caché también se cargan con *single-flight*.
+
+Backends: ``LocMemBackend`` guarda los datos en la memoria de cada proceso;
+``DjangoCacheBackend`` (Redis, Memcached, etc.) y ``DatabaseBackend`` (tabla
+``CacheEntry``) los comparten entre procesos. Los datos que deben verse desde
+todos los workers, como las claves de idempotencia, exigen uno compartido
+fuera de ``DEBUG`` (ver ``is_process_local``).
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.signals import setting_changed
+from django.db import IntegrityError, close_old_connections, transaction
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from rest_framework import serializers
+
+from . import metrics
+from .singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {
+    'BACKEND': '_apps.api.cache.LocMemBackend',
+    'OPTIONS': {},
+    'BAR_CLOSE': '21:15',  # Hora UTC en la que se da por cerrada la barra diaria
+    'STALE_TTL': 60 * 60 * 24,
+    'MIN_TTL': 60,
+    'REFRESH_WORKERS': 2,
+}
+
+ACCESS_DEFAULT_SETTINGS = {
+    'BACKEND': '_apps.api.cache.DatabaseBackend',
+    'OPTIONS': {'key_prefix': 'hits'},
+    'DAYS': 7,  # Días de accesos que se tienen en cuenta al priorizar la precarga
+    'FLUSH_INTERVAL': 10,  # Segundos que cada proceso acumula los accesos antes de sumarlos al backend
+}
+
+REFERENCE_DEFAULT_SETTINGS = {
+    'BACKEND': '_apps.api.cache.LocMemBackend',
+    'OPTIONS': {},
+    'TTL': 60 * 60 * 24 * 7,
+    'NEGATIVE_TTL': 60 * 60,
+}
+
+
+def seconds_until_next_bar(now=None, bar_close=DEFAULT_SETTINGS['BAR_CLOSE']):
+    """
+    Calcula los segundos que faltan para el próximo cierre de barra diaria.
+
+    Args:
+        now (datetime, opcional): Momento de referencia (UTC). Por defecto, ahora.
+        bar_close (str): Hora UTC del cierre de barra en formato ``HH:MM``.
+
+    Returns:
+        float: Segundos hasta el próximo cierre.
+    """
+    now = now or datetime.now(timezone.utc)
+    hour, minute = (int(part) for part in bar_close.split(':'))
+    boundary = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if boundary <= now:
+        boundary += timedelta(days=1)
+    return (boundary - now).total_seconds()
+
+
+class LocMemBackend:
+    """
+    Backend en memoria local del proceso, con desalojo LRU.
+
+    Args:
+        max_entries (int): Número máximo de entradas antes de desalojar las más antiguas.
+    """
+
+    def __init__(self, max_entries=1000):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            entry, expires_at = item
+            if expires_at <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return entry
+
+    def get_many(self, keys):
+        entries = {key: self.get(key) for key in keys}
+        return {key: entry for key, entry in entries.items() if entry is not None}
+
+    def set(self, key, entry, timeout):
+        with self._lock:
+            self._data[key] = (entry, time.time() + timeout)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key, timeout, delta=1):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[1] <= time.time():
+                item = (0, time.time() + timeout)
+            self._data[key] = (item[0] + delta, item[1])
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+            return item[0] + delta
+
+    async def aget(self, key):
+        return self.get(key)
+
+    async def aset(self, key, entry, timeout):
+        self.set(key, entry, timeout)
+
+    async def aincr(self, key, timeout, delta=1):
+        return self.incr(key, timeout, delta)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class DjangoCacheBackend:
+    """
+    Backend que delega en el framework de caché de Django (Redis, Memcached, etc.).
+
+    Args:
+        alias (str): Alias de la caché en ``settings.CACHES``.
+        key_prefix (str): Prefijo aplicado a todas las claves.
+    """
+
+    def __init__(self, alias='default', key_prefix='ts'):
+        self.alias = alias
+        self.key_prefix = key_prefix
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _key(self, key):
+        return f'{self.key_prefix}:{key}'
+
+    def get(self, key):
+        return self.cache.get(self._key(key))
+
+    def get_many(self, keys):
+        entries = self.cache.get_many([self._key(key) for key in keys])
+        return {key: entries[self._key(key)] for key in keys if self._key(key) in entries}
+
+    def set(self, key, entry, timeout):
+        self.cache.set(self._key(key), entry, timeout)
+
+    def delete(self, key):
+        self.cache.delete(self._key(key))
+
+    def incr(self, key, timeout, delta=1):
+        key = self._key(key)
+        if self.cache.add(key, delta, timeout):
+            return delta
+        try:
+            return self.cache.incr(key, delta)
+        except ValueError:
+            # La clave expiró entre ``add`` e ``incr``
+            self.cache.set(key, delta, timeout)
+            return delta
+
+    async def aget(self, key):
+        return await self.cache.aget(self._key(key))
+
+    async def aset(self, key, entry, timeout):
+        await self.cache.aset(self._key(key), entry, timeout)
+
+    async def aincr(self, key, timeout, delta=1):
+        key = self._key(key)
+        if await self.cache.aadd(key, delta, timeout):
+            return delta
+        try:
+            return await self.cache.aincr(key, delta)
+        except ValueError:
+            await self.cache.aset(key, delta, timeout)
+            return delta
+
+    def clear(self):
+        self.cache.clear()
+
+
+class DatabaseBackend:
+    """
+    Backend sobre la tabla ``CacheEntry`` de la base de datos, compartido por
+    todos los procesos sin servicios adicionales.
+
+    ``incr`` bloquea la fila del contador, de modo que es atómico entre
+    procesos. Las entradas caducadas se borran por lotes en una de cada
+    ``cull_every`` escrituras.
+
+    Args:
+        key_prefix (str): Prefijo aplicado a todas las claves.
+        using (str): Alias de la base de datos.
+        cull_every (int): Escrituras entre cada borrado de entradas caducadas.
+    """
+
+    # Número máximo de entradas caducadas borradas en cada pasada
+    cull_batch_size = 1000
+
+    def __init__(self, key_prefix='', using='default', cull_every=100):
+        self.key_prefix = key_prefix
+        self.using = using
+        self.cull_every = cull_every
+        self._writes = 0
+
+    @property
+    def entries(self):
+        from .models import CacheEntry
+
+        return CacheEntry.objects.using(self.using)
+
+    def _key(self, key):
+        from .models import CacheEntry
+
+        key = f'{self.key_prefix}:{key}' if self.key_prefix else key
+        if len(key) > CacheEntry._meta.get_field('key').max_length:
+            key = 'sha256:' + hashlib.sha256(key.encode()).hexdigest()
+        return key
+
+    @staticmethod
+    def _expires_at(timeout):
+        return datetime.now(timezone.utc) + timedelta(seconds=timeout)
+
+    def get(self, key):
+        return self.entries.filter(
+            key=self._key(key), expires_at__gt=datetime.now(timezone.utc),
+        ).values_list('value', flat=True).first()
+
+    def get_many(self, keys):
+        keys = {self._key(key): key for key in keys}
+        rows = self.entries.filter(key__in=keys, expires_at__gt=datetime.now(timezone.utc)).values_list('key', 'value')
+        return {keys[key]: value for key, value in rows if value is not None}
+
+    def set(self, key, entry, timeout):
+        from .models import CacheEntry
+
+        self.entries.bulk_create(
+            [CacheEntry(key=self._key(key), value=entry, expires_at=self._expires_at(timeout))],
+            update_conflicts=True, unique_fields=['key'], update_fields=['value', 'expires_at'],
+        )
+        self._cull()
+
+    def delete(self, key):
+        self.entries.filter(key=self._key(key)).delete()
+
+    def incr(self, key, timeout, delta=1):
+        key = self._key(key)
+        while True:
+            with transaction.atomic(using=self.using):
+                entry = self.entries.select_for_update().filter(key=key).first()
+                if entry is None:
+                    try:
+                        with transaction.atomic(using=self.using):
+                            self.entries.create(key=key, value=delta, expires_at=self._expires_at(timeout))
+                    except IntegrityError:
+                        # Otro proceso creó el contador: se vuelve a leer, ya bloqueándolo
+                        continue
+                    self._cull()
+                    return delta
+                if entry.expires_at <= datetime.now(timezone.utc) or not isinstance(entry.value, int):
+                    entry.value, entry.expires_at = delta, self._expires_at(timeout)
+                else:
+                    entry.value += delta
+                entry.save(update_fields=['value', 'expires_at'])
+                return entry.value
+
+    async def aget(self, key):
+        return await sync_to_async(self.get)(key)
+
+    async def aset(self, key, entry, timeout):
+        await sync_to_async(self.set)(key, entry, timeout)
+
+    async def aincr(self, key, timeout, delta=1):
+        return await sync_to_async(self.incr)(key, timeout, delta)
+
+    def clear(self):
+        entries = self.entries.filter(key__startswith=f'{self.key_prefix}:') if self.key_prefix else self.entries
+        entries.delete()
+
+    def _cull(self):
+        self._writes += 1
+        if self._writes % self.cull_every:
+            return
+        expired = list(
+            self.entries.filter(expires_at__lte=datetime.now(timezone.utc))
+            .values_list('key', flat=True)[:self.cull_batch_size]
+        )
+        if expired:
+            self.entries.filter(key__in=expired).delete()
+
+
+# Backends de ``CACHES`` que guardan los datos en la memoria de cada proceso
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def is_process_local(config):
+    """
+    Indica si el backend de ``config`` (``BACKEND`` y ``OPTIONS``) guarda los datos
+    en la memoria de cada proceso, de modo que los workers no los comparten.
+    """
+    backend = import_string(config['BACKEND'])
+    if issubclass(backend, LocMemBackend):
+        return True
+    if issubclass(backend, DjangoCacheBackend):
+        alias = config.get('OPTIONS', {}).get('alias', 'default')
+        return settings.CACHES.get(alias, {}).get('BACKEND') in PROCESS_LOCAL_CACHES
+    return False
+
+
+class TimeSeriesCache:
+    """
+    Caché de series temporales con TTL alineado al cierre de barra diaria,
+    stale-while-revalidate y bloqueo por símbolo.
+
+    Args:
+        backend: Instancia de backend (``LocMemBackend`` o ``DjangoCacheBackend``).
+        bar_close (str): Hora UTC de cierre de la barra diaria (``HH:MM``).
+        stale_ttl (int): Segundos durante los que se sirve una entrada obsoleta.
+        min_ttl (int): TTL mínimo de frescura, para no recargar en bucle junto al cierre.
+        refresh_workers (int): Hilos dedicados a las recargas en segundo plano.
+    """
+
+    def __init__(self, backend, bar_close=DEFAULT_SETTINGS['BAR_CLOSE'],
+                 stale_ttl=DEFAULT_SETTINGS['STALE_TTL'], min_ttl=DEFAULT_SETTINGS['MIN_TTL'],
+                 refresh_workers=DEFAULT_SETTINGS['REFRESH_WORKERS']):
+        self.backend = backend
+        self.bar_close = bar_close
+        self.stale_ttl = stale_ttl
+        self.min_ttl = min_ttl
+        self.refresh_workers = refresh_workers
+        self._flight = SingleFlight('time_series')
+        self._async_locks = weakref.WeakKeyDictionary()
+        self._locks_guard = threading.Lock()
+        self._refreshing = set()
+        self._executor = None
+        self._tasks = set()
+
+    @staticmethod
+    def make_key(symbol, start_date, end_date):
+        return f'{symbol.upper()}:{start_date}:{end_date}'
+
+    def fresh_ttl(self):
+        """
+        Returns:
+            float: Segundos de frescura para una entrada almacenada ahora.
+        """
+        return max(seconds_until_next_bar(bar_close=self.bar_close), self.min_ttl)
+
+    def get(self, symbol, start_date, end_date):
+        """
+        Retorna la serie almacenada (fresca u obsoleta) o ``None`` si no existe.
+        """
+        entry = self.backend.get(self.make_key(symbol, start_date, end_date))
+        return entry['value'] if entry else None
+
+    def get_many(self, symbols, start_date, end_date, loader_for=None):
+        """
+        Retorna las series almacenadas de varios símbolos con una sola lectura del backend.
+
+        Las entradas obsoletas también se retornan; si se indica ``loader_for``
+        se programa su recarga en segundo plano, como en ``get_or_load``.
+
+        Args:
+            symbols (iterable): Los símbolos.
+            start_date (str): Fecha inicial (``YYYY-MM-DD``).
+            end_date (str): Fecha final (``YYYY-MM-DD``).
+            loader_for (callable, opcional): Función que recibe un símbolo y retorna su ``loader``.
+
+        Returns:
+            dict: Las series encontradas, indexadas por símbolo.
+        """
+        keys = {self.make_key(symbol, start_date, end_date): symbol for symbol in symbols}
+        values = {}
+        entries = self.backend.get_many(list(keys))
+        metrics.CACHE_REQUESTS.inc(len(keys) - len(entries), cache='time_series', result='miss')
+        for key, entry in entries.items():
+            self._count(entry)
+            symbol = keys[key]
+            if loader_for is not None and time.time() >= entry['fresh_until']:
+                self._refresh_in_background(symbol, start_date, end_date, loader_for(symbol))
+            values[symbol] = entry['value']
+        return values
+
+    def validators(self, symbol, start_date, end_date, fresh_only=False):
+        """
+        Retorna la versión y la fecha de carga de la serie almacenada, sin leer la serie.
+
+        La versión es un resumen del contenido calculado al almacenarla, de modo
+        que las vistas pueden generar un ``ETag`` sin serializar la serie.
+
+        Args:
+            fresh_only (bool): Si es ``True`` las entradas obsoletas se tratan como ausentes.
+
+        Returns:
+            tuple: (versión, fecha de carga como timestamp), o ``None`` si no hay entrada.
+        """
+        entry = self.backend.get(self.make_key(symbol, start_date, end_date))
+        if entry is None or (fresh_only and time.time() >= entry['fresh_until']):
+            return None
+        return entry['version'], entry['loaded_at']
+
+    def versions(self, symbols, start_date, end_date):
+        """
+        Retorna la versión de la serie almacenada (fresca u obsoleta) de varios símbolos con una sola lectura.
+
+        Returns:
+            dict: Las versiones encontradas, indexadas por símbolo.
+        """
+        keys = {self.make_key(symbol, start_date, end_date): symbol for symbol in symbols}
+        return {keys[key]: entry['version'] for key, entry in self.backend.get_many(list(keys)).items()}
+
+    @staticmethod
+    def version_of(value):
+        """
+        Returns:
+            str: El resumen del contenido de una serie que se guarda como su versión.
+        """
+        return hashlib.blake2b(json.dumps(value, sort_keys=True, cls=DjangoJSONEncoder).encode(), digest_size=8).hexdigest()
+
+    def _entry(self, value):
+        fresh_ttl = self.fresh_ttl()
+        now = time.time()
+        entry = {'value': value, 'fresh_until': now + fresh_ttl, 'version': self.version_of(value), 'loaded_at': now}
+        return entry, fresh_ttl + self.stale_ttl
+
+    def set(self, symbol, start_date, end_date, value):
+        """
+        Almacena una serie, calculando sus ventanas de frescura y obsolescencia.
+        """
+        entry, timeout = self._entry(value)
+        self.backend.set(self.make_key(symbol, start_date, end_date), entry, timeout)
+
+    async def aset(self, symbol, start_date, end_date, value):
+        entry, timeout = self._entry(value)
+        await self.backend.aset(self.make_key(symbol, start_date, end_date), entry, timeout)
+
+    def invalidate(self, symbol, start_date, end_date):
+        self.backend.delete(self.make_key(symbol, start_date, end_date))
+
+    def get_or_load(self, symbol, start_date, end_date, loader):
+        """
+        Retorna la serie desde la caché o la carga mediante ``loader``.
+
+        - Entrada fresca: se retorna directamente.
+        - Entrada obsoleta: se retorna y se programa una recarga en segundo plano.
+        - Sin entrada: se carga una sola vez para todas las peticiones
+          concurrentes de la misma clave (ver ``_apps.api.singleflight``); las
+          demás esperan y reutilizan el resultado.
+
+        Args:
+            symbol (str): Símbolo de la empresa.
+            start_date (str): Fecha inicial (``YYYY-MM-DD``).
+            end_date (str): Fecha final (``YYYY-MM-DD``).
+            loader (callable): Función sin argumentos que obtiene la serie del upstream.
+
+        Returns:
+            list: La serie temporal.
+        """
+        key = self.make_key(symbol, start_date, end_date)
+        entry = self.backend.get(key)
+        if entry is not None:
+            self._count(entry)
+            if time.time() >= entry['fresh_until']:
+                self._refresh_in_background(symbol, start_date, end_date, loader)
+            return entry['value']
+
+        metrics.CACHE_REQUESTS.inc(cache='time_series', result='miss')
+        return self._flight.do(
+            key, lambda: self._load(symbol, start_date, end_date, loader), lambda: self.get(symbol, start_date, end_date),
+        )
+
+    def _load(self, symbol, start_date, end_date, loader):
+        # Otra llamada pudo almacenar la serie justo antes de esta
+        value = self.get(symbol, start_date, end_date)
+        if value is None:
+            value = loader()
+            self.set(symbol, start_date, end_date, value)
+        return value
+
+    async def aget_or_load(self, symbol, start_date, end_date, loader):
+        """
+        Versión asíncrona de ``get_or_load`` para las vistas servidas por ASGI.
+
+        Args:
+            loader (callable): Función sin argumentos que retorna un awaitable con la serie.
+
+        Returns:
+            list: La serie temporal.
+        """
+        key = self.make_key(symbol, start_date, end_date)
+        entry = await self.backend.aget(key)
+        if entry is not None:
+            self._count(entry)
+            if time.time() >= entry['fresh_until']:
+                self._arefresh_in_background(symbol, start_date, end_date, loader)
+            return entry['value']
+
+        metrics.CACHE_REQUESTS.inc(cache='time_series', result='miss')
+        async with self._async_lock_for(symbol):
+            entry = await self.backend.aget(key)
+            if entry is not None:
+                return entry['value']
+            value = await loader()
+            await self.aset(symbol, start_date, end_date, value)
+            return value
+
+    @staticmethod
+    def _count(entry):
+        result = 'hit' if time.time() < entry['fresh_until'] else 'stale'
+        metrics.CACHE_REQUESTS.inc(cache='time_series', result=result)
+
+    def _async_lock_for(self, symbol):
+        # Los bloqueos de asyncio pertenecen a un event loop concreto
+        loop = asyncio.get_running_loop()
+        with self._locks_guard:
+            locks = self._async_locks.setdefault(loop, {})
+            return locks.setdefault(symbol.upper(), asyncio.Lock())
+
+    def _arefresh_in_background(self, symbol, start_date, end_date, loader):
+        key = self.make_key(symbol, start_date, end_date)
+        with self._locks_guard:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        task = asyncio.get_running_loop().create_task(self._arefresh(symbol, start_date, end_date, loader))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _arefresh(self, symbol, start_date, end_date, loader):
+        key = self.make_key(symbol, start_date, end_date)
+        try:
+            async with self._async_lock_for(symbol):
+                await self.aset(symbol, start_date, end_date, await loader())
+        except Exception:
+            logger.warning('No se pudo refrescar la serie temporal %s', key, exc_info=True)
+        finally:
+            with self._locks_guard:
+                self._refreshing.discard(key)
+
+    def _refresh_in_background(self, symbol, start_date, end_date, loader):
+        key = self.make_key(symbol, start_date, end_date)
+        with self._locks_guard:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.refresh_workers, thread_name_prefix='ts-refresh'
+                )
+        self._executor.submit(self._refresh, symbol, start_date, end_date, loader)
+
+    def _refresh(self, symbol, start_date, end_date, loader):
+        key = self.make_key(symbol, start_date, end_date)
+        try:
+            def reload():
+                value = loader()
+                self.set(symbol, start_date, end_date, value)
+                return value
+
+            self._flight.do(key, reload)
+        except Exception:
+            # Se conserva la entrada obsoleta; la próxima petición reintentará.
+            logger.warning('No se pudo refrescar la serie temporal %s', key, exc_info=True)
+        finally:
+            with self._locks_guard:
+                self._refreshing.discard(key)
+            close_old_connections()
+
+
+class AccessCounter:
+    """
+    Contadores diarios de accesos por símbolo.
+
+    Cada proceso acumula sus accesos en memoria y los suma al backend como
+    mucho cada ``flush_interval`` segundos, con un ``incr`` por símbolo, de
+    modo que las lecturas no escriben en el backend en cada petición. Si el
+    proceso termina se pierden como mucho los accesos de ese intervalo, lo que
+    no afecta a la prioridad de la precarga.
+
+    Args:
+        backend: Instancia de backend compartido (``DatabaseBackend`` o ``DjangoCacheBackend``).
+        days (int): Días durante los que se conservan los contadores.
+        flush_interval (float): Segundos entre las escrituras al backend; con 0 se escribe en cada acceso.
+    """
+
+    def __init__(self, backend, days=ACCESS_DEFAULT_SETTINGS['DAYS'],
+                 flush_interval=ACCESS_DEFAULT_SETTINGS['FLUSH_INTERVAL']):
+        self.backend = backend
+        self.days = days
+        self.flush_interval = flush_interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flushed_at = time.monotonic()
+
+    @staticmethod
+    def make_key(symbol, day):
+        return f'{symbol.upper()}:{day.isoformat()}'
+
+    @property
+    def timeout(self):
+        return self.days * 24 * 60 * 60
+
+    def _add(self, symbol):
+        """
+        Acumula un acceso y, si toca escribir, retorna los accesos pendientes retirándolos del búfer.
+        """
+        key = self.make_key(symbol, datetime.now(timezone.utc).date())
+        with self._lock:
+            self._pending[key] = self._pending.get(key, 0) + 1
+            if time.monotonic() - self._flushed_at < self.flush_interval:
+                return {}
+            pending, self._pending, self._flushed_at = self._pending, {}, time.monotonic()
+            return pending
+
+    def record(self, symbol):
+        """
+        Suma un acceso al contador diario del símbolo.
+        """
+        for key, hits in self._add(symbol).items():
+            self.backend.incr(key, self.timeout, hits)
+
+    async def arecord(self, symbol):
+        for key, hits in self._add(symbol).items():
+            await self.backend.aincr(key, self.timeout, hits)
+
+    def flush(self):
+        """
+        Suma al backend los accesos acumulados en este proceso.
+        """
+        with self._lock:
+            pending, self._pending, self._flushed_at = self._pending, {}, time.monotonic()
+        for key, hits in pending.items():
+            self.backend.incr(key, self.timeout, hits)
+
+    def counts(self, symbols, batch_size=1000):
+        """
+        Retorna los accesos de cada símbolo en los últimos ``days`` días.
+
+        Args:
+            symbols (iterable): Los símbolos.
+            batch_size (int): Claves leídas del backend por lote.
+
+        Returns:
+            dict: Los accesos por símbolo; los símbolos sin accesos no aparecen.
+        """
+        today = datetime.now(timezone.utc).date()
+        days = [today - timedelta(days=offset) for offset in range(self.days)]
+        keys = {self.make_key(symbol, day): symbol for symbol in symbols for day in days}
+
+        counts, pending = {}, list(keys)
+        for offset in range(0, len(pending), batch_size):
+            for key, hits in self.backend.get_many(pending[offset:offset + batch_size]).items():
+                counts[keys[key]] = counts.get(keys[key], 0) + hits
+        return counts
+
+
+class ReferenceDataCache:
+    """
+    Caché de datos de referencia por símbolo, con caché negativa.
+
+    Los símbolos válidos se guardan durante ``ttl`` segundos. Los inválidos
+    (la API no retorna resultados o responde con un error 4xx) se guardan
+    durante ``negative_ttl`` segundos, de modo que los reintentos con un
+    símbolo erróneo tampoco llegan al upstream. Los errores de
+    disponibilidad no se cachean.
+
+    Args:
+        backend: Instancia de backend (``LocMemBackend`` o ``DjangoCacheBackend``).
+        ttl (int): Segundos de validez de los datos de un símbolo válido.
+        negative_ttl (int): Segundos de validez de un símbolo inválido.
+    """
+
+    def __init__(self, backend, ttl, negative_ttl):
+        self.backend = backend
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._flight = SingleFlight('reference')
+
+    @staticmethod
+    def make_key(symbol):
+        return f'ref:{symbol.upper()}'
+
+    def get_or_load(self, symbol, loader):
+        """
+        Retorna los datos del símbolo desde la caché o los carga mediante ``loader``.
+
+        Args:
+            symbol (str): Símbolo de la empresa.
+            loader (callable): Función sin argumentos que consulta la API.
+
+        Returns:
+            dict: Los datos del símbolo, o ``None`` si no existe.
+
+        Raises:
+            serializers.ValidationError: Si la API rechazó el símbolo (también desde la caché).
+        """
+        key = self.make_key(symbol)
+        entry = self.backend.get(key)
+        metrics.CACHE_REQUESTS.inc(cache='reference', result='miss' if entry is None else 'hit')
+        if entry is None:
+            # Las consultas concurrentes del mismo símbolo comparten una sola llamada
+            entry = self._flight.do(key, lambda: self._load(key, loader), lambda: self.backend.get(key))
+        if 'error' in entry:
+            raise serializers.ValidationError(entry['error'])
+        return entry['value']
+
+    def _load(self, key, loader):
+        entry = self.backend.get(key)
+        if entry is not None:
+            return entry
+        try:
+            value = loader()
+        except serializers.ValidationError as e:
+            entry, timeout = {'error': e.detail}, self.negative_ttl
+        else:
+            entry, timeout = {'value': value}, self.ttl if value else self.negative_ttl
+        self.backend.set(key, entry, timeout)
+        return entry
+
+    def invalidate(self, symbol):
+        self.backend.delete(self.make_key(symbol))
+
+
+_time_series_cache = None
+_access_counter = None
+_reference_data_cache = None
+
+
+def get_time_series_cache():
+    """
+    Retorna la instancia de caché de series temporales configurada en
+    ``settings.TIME_SERIES_CACHE``, creándola en el primer uso.
+
+    Returns:
+        TimeSeriesCache: La caché compartida del proceso.
+    """
+    global _time_series_cache
+    if _time_series_cache is None:
+        config = {**DEFAULT_SETTINGS, **getattr(settings, 'TIME_SERIES_CACHE', {})}
+        backend = import_string(config['BACKEND'])(**config['OPTIONS'])
+        _time_series_cache = TimeSeriesCache(
+            backend,
+            bar_close=config['BAR_CLOSE'],
+            stale_ttl=config['STALE_TTL'],
+            min_ttl=config['MIN_TTL'],
+            refresh_workers=config['REFRESH_WORKERS'],
+        )
+    return _time_series_cache
+
+
+def get_access_counter():
+    """
+    Retorna los contadores de accesos configurados en ``settings.ACCESS_COUNTS``,
+    creándolos en el primer uso.
+
+    Returns:
+        AccessCounter: Los contadores compartidos del proceso.
+    """
+    global _access_counter
+    if _access_counter is None:
+        config = {**ACCESS_DEFAULT_SETTINGS, **getattr(settings, 'ACCESS_COUNTS', {})}
+        backend = import_string(config['BACKEND'])(**config['OPTIONS'])
+        _access_counter = AccessCounter(backend, days=config['DAYS'], flush_interval=config['FLUSH_INTERVAL'])
+    return _access_counter
+
+
+def get_reference_data_cache():
+    """
+    Retorna la instancia de caché de datos de referencia configurada en
+    ``settings.REFERENCE_DATA_CACHE``, creándola en el primer uso.
+
+    Returns:
+        ReferenceDataCache: La caché compartida del proceso.
+    """
+    global _reference_data_cache
+    if _reference_data_cache is None:
+        config = {**REFERENCE_DEFAULT_SETTINGS, **getattr(settings, 'REFERENCE_DATA_CACHE', {})}
+        backend = import_string(config['BACKEND'])(**config['OPTIONS'])
+        _reference_data_cache = ReferenceDataCache(backend, ttl=config['TTL'], negative_ttl=config['NEGATIVE_TTL'])
+    return _reference_data_cache
+
+
+@receiver(setting_changed)
+def _reset_caches(setting, **kwargs):
+    global _time_series_cache, _access_counter, _reference_data_cache
+    if setting == 'TIME_SERIES_CACHE':
+        _time_series_cache = None
+    elif setting == 'ACCESS_COUNTS':
+        _access_counter = None
+    elif setting == 'REFERENCE_DATA_CACHE':
+        _reference_data_cache = None
@@ -0,0 +1,208 @@
+"""
+Claves de idempotencia (cabecera ``Idempotency-Key``) en las escrituras de la API.
+
+Un cliente que reintenta un ``POST`` o un ``PUT`` tras un corte de red envía
+la misma ``Idempotency-Key``. La primera petición que termina con éxito guarda
+su respuesta durante ``IDEMPOTENCY['TTL']`` segundos, y los reintentos con la
+misma clave reciben esa respuesta (con ``Idempotent-Replayed: true``) sin
+consultar el upstream ni volver a escribir.
+
+- Las claves se agrupan por método y ruta, y se asocian a una huella del cuerpo
+  de la petición: reutilizar una clave con otro cuerpo responde 422.
+- Mientras la primera petición está en curso, los reintentos con la misma clave
+  responden 409 en lugar de ejecutarse en paralelo.
+- Solo se guardan las respuestas 2xx. Tras un error la escritura no se produjo
+  y la misma clave puede reintentarse.
+
+El almacén usa los mismos backends que las cachés (ver ``_apps.api.cache``) y
+debe ser compartido por todos los procesos: con uno por proceso, un reintento
+atendido por otro worker volvería a ejecutar la escritura. Por defecto usa
+``DatabaseBackend``; ``DjangoCacheBackend`` sirve con una caché compartida.
+Fuera de ``DEBUG`` un backend en memoria del proceso es un error de
+configuración (comprobación ``api.E001`` y ``ImproperlyConfigured``).
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core import checks
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.response import Response
+
+from . import metrics
+from .cache import is_process_local
+
+HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+
+DEFAULT_SETTINGS = {
+    'BACKEND': '_apps.api.cache.DatabaseBackend',
+    'OPTIONS': {},
+    'TTL': 60 * 60 * 24,
+    'LOCK_TTL': 60,  # Segundos que se reserva una clave si el proceso cae antes de liberarla
+}
+
+
+class IdempotencyStore:
+    """
+    Almacén de las respuestas por clave de idempotencia.
+
+    Args:
+        backend: Instancia de backend (``DatabaseBackend``, ``DjangoCacheBackend`` o, con ``DEBUG``, ``LocMemBackend``).
+        ttl (int): Segundos durante los que se guarda cada respuesta.
+        lock_ttl (int): Segundos de validez de la reserva de una clave en curso.
+    """
+
+    def __init__(self, backend, ttl, lock_ttl):
+        self.backend = backend
+        self.ttl = ttl
+        self.lock_ttl = lock_ttl
+
+    @staticmethod
+    def make_key(scope, key):
+        return f'idem:{scope}:{key}'
+
+    @staticmethod
+    def fingerprint(data):
+        """
+        Retorna la huella del cuerpo ya analizado de una petición, independiente del orden de las claves.
+        """
+        body = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True, separators=(',', ':'))
+        return hashlib.blake2b(body.encode(), digest_size=16).hexdigest()
+
+    def get(self, scope, key):
+        return self.backend.get(self.make_key(scope, key))
+
+    def acquire(self, scope, key):
+        """
+        Reserva la clave para la petición en curso.
+
+        Returns:
+            bool: ``False`` si otra petición ya la tiene reservada.
+        """
+        return self.backend.incr(f'{self.make_key(scope, key)}:lock', self.lock_ttl) == 1
+
+    def release(self, scope, key):
+        self.backend.delete(f'{self.make_key(scope, key)}:lock')
+
+    def save(self, scope, key, fingerprint, response):
+        self.backend.set(
+            self.make_key(scope, key),
+            {'fingerprint': fingerprint, 'status': response.status_code, 'data': response.data},
+            self.ttl,
+        )
+
+
+def idempotent_response(request, handler):
+    """
+    Ejecuta ``handler`` una sola vez por ``Idempotency-Key``.
+
+    Sin cabecera ``Idempotency-Key`` la petición se ejecuta sin más.
+
+    Args:
+        request (Request): La petición de DRF, con el cuerpo ya analizable en ``request.data``.
+        handler (callable): Función sin argumentos que ejecuta la escritura y retorna la respuesta.
+
+    Returns:
+        Response: La respuesta de ``handler``, la guardada para la clave o un
+        error 400, 409 o 422.
+    """
+    key = request.headers.get(HEADER)
+    if key is None:
+        return handler()
+    if not key or len(key) > MAX_KEY_LENGTH:
+        return Response(
+            {'detail': f'La cabecera {HEADER} debe tener entre 1 y {MAX_KEY_LENGTH} caracteres.'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    store = get_idempotency_store()
+    scope = f'{request.method}:{request.path}'
+    fingerprint = store.fingerprint(request.data)
+
+    entry = store.get(scope, key)
+    if entry is None:
+        if not store.acquire(scope, key):
+            metrics.IDEMPOTENCY_REQUESTS.inc(result='conflict')
+            return Response(
+                {'detail': f'Ya hay una petición en curso con esta {HEADER}.'}, status=status.HTTP_409_CONFLICT,
+            )
+        try:
+            # La respuesta pudo guardarse entre la lectura y la reserva
+            entry = store.get(scope, key)
+            if entry is None:
+                response = handler()
+                if status.is_success(response.status_code):
+                    store.save(scope, key, fingerprint, response)
+                    metrics.IDEMPOTENCY_REQUESTS.inc(result='stored')
+                return response
+        finally:
+            store.release(scope, key)
+
+    if entry['fingerprint'] != fingerprint:
+        metrics.IDEMPOTENCY_REQUESTS.inc(result='mismatch')
+        return Response(
+            {'detail': f'La {HEADER} ya se usó con otro cuerpo de petición.'},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    metrics.IDEMPOTENCY_REQUESTS.inc(result='replayed')
+    return Response(entry['data'], status=entry['status'], headers={REPLAYED_HEADER: 'true'})
+
+
+_idempotency_store = None
+
+PROCESS_LOCAL_ERROR = (
+    "IDEMPOTENCY['BACKEND'] guarda las claves en la memoria de cada proceso, de modo que "
+    "los reintentos atendidos por otro worker se ejecutarían de nuevo."
+)
+PROCESS_LOCAL_HINT = (
+    "Usar '_apps.api.cache.DatabaseBackend' o '_apps.api.cache.DjangoCacheBackend' con una "
+    "caché compartida (Redis, Memcached). Un backend en memoria solo se admite con DEBUG."
+)
+
+
+def get_config():
+    return {**DEFAULT_SETTINGS, **getattr(settings, 'IDEMPOTENCY', {})}
+
+
+@checks.register()
+def check_shared_backend(app_configs, **kwargs):
+    """
+    Comprobación de sistema: fuera de ``DEBUG`` el almacén debe ser compartido entre procesos.
+    """
+    if settings.DEBUG or not is_process_local(get_config()):
+        return []
+    return [checks.Error(PROCESS_LOCAL_ERROR, hint=PROCESS_LOCAL_HINT, id='api.E001')]
+
+
+def get_idempotency_store():
+    """
+    Retorna el almacén configurado en ``settings.IDEMPOTENCY``, creándolo en el primer uso.
+
+    Returns:
+        IdempotencyStore: El almacén compartido del proceso.
+
+    Raises:
+        ImproperlyConfigured: Si el backend guarda los datos en memoria del proceso y ``DEBUG`` está desactivado.
+    """
+    global _idempotency_store
+    if _idempotency_store is None:
+        config = get_config()
+        if not settings.DEBUG and is_process_local(config):
+            raise ImproperlyConfigured(f'{PROCESS_LOCAL_ERROR} {PROCESS_LOCAL_HINT}')
+        backend = import_string(config['BACKEND'])(**config['OPTIONS'])
+        _idempotency_store = IdempotencyStore(backend, ttl=config['TTL'], lock_ttl=config['LOCK_TTL'])
+    return _idempotency_store
+
+
+@receiver(setting_changed)
+def _reset_store(setting, **kwargs):
+    global _idempotency_store
+    if setting in ('IDEMPOTENCY', 'DEBUG', 'CACHES'):
+        _idempotency_store = None
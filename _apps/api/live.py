@@ -0,0 +1,213 @@
+"""
+Precios en directo por server-sent events (SSE), servidos con ASGI.
+
+Cada símbolo con suscriptores tiene un único poller (``SymbolFeed``) que
+consulta la instantánea intradía al upstream cada ``LIVE_STREAM['INTERVAL']``
+segundos y reparte los cambios a todos los suscriptores del proceso mediante
+colas ``asyncio``. El coste en el upstream es una llamada por símbolo e
+intervalo, sea cual sea el número de clientes conectados.
+
+Las colas están acotadas (``QUEUE_SIZE``): si un cliente lento no consume sus
+eventos se descartan los más antiguos, de modo que el poller nunca se bloquea
+y el cliente recibe siempre el último precio. Un suscriptor nuevo recibe de
+inmediato el último precio conocido. El poller se detiene cuando se
+desconecta el último suscriptor.
+
+La función que consulta el upstream se configura en ``LIVE_STREAM['FETCHER']``
+(por defecto ``_apps.api.upstream.afetch_snapshot``), lo que permite
+sustituirla por una falsa en los tests o en los benchmarks.
+
+Los pollers viven en el event loop del proceso: con varios workers cada uno
+mantiene los suyos.
+"""
+import asyncio
+import json
+import logging
+import weakref
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from rest_framework.exceptions import APIException
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {
+    'FETCHER': '_apps.api.upstream.afetch_snapshot',
+    'INTERVAL': 5.0,  # Segundos entre consultas al upstream por símbolo
+    'QUEUE_SIZE': 16,  # Eventos pendientes por cliente antes de descartar los más antiguos
+    'HEARTBEAT': 15.0,  # Segundos sin eventos tras los que se envía un comentario para mantener la conexión
+}
+
+_hubs = weakref.WeakKeyDictionary()
+
+
+def live_setting(name):
+    """
+    Retorna un parámetro de ``settings.LIVE_STREAM``, con su valor por defecto.
+    """
+    return getattr(settings, 'LIVE_STREAM', {}).get(name, DEFAULT_SETTINGS[name])
+
+
+class SymbolFeed:
+    """
+    Poller compartido de un símbolo y sus suscriptores.
+
+    Args:
+        symbol (str): El símbolo consultado.
+        fetcher (callable): Corrutina ``fetcher(symbol)`` que retorna la instantánea o ``None``.
+        interval (float): Segundos entre consultas.
+        queue_size (int): Tamaño de la cola de cada suscriptor.
+    """
+
+    def __init__(self, symbol, fetcher, interval, queue_size):
+        self.symbol = symbol
+        self.fetcher = fetcher
+        self.interval = interval
+        self.queue_size = queue_size
+        self.subscribers = set()
+        self.last = None
+        self.task = None
+
+    def subscribe(self):
+        """
+        Añade un suscriptor y arranca el poller si es el primero.
+
+        Returns:
+            asyncio.Queue: La cola de eventos del suscriptor, con el último precio si se conoce.
+        """
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        if self.last is not None:
+            queue.put_nowait(self.last)
+        self.subscribers.add(queue)
+        if self.task is None:
+            self.task = asyncio.get_running_loop().create_task(self.run())
+        return queue
+
+    def unsubscribe(self, queue):
+        """
+        Retira un suscriptor y detiene el poller si era el último.
+        """
+        self.subscribers.discard(queue)
+        if not self.subscribers and self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def publish(self, event):
+        """
+        Entrega ``event`` a todos los suscriptores sin esperar a ninguno.
+
+        En las colas llenas se descarta el evento más antiguo.
+        """
+        dropped = 0
+        for queue in self.subscribers:
+            if queue.full():
+                queue.get_nowait()
+                dropped += 1
+            queue.put_nowait(event)
+        metrics.LIVE_EVENTS.inc(len(self.subscribers) - dropped, result='delivered')
+        if dropped:
+            metrics.LIVE_EVENTS.inc(dropped, result='dropped')
+
+    async def run(self):
+        while True:
+            try:
+                snapshot = await self.fetcher(self.symbol)
+            except APIException as e:
+                self.publish({'event': 'error', 'data': {'detail': str(e.detail)}})
+            except Exception:
+                # Un fallo inesperado no debe detener el poller de todos los suscriptores
+                logger.exception('Error consultando la instantánea de %s', self.symbol)
+            else:
+                if snapshot is not None and (self.last is None or snapshot != self.last['data']):
+                    self.last = {'event': 'price', 'data': snapshot}
+                    self.publish(self.last)
+            await asyncio.sleep(self.interval)
+
+
+class LiveHub:
+    """
+    Registro de los ``SymbolFeed`` activos de un event loop.
+
+    Args:
+        fetcher (callable): Corrutina que consulta la instantánea de un símbolo.
+        interval (float): Segundos entre consultas por símbolo.
+        queue_size (int): Tamaño de la cola de cada suscriptor.
+    """
+
+    def __init__(self, fetcher, interval, queue_size):
+        self.fetcher = fetcher
+        self.interval = interval
+        self.queue_size = queue_size
+        self.feeds = {}
+
+    @contextmanager
+    def subscription(self, symbol):
+        """
+        Suscribe al llamante a los precios de ``symbol`` mientras dure el bloque ``with``.
+
+        Yields:
+            asyncio.Queue: La cola de eventos (``{'event': ..., 'data': ...}``).
+        """
+        symbol = symbol.upper()
+        feed = self.feeds.get(symbol)
+        if feed is None:
+            feed = self.feeds[symbol] = SymbolFeed(symbol, self.fetcher, self.interval, self.queue_size)
+        queue = feed.subscribe()
+        try:
+            yield queue
+        finally:
+            feed.unsubscribe(queue)
+            if not feed.subscribers:
+                self.feeds.pop(symbol, None)
+
+
+def get_live_hub():
+    """
+    Retorna el registro de pollers del event loop actual, creándolo en el primer uso.
+
+    Returns:
+        LiveHub: El registro compartido por las conexiones del event loop.
+    """
+    loop = asyncio.get_running_loop()
+    hub = _hubs.get(loop)
+    if hub is None:
+        hub = _hubs[loop] = LiveHub(
+            import_string(live_setting('FETCHER')), live_setting('INTERVAL'), live_setting('QUEUE_SIZE'),
+        )
+    return hub
+
+
+def format_event(event, data):
+    return f'event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n'
+
+
+async def event_stream(symbol):
+    """
+    Genera el cuerpo SSE de una suscripción a ``symbol`` hasta que el cliente se desconecta.
+
+    Al desconectarse el cliente, el servidor ASGI cancela el generador y la
+    suscripción se retira.
+    """
+    heartbeat = live_setting('HEARTBEAT')
+    with get_live_hub().subscription(symbol) as queue:
+        # Tiempo de reconexión sugerido al cliente; también envía las cabeceras de inmediato
+        yield f"retry: {int(live_setting('INTERVAL') * 1000)}\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+            else:
+                yield format_event(event['event'], event['data'])
+
+
+@receiver(setting_changed)
+def _reset_hubs(setting, **kwargs):
+    if setting == 'LIVE_STREAM':
+        _hubs.clear()
@@ -0,0 +1,57 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from rest_framework.exceptions import APIException
+
+from ...models import Company, DailyBar
+from ...timeseries import result_to_bar, today
+from ...upstream import fetch_aggregates
+
+
+class Command(BaseCommand):
+    """
+    Comando que descarga las barras diarias de los últimos N días para todas
+    las empresas y las inserta en bloque en la tabla DailyBar.
+
+    Las barras ya existentes se ignoran (``bulk_create(ignore_conflicts=True)``),
+    por lo que el comando puede ejecutarse repetidamente.
+
+    Uso:
+        python manage.py backfill_bars --days 365 [--symbol AAPL --symbol MSFT]
+    """
+    help = 'Descarga y almacena las barras diarias de los últimos N días para todas las empresas.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=365, help='Número de días hacia atrás a descargar.')
+        parser.add_argument('--symbol', action='append', dest='symbols', help='Limita el backfill a estos símbolos.')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Tamaño de lote para bulk_create.')
+
+    def handle(self, *args, **options):
+        end_date = today() - timedelta(days=1)
+        start_date = end_date - timedelta(days=options['days'])
+        batch_size = options['batch_size']
+
+        companies = Company.objects.only('id', 'symbol')
+        if options['symbols']:
+            companies = companies.filter(symbol__in=[symbol.upper() for symbol in options['symbols']])
+
+        pending, stored, failed = [], 0, 0
+        for company in companies.iterator():
+            try:
+                results = fetch_aggregates(company.symbol, start_date, end_date)
+            except APIException as e:
+                failed += 1
+                self.stderr.write(f'{company.symbol}: {e}')
+                continue
+
+            pending.extend(result_to_bar(company, result) for result in results)
+            if len(pending) >= batch_size:
+                stored += len(DailyBar.objects.bulk_create(pending, batch_size=batch_size, ignore_conflicts=True))
+                pending = []
+
+        if pending:
+            stored += len(DailyBar.objects.bulk_create(pending, batch_size=batch_size, ignore_conflicts=True))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Backfill {start_date} - {end_date}: {stored} barras procesadas, {failed} símbolos con error.'
+        ))
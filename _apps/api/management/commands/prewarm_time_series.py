@@ -0,0 +1,93 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from rest_framework.exceptions import APIException
+
+from ...cache import get_access_counter, get_time_series_cache, seconds_until_next_bar
+from ...models import Company
+from ...timeseries import load_time_serie, time_serie_window
+from ...upstream import TokenBucket, UpstreamUnavailable
+
+
+class Command(BaseCommand):
+    """
+    Comando que precarga las series temporales de todas las empresas tras el
+    cierre de la barra diaria, para que las lecturas detalladas encuentren la
+    caché y el almacén de barras ya actualizados.
+
+    Las empresas se recorren por número de accesos recientes (ver
+    ``AccessCounter``), de modo que las más consultadas se
+    precargan primero, y las llamadas a la API se limitan con un token bucket
+    a ``PREWARM['CALLS_PER_MINUTE']``. Las series aún frescas en caché se omiten.
+
+    Con ``--loop`` el comando no termina: hace una pasada al arrancar y otra
+    ``PREWARM['DELAY']`` segundos después de cada cierre de barra. No requiere
+    un broker; basta con ejecutarlo como un proceso más (p. ej. un servicio de
+    ``compose.yml``). Los accesos se leen de ``ACCESS_COUNTS``, que debe ser
+    un backend compartido (por defecto, la base de datos). La precarga solo
+    llega a los workers si ``TIME_SERIES_CACHE`` también es compartida
+    (``DjangoCacheBackend`` con Redis o Memcached): con ``LocMemBackend`` la
+    caché precargada es la de este proceso y los workers solo se benefician
+    del almacén de barras.
+
+    Uso:
+        python manage.py prewarm_time_series [--loop] [--calls-per-minute 5] [--symbol AAPL]
+    """
+    help = 'Precarga las series temporales de todas las empresas, priorizando las más consultadas.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Repite la precarga tras cada cierre de barra.')
+        parser.add_argument('--calls-per-minute', type=int, default=settings.PREWARM['CALLS_PER_MINUTE'],
+                            help='Llamadas a la API por minuto como máximo.')
+        parser.add_argument('--delay', type=int, default=settings.PREWARM['DELAY'],
+                            help='Segundos de espera tras el cierre de barra antes de cada pasada.')
+        parser.add_argument('--symbol', action='append', dest='symbols', help='Limita la precarga a estos símbolos.')
+
+    def handle(self, *args, **options):
+        rate_limiter = TokenBucket.per_minute(options['calls_per_minute'])
+        self.prewarm(options['symbols'], rate_limiter)
+        while options['loop']:
+            wait = seconds_until_next_bar(bar_close=get_time_series_cache().bar_close) + options['delay']
+            self.stdout.write(f'Próxima precarga en {wait:.0f} s.')
+            time.sleep(wait)
+            close_old_connections()
+            self.prewarm(options['symbols'], rate_limiter)
+
+    def prewarm(self, symbols, rate_limiter):
+        """
+        Recorre las empresas por accesos recientes y recarga las series que no están frescas.
+        """
+        cache = get_time_series_cache()
+        companies = Company.objects.only('id', 'symbol')
+        if symbols:
+            companies = companies.by_symbols(symbols)
+        companies = list(companies)
+        hits = get_access_counter().counts(company.symbol for company in companies)
+        companies.sort(key=lambda company: (-hits.get(company.symbol, 0), company.symbol))
+
+        start_date, end_date = time_serie_window()
+        start, end = start_date.isoformat(), end_date.isoformat()
+        loaded, skipped, failed = 0, 0, 0
+        for company in companies:
+            if cache.validators(company.symbol, start, end, fresh_only=True) is not None:
+                skipped += 1
+                continue
+            try:
+                serie = load_time_serie(company, start_date, end_date, rate_limiter=rate_limiter)
+            except UpstreamUnavailable as e:
+                # Con el upstream caído o el circuito abierto no tiene sentido seguir
+                failed += 1
+                self.stderr.write(f'{company.symbol}: {e}; se interrumpe la precarga.')
+                break
+            except APIException as e:
+                failed += 1
+                self.stderr.write(f'{company.symbol}: {e}')
+                continue
+            cache.set(company.symbol, start, end, serie)
+            loaded += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Precarga {start} - {end}: {loaded} series cargadas, {skipped} frescas, {failed} con error.'
+        ))
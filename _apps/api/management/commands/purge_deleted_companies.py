@@ -0,0 +1,87 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from ...models import Company, CompanyReference, DailyBar
+
+
+def delete_in_batches(queryset, batch_size, pause=0):
+    """
+    Borra las filas de ``queryset`` en lotes de ``batch_size``.
+
+    Cada lote es una sentencia ``DELETE ... WHERE pk IN (...)`` con su propia
+    transacción, de modo que los bloqueos duran poco y el WAL se genera de
+    forma gradual; ``pause`` segundos entre lotes dejan que las réplicas lo
+    apliquen.
+
+    Returns:
+        int: El número de filas borradas.
+    """
+    model = queryset.model
+    deleted = 0
+    while True:
+        pks = list(queryset.order_by().values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return deleted
+        deleted += model._base_manager.filter(pk__in=pks).delete()[0]
+        if pause:
+            time.sleep(pause)
+
+
+class Command(BaseCommand):
+    """
+    Comando que borra físicamente las empresas eliminadas (``deleted_at``) hace
+    más de ``SOFT_DELETE['RETENTION']`` segundos, junto con sus barras y sus
+    datos de referencia.
+
+    Las eliminaciones de la API solo marcan las empresas (ver
+    ``CompanyQuerySet.soft_delete``); este comando hace el borrado costoso en
+    segundo plano y por lotes de ``SOFT_DELETE['BATCH_SIZE']`` filas: primero
+    las barras, después los datos de referencia y por último las empresas, que
+    ya no tienen filas que borrar en cascada. Las empresas pendientes se
+    localizan con el índice parcial ``api_company_deleted_at_idx``.
+
+    Con ``--loop`` el comando no termina: repite la purga cada
+    ``SOFT_DELETE['INTERVAL']`` segundos, como el servicio ``purge`` de
+    ``compose.yml``.
+
+    Uso:
+        python manage.py purge_deleted_companies [--loop] [--retention 3600] [--batch-size 5000]
+    """
+    help = 'Borra por lotes las empresas eliminadas y sus datos asociados.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Repite la purga periódicamente.')
+        parser.add_argument('--retention', type=int, default=settings.SOFT_DELETE['RETENTION'],
+                            help='Segundos que se conserva una empresa eliminada antes de purgarla.')
+        parser.add_argument('--batch-size', type=int, default=settings.SOFT_DELETE['BATCH_SIZE'],
+                            help='Filas borradas por sentencia.')
+        parser.add_argument('--pause', type=float, default=settings.SOFT_DELETE['PAUSE'],
+                            help='Segundos de espera entre lotes.')
+
+    def handle(self, *args, **options):
+        self.purge(options['retention'], options['batch_size'], options['pause'])
+        while options['loop']:
+            time.sleep(settings.SOFT_DELETE['INTERVAL'])
+            close_old_connections()
+            self.purge(options['retention'], options['batch_size'], options['pause'])
+
+    def purge(self, retention, batch_size, pause):
+        """
+        Borra las empresas eliminadas antes de ``retention`` segundos, de ``batch_size`` en ``batch_size``.
+        """
+        expired = Company.all_objects.deleted().filter(deleted_at__lte=timezone.now() - timedelta(seconds=retention))
+        companies, bars = 0, 0
+        while True:
+            ids = list(expired.order_by('deleted_at').values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            bars += delete_in_batches(DailyBar.objects.filter(company_id__in=ids), batch_size, pause)
+            delete_in_batches(CompanyReference.objects.filter(company_id__in=ids), batch_size, pause)
+            companies += delete_in_batches(Company.all_objects.filter(pk__in=ids), batch_size, pause)
+
+        self.stdout.write(self.style.SUCCESS(f'Purga: {companies} empresas y {bars} barras borradas.'))
@@ -0,0 +1,401 @@
+"""
+Métricas del proceso en formato de texto de Prometheus.
+
+El registro no depende de ninguna librería externa. Cada proceso acumula sus
+series en memoria; las actualizaciones son un incremento bajo un ``Lock``, de
+modo que el coste por petición es despreciable frente a la consulta a la base
+de datos más simple.
+
+Con varios workers (gunicorn), ``/metrics`` lo atiende un worker cualquiera,
+así que sus series no bastan: con ``METRICS_MULTIPROCESS_DIR`` cada proceso
+vuelca una instantánea de su registro a ``<dir>/<pid>.json`` cada
+``METRICS_EXPORT_INTERVAL`` segundos (y al terminar), y ``render`` suma las
+de todos los procesos. Las de los workers que terminan se acumulan en
+``archive.json`` (ver ``archive_snapshot`` y ``gunicorn.conf.py``), de modo que
+los contadores no retroceden cuando gunicorn recicla un worker. Las series de
+los demás procesos llegan con un retraso de hasta ``METRICS_EXPORT_INTERVAL``.
+
+Además de las series globales, cada petición acumula sus tiempos de base de
+datos y de upstream en una ``ContextVar`` (ver ``request_timings``), que
+``MetricsMiddleware`` usa para etiquetar las métricas por vista y para la
+cabecera ``Server-Timing``. La ``ContextVar`` se propaga a los hilos de
+``sync_to_async``, por lo que también cubre las vistas asíncronas.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+# Límites de los histogramas de latencia, en segundos
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Instantánea de los procesos que ya terminaron (ver ``archive_snapshot``)
+ARCHIVE = 'archive.json'
+
+_request_timings = ContextVar('request_timings', default=None)
+
+
+def format_labels(labelnames, values, extra=()):
+    pairs = [*zip(labelnames, values), *extra]
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def label_key(values):
+    """
+    Clave de una serie: los valores de sus etiquetas como texto, de modo que un
+    mismo valor dado como ``int`` o como ``str`` (``200``, ``'error'``) cae en la
+    misma serie y las claves siempre se pueden ordenar.
+    """
+    return tuple(str(value) for value in values)
+
+
+class Counter:
+    """
+    Contador monótono con etiquetas.
+
+    Args:
+        name (str): Nombre de la serie.
+        documentation (str): Texto de ``# HELP``.
+        labelnames (tuple): Nombres de las etiquetas.
+    """
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = label_key(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(label_key(labels[name] for name in self.labelnames), 0)
+
+    def snapshot(self):
+        """
+        Returns:
+            list: Los valores por etiquetas, serializables en JSON.
+        """
+        with self._lock:
+            return self.dump(self._values)
+
+    @staticmethod
+    def dump(values):
+        return [[list(key), value] for key, value in values.items()]
+
+    @staticmethod
+    def combine(values, snapshot):
+        """
+        Suma a ``values`` los valores de una instantánea de ``snapshot``.
+        """
+        for key, value in snapshot:
+            key = label_key(key)
+            values[key] = values.get(key, 0) + value
+
+    def samples(self, values=None):
+        """
+        Genera las líneas de las series del proceso o, si se indican, de ``values``.
+        """
+        if values is None:
+            with self._lock:
+                values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield f'{self.name}{format_labels(self.labelnames, key)} {value}'
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram:
+    """
+    Histograma acumulativo con etiquetas, con los límites de ``buckets``.
+
+    Args:
+        name (str): Nombre de la serie.
+        documentation (str): Texto de ``# HELP``.
+        labelnames (tuple): Nombres de las etiquetas.
+        buckets (tuple): Límites superiores de los intervalos, en orden ascendente.
+    """
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = label_key(labels[name] for name in self.labelnames)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            else:
+                counts[-1] += 1
+            self._values[key] = (counts, total + value)
+
+    def count(self, **labels):
+        counts, _ = self._values.get(label_key(labels[name] for name in self.labelnames), ([], 0.0))
+        return sum(counts)
+
+    def snapshot(self):
+        """
+        Returns:
+            list: Los recuentos por intervalo y la suma por etiquetas, serializables en JSON.
+        """
+        with self._lock:
+            return self.dump(self._values)
+
+    @staticmethod
+    def dump(values):
+        return [[list(key), list(counts), total] for key, (counts, total) in values.items()]
+
+    @staticmethod
+    def combine(values, snapshot):
+        """
+        Suma a ``values`` los recuentos y las sumas de una instantánea de ``snapshot``.
+        """
+        for key, counts, total in snapshot:
+            key = label_key(key)
+            current, current_total = values.get(key) or ([0] * len(counts), 0.0)
+            values[key] = ([a + b for a, b in zip(current, counts)], current_total + total)
+
+    def samples(self, values=None):
+        """
+        Genera las líneas de las series del proceso o, si se indican, de ``values``.
+        """
+        if values is None:
+            with self._lock:
+                values = {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+        for key, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, '+Inf'), counts):
+                cumulative += count
+                yield f'{self.name}_bucket{format_labels(self.labelnames, key, [("le", bound)])} {cumulative}'
+            yield f'{self.name}_sum{format_labels(self.labelnames, key)} {total}'
+            yield f'{self.name}_count{format_labels(self.labelnames, key)} {cumulative}'
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+REQUEST_DURATION = Histogram(
+    'api_request_duration_seconds', 'Duración de las peticiones HTTP.', ('view', 'method', 'status'),
+)
+DB_QUERIES = Counter('api_db_queries_total', 'Consultas a la base de datos.', ('view',))
+DB_QUERY_SECONDS = Counter('api_db_query_seconds_total', 'Tiempo total en consultas a la base de datos.', ('view',))
+UPSTREAM_DURATION = Histogram(
+    'api_upstream_request_duration_seconds', 'Duración de las llamadas a polygon.io.', ('endpoint', 'status'),
+)
+CACHE_REQUESTS = Counter('api_cache_requests_total', 'Lecturas de las cachés por resultado.', ('cache', 'result'))
+IDEMPOTENCY_REQUESTS = Counter(
+    'api_idempotency_requests_total', 'Escrituras con Idempotency-Key por resultado.', ('result',),
+)
+UPSTREAM_COALESCED = Counter(
+    'api_upstream_coalesced_total', 'Llamadas al upstream resueltas con la llamada en curso de otro hilo o proceso.',
+    ('resource', 'scope'),
+)
+LIVE_EVENTS = Counter(
+    'api_live_events_total', 'Eventos de precios en directo entregados o descartados por cliente.', ('result',),
+)
+
+REGISTRY = [
+    REQUEST_DURATION, DB_QUERIES, DB_QUERY_SECONDS, UPSTREAM_DURATION, CACHE_REQUESTS, IDEMPOTENCY_REQUESTS,
+    UPSTREAM_COALESCED, LIVE_EVENTS,
+]
+
+
+def snapshot():
+    """
+    Returns:
+        dict: La instantánea de todas las métricas del proceso, por nombre.
+    """
+    return {metric.name: metric.snapshot() for metric in REGISTRY}
+
+
+def _write_json(path, data):
+    # Escritura atómica: quien lea el fichero nunca lo ve a medias
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        # El fichero de un worker que acaba de archivarse
+        return {}
+
+
+def write_snapshot(directory):
+    """
+    Vuelca la instantánea del proceso a ``<directory>/<pid>.json``.
+    """
+    _write_json(os.path.join(directory, f'{os.getpid()}.json'), snapshot())
+
+
+def aggregate(directory):
+    """
+    Suma las instantáneas de todos los procesos de ``directory``, tras volcar la del proceso actual.
+
+    Returns:
+        dict: Los valores de cada métrica por nombre, como los que admite ``samples``.
+    """
+    write_snapshot(directory)
+    values = {metric.name: {} for metric in REGISTRY}
+    for name in os.listdir(directory):
+        if not name.endswith('.json'):
+            continue
+        data = _read_json(os.path.join(directory, name))
+        for metric in REGISTRY:
+            metric.combine(values[metric.name], data.get(metric.name, []))
+    return values
+
+
+def archive_snapshot(directory, pid):
+    """
+    Suma la instantánea del proceso ``pid``, que ha terminado, a ``archive.json`` y la elimina.
+
+    Solo debe llamarse desde un único proceso (el maestro de gunicorn).
+    """
+    path = os.path.join(directory, f'{pid}.json')
+    if not os.path.exists(path):
+        return
+    archive = os.path.join(directory, ARCHIVE)
+    merged, data = _read_json(archive), _read_json(path)
+    for metric in REGISTRY:
+        values = {}
+        metric.combine(values, merged.get(metric.name, []))
+        metric.combine(values, data.get(metric.name, []))
+        merged[metric.name] = metric.dump(values)
+    _write_json(archive, merged)
+    os.remove(path)
+
+
+_exporter_pid = None
+_exporter_lock = threading.Lock()
+
+
+def start_exporter(directory, interval):
+    """
+    Arranca, una vez por proceso, el hilo que vuelca la instantánea del proceso cada ``interval`` segundos.
+
+    Se compara el pid porque los procesos creados con ``fork`` heredan la
+    variable pero no el hilo.
+    """
+    global _exporter_pid
+    if _exporter_pid == os.getpid():
+        return
+    with _exporter_lock:
+        if _exporter_pid == os.getpid():
+            return
+        _exporter_pid = os.getpid()
+        os.makedirs(directory, exist_ok=True)
+        threading.Thread(target=_export, args=(directory, interval), name='metrics-exporter', daemon=True).start()
+
+
+def _export(directory, interval):
+    while True:
+        time.sleep(interval)
+        try:
+            write_snapshot(directory)
+        except OSError:
+            logger.exception('No se pudo volcar la instantánea de métricas en %s', directory)
+
+
+def render(directory=None):
+    """
+    Args:
+        directory (str, opcional): Directorio de las instantáneas de los procesos; sin él, solo el proceso actual.
+
+    Returns:
+        str: Todas las métricas del registro en formato de texto de Prometheus.
+    """
+    values = aggregate(directory) if directory else {}
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        lines.extend(metric.samples(values.get(metric.name)))
+    return '\n'.join(lines) + '\n'
+
+
+def request_timings():
+    """
+    Returns:
+        dict: Los tiempos acumulados de la petición en curso, o ``None`` fuera de una petición.
+    """
+    return _request_timings.get()
+
+
+@contextmanager
+def track_request():
+    """
+    Abre el acumulador de tiempos de una petición (``db``, ``db_queries``, ``upstream``, ``upstream_calls``).
+    """
+    token = _request_timings.set({'db': 0.0, 'db_queries': 0, 'upstream': 0.0, 'upstream_calls': 0})
+    try:
+        yield _request_timings.get()
+    finally:
+        _request_timings.reset(token)
+
+
+def observe_upstream(endpoint, status, seconds):
+    """
+    Registra una llamada al upstream en el histograma y en los tiempos de la petición en curso.
+
+    Args:
+        endpoint (str): Recurso llamado (``aggregates``, ``ticker``).
+        status (str): Código HTTP de la respuesta o el tipo de error.
+        seconds (float): Duración de la llamada.
+    """
+    UPSTREAM_DURATION.observe(seconds, endpoint=endpoint, status=status)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings['upstream'] += seconds
+        timings['upstream_calls'] += 1
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    ``execute_wrapper`` que suma la duración de cada consulta a la petición en curso.
+    """
+    timings = _request_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings['db'] += time.perf_counter() - started
+        timings['db_queries'] += 1
+
+
+@receiver(connection_created)
+def _instrument_connection(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
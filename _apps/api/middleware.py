@@ -0,0 +1,98 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from . import metrics
+from .routers import pin_to_primary, replica_aliases
+
+# Métodos que no modifican datos (RFC 9110)
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+
+class MetricsMiddleware:
+    """
+    Middleware que mide cada petición y la desglosa en base de datos, upstream y aplicación.
+
+    Registra la latencia por vista (``resolver_match.view_name``), método y
+    estado, y las consultas a la base de datos por vista (ver ``_apps.api.metrics``).
+    Con ``settings.METRICS_SERVER_TIMING`` añade además la cabecera
+    ``Server-Timing``, que los navegadores muestran en la pestaña de red.
+
+    Con ``settings.METRICS_MULTIPROCESS_DIR`` arranca en la primera petición de
+    cada proceso el volcado periódico de sus métricas, que ``/metrics`` agrega.
+
+    Debe ser el primer middleware para que la latencia incluya a los demás.
+    Admite peticiones síncronas y asíncronas.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with metrics.track_request() as timings:
+            started = time.perf_counter()
+            response = self.get_response(request)
+            return self.process_response(request, response, timings, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        with metrics.track_request() as timings:
+            started = time.perf_counter()
+            response = await self.get_response(request)
+            return self.process_response(request, response, timings, time.perf_counter() - started)
+
+    def process_response(self, request, response, timings, elapsed):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unmatched'
+        metrics.REQUEST_DURATION.observe(elapsed, view=view, method=request.method, status=response.status_code)
+        metrics.DB_QUERIES.inc(timings['db_queries'], view=view)
+        metrics.DB_QUERY_SECONDS.inc(timings['db'], view=view)
+        if settings.METRICS_MULTIPROCESS_DIR:
+            metrics.start_exporter(settings.METRICS_MULTIPROCESS_DIR, settings.METRICS_EXPORT_INTERVAL)
+
+        if settings.METRICS_SERVER_TIMING:
+            app = max(elapsed - timings['db'] - timings['upstream'], 0)
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={timings["db"] * 1000:.1f};desc="{timings["db_queries"]} queries"',
+                f'upstream;dur={timings["upstream"] * 1000:.1f};desc="{timings["upstream_calls"]} calls"',
+                f'app;dur={app * 1000:.1f}',
+                f'total;dur={elapsed * 1000:.1f}',
+            ])
+        return response
+
+
+class ReadYourWritesMiddleware:
+    """
+    Middleware que, tras una escritura con éxito, fija las lecturas del cliente a la base de datos principal.
+
+    Envía la cabecera de ``_apps.api.routers.pin_to_primary`` en las respuestas
+    2xx/3xx a peticiones que no son de solo lectura, de modo que el cliente lee
+    sus propias escrituras aunque las réplicas vayan con retraso. Sin réplicas
+    configuradas no hace nada.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        if request.method not in SAFE_METHODS and response.status_code < 400 and replica_aliases():
+            pin_to_primary(response)
+        return response
@@ -0,0 +1,43 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:53
+
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Upper
+
+
+def normalize_symbols(apps, schema_editor):
+    """
+    Normaliza los símbolos existentes a mayúsculas antes de crear el índice único.
+
+    Si hay símbolos repetidos la migración se detiene y los enumera, para que
+    se resuelvan manualmente en lugar de perder datos.
+    """
+    Company = apps.get_model('api', 'Company')
+    duplicates = list(
+        Company.objects.values(normalized=Upper('symbol'))
+        .annotate(total=Count('id'))
+        .filter(total__gt=1)
+        .values_list('normalized', flat=True)
+    )
+    if duplicates:
+        raise RuntimeError(
+            'No se puede crear el índice único sobre el símbolo; hay empresas repetidas: '
+            + ', '.join(sorted(duplicates))
+        )
+    Company.objects.update(symbol=Upper('symbol'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_dailybar'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_symbols, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='company',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Upper('symbol'), name='api_company_symbol_upper_uniq'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+from django.db.models.functions import Upper
+
+
+def search_indexes():
+    """
+    Índices de la búsqueda, copia de las expresiones de ``_apps.api.search`` en el momento de la migración.
+    """
+    vector = (
+        SearchVector('symbol', 'name', weight='A', config='simple')
+        + SearchVector('description', weight='B', config='simple')
+    )
+    return [
+        GinIndex(vector, name='api_company_search_gin'),
+        GinIndex(OpClass('name', name='gin_trgm_ops'), name='api_company_name_trgm'),
+        models.Index(OpClass(Upper('symbol'), name='text_pattern_ops'), name='api_company_symbol_prefix'),
+    ]
+
+
+def create_search_indexes(apps, schema_editor):
+    """
+    Crea la extensión ``pg_trgm`` y los índices de la búsqueda, solo en PostgreSQL.
+
+    Los índices usan las mismas expresiones que las consultas de
+    ``_apps.api.search``, de modo que el planificador los reconoce. En otros
+    motores la búsqueda no usa índices y la migración no hace nada.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Company = apps.get_model('api', 'Company')
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for index in search_indexes():
+        schema_editor.add_index(Company, index)
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Company = apps.get_model('api', 'Company')
+    for index in search_indexes():
+        schema_editor.remove_index(Company, index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_company_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
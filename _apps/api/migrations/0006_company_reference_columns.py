@@ -0,0 +1,166 @@
+# Generated by Django 5.1.15 on 2026-10-18 13:15
+
+from datetime import date
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import F
+
+BATCH_SIZE = 1000
+
+
+def extract_columns(data):
+    """
+    Copia de ``_apps.api.models.reference_fields`` en el momento de la migración.
+    """
+    data = data if isinstance(data, dict) else {}
+
+    def convert(key, cast):
+        try:
+            return cast(data[key])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    return {
+        'market_cap': convert('market_cap', float),
+        'exchange': (convert('primary_exchange', str) or '').upper()[:10],
+        'sic_code': (convert('sic_code', str) or '')[:4],
+        'currency': (convert('currency_name', str) or '').upper()[:3],
+        'list_date': convert('list_date', date.fromisoformat),
+        'shares_outstanding': convert('share_class_shares_outstanding', int),
+    }
+
+
+def split_reference_data(apps, schema_editor):
+    """
+    Rellena las columnas de mercado a partir del JSON ``alpha_vantage`` y mueve el JSON a ``CompanyReference``.
+
+    Las empresas se procesan por lotes de ``BATCH_SIZE``: un ``bulk_update`` y
+    un ``bulk_create`` por lote.
+    """
+    Company = apps.get_model('api', 'Company')
+    CompanyReference = apps.get_model('api', 'CompanyReference')
+    columns = list(extract_columns(None))
+    companies = Company.objects.filter(alpha_vantage__isnull=False).only('id', 'alpha_vantage').order_by('pk')
+
+    def flush(batch):
+        Company.objects.bulk_update(batch, columns)
+        CompanyReference.objects.bulk_create(
+            [CompanyReference(company=company, data=company.alpha_vantage) for company in batch]
+        )
+
+    batch = []
+    for company in companies.iterator(chunk_size=BATCH_SIZE):
+        for name, value in extract_columns(company.alpha_vantage).items():
+            setattr(company, name, value)
+        batch.append(company)
+        if len(batch) == BATCH_SIZE:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+
+
+def join_reference_data(apps, schema_editor):
+    Company = apps.get_model('api', 'Company')
+    CompanyReference = apps.get_model('api', 'CompanyReference')
+    for reference in CompanyReference.objects.iterator(chunk_size=BATCH_SIZE):
+        Company.objects.filter(pk=reference.company_id).update(alpha_vantage=reference.data)
+
+
+def ordering_indexes(vendor):
+    """
+    Índices de las columnas de mercado por las que se ordena el listado.
+
+    Los nulos se ordenan como el menor valor, igual que en la paginación por
+    cursor (``_apps.api.pagination``), de modo que cada índice sirve en ambos
+    sentidos. SQLite no admite ``NULLS FIRST`` en los índices, pero ya ordena
+    así los nulos en sentido ascendente; por eso los índices dependen del motor
+    y se crean aquí y no en ``Company.Meta``.
+
+    Args:
+        vendor (str): El motor de la base de datos (``connection.vendor``).
+
+    Returns:
+        list: Los índices.
+    """
+    def nullable(name):
+        return F(name).asc(nulls_first=True) if vendor == 'postgresql' else F(name)
+
+    return [
+        models.Index(nullable('market_cap'), F('id'), name='api_company_market_cap_idx'),
+        models.Index(nullable('list_date'), F('id'), name='api_company_list_date_idx'),
+        models.Index(F('exchange'), nullable('market_cap'), F('id'), name='api_company_exchange_cap_idx'),
+    ]
+
+
+def create_ordering_indexes(apps, schema_editor):
+    """
+    Crea los índices de ordenación con el orden de los nulos del motor.
+    """
+    Company = apps.get_model('api', 'Company')
+    for index in ordering_indexes(schema_editor.connection.vendor):
+        schema_editor.add_index(Company, index)
+
+
+def drop_ordering_indexes(apps, schema_editor):
+    Company = apps.get_model('api', 'Company')
+    for index in ordering_indexes(schema_editor.connection.vendor):
+        schema_editor.remove_index(Company, index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_company_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompanyReference',
+            fields=[
+                ('company', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='reference', serialize=False, to='api.company')),
+                ('data', models.JSONField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='company',
+            name='currency',
+            field=models.CharField(blank=True, default='', max_length=3),
+        ),
+        migrations.AddField(
+            model_name='company',
+            name='exchange',
+            field=models.CharField(blank=True, default='', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='company',
+            name='list_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='company',
+            name='market_cap',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='company',
+            name='shares_outstanding',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='company',
+            name='sic_code',
+            field=models.CharField(blank=True, default='', max_length=4),
+        ),
+        migrations.RunPython(split_reference_data, join_reference_data),
+        migrations.RemoveField(
+            model_name='company',
+            name='alpha_vantage',
+        ),
+        migrations.RunPython(create_ordering_indexes, drop_ordering_indexes),
+        migrations.AddIndex(
+            model_name='company',
+            index=models.Index(fields=['sic_code'], name='api_company_sic_code_idx'),
+        ),
+    ]
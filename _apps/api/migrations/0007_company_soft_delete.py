@@ -0,0 +1,31 @@
+# Generated by Django 5.1.15 on 2026-10-18 13:29
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_company_reference_columns'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='company',
+            name='api_company_symbol_upper_uniq',
+        ),
+        migrations.AddField(
+            model_name='company',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='company',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', False)), fields=['deleted_at'], name='api_company_deleted_at_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='company',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Upper('symbol'), condition=models.Q(('deleted_at__isnull', True)), name='api_company_symbol_upper_uniq'),
+        ),
+    ]
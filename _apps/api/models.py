@@ -1,5 +1,123 @@
 import uuid
-from django.db import models
+from datetime import date
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from django.db.models import Q
+from django.db.models.functions import Upper
+from django.utils import timezone
+
+# Campos de los datos de referencia de polygon.io (``/v3/reference/tickers``) que se guardan como columnas
+REFERENCE_FIELDS = {
+    'market_cap': 'market_cap',
+    'exchange': 'primary_exchange',
+    'sic_code': 'sic_code',
+    'currency': 'currency_name',
+    'list_date': 'list_date',
+    'shares_outstanding': 'share_class_shares_outstanding',
+}
+
+
+def reference_fields(data):
+    """
+    Extrae de los datos de referencia de un símbolo los valores de las columnas de ``REFERENCE_FIELDS``.
+
+    Los valores ausentes o con un formato inesperado se dejan vacíos.
+
+    Args:
+        data (dict): Los datos de referencia, o ``None``.
+
+    Returns:
+        dict: El valor de cada columna.
+    """
+    data = data or {}
+
+    def convert(name, cast):
+        try:
+            return cast(data[REFERENCE_FIELDS[name]])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    return {
+        'market_cap': convert('market_cap', float),
+        'exchange': (convert('exchange', str) or '').upper()[:10],
+        'sic_code': (convert('sic_code', str) or '')[:4],
+        'currency': (convert('currency', str) or '').upper()[:3],
+        'list_date': convert('list_date', date.fromisoformat),
+        'shares_outstanding': convert('shares_outstanding', int),
+    }
+
+
+class CompanyQuerySet(models.QuerySet):
+    """
+    QuerySet de Company con búsquedas por símbolo sobre el índice único ``UPPER(symbol)``.
+    """
+
+    def alive(self):
+        """
+        Filtra las empresas no eliminadas.
+        """
+        return self.filter(deleted_at__isnull=True)
+
+    def deleted(self):
+        """
+        Filtra las empresas eliminadas y pendientes de purgar (ver ``purge_deleted_companies``).
+        """
+        return self.filter(deleted_at__isnull=False)
+
+    def soft_delete(self):
+        """
+        Marca como eliminadas las empresas del queryset con un solo ``UPDATE``.
+
+        Las barras y los datos de referencia no se tocan: los borra después, por
+        lotes, el comando ``purge_deleted_companies``. Así el coste no depende de
+        los datos asociados a cada empresa.
+
+        Returns:
+            int: El número de empresas eliminadas.
+        """
+        now = timezone.now()
+        return self.alive().update(deleted_at=now, updated_at=now)
+
+    def by_symbols(self, symbols):
+        """
+        Filtra las empresas cuyos símbolos están en ``symbols``, sin distinguir mayúsculas.
+
+        Args:
+            symbols (iterable): Los símbolos a buscar.
+
+        Returns:
+            QuerySet: Las empresas encontradas.
+        """
+        return self.alias(symbol_upper=Upper('symbol')).filter(
+            symbol_upper__in=[symbol.upper() for symbol in symbols]
+        )
+
+    def by_symbol(self, symbol):
+        """
+        Filtra la empresa con el símbolo indicado, sin distinguir mayúsculas.
+        """
+        return self.alias(symbol_upper=Upper('symbol')).filter(symbol_upper=symbol.upper())
+
+    def search(self, term):
+        """
+        Filtra las empresas cuyo símbolo, nombre o descripción coinciden con ``term``,
+        con la relevancia anotada en ``rank`` (ver ``_apps.api.search``).
+        """
+        from .search import search
+
+        return search(self, term)
+
+
+class CompanyManager(models.Manager.from_queryset(CompanyQuerySet)):
+    """
+    Manager por defecto de Company: excluye las empresas eliminadas.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().alive()
+
 
 class Company(models.Model):
     """
@@ -9,16 +127,55 @@ class Company(models.Model):
         id (UUID): Identificador único de la empresa, generado automáticamente.
         name (str): Nombre de la empresa.
         description (str): Descripción corta de la empresa.
-        symbol (str): Símbolo de la empresa (abreviatura, ticker).
-        alpha_vantage (JSONField): Información adicional de la empresa proveniente de Alpha Vantage, 
-                                   almacenada en formato JSON (opcional).
+        symbol (str): Símbolo de la empresa (abreviatura, ticker), único sin distinguir mayúsculas.
+        market_cap (float): Capitalización bursátil (opcional).
+        exchange (str): Código MIC del mercado principal, p. ej. ``XNYS``.
+        sic_code (str): Código SIC del sector.
+        currency (str): Moneda de cotización (ISO 4217).
+        list_date (date): Fecha de salida a bolsa (opcional).
+        shares_outstanding (int): Acciones en circulación de la clase (opcional).
+        updated_at (datetime): Fecha de la última modificación, usada en los ``ETag`` y ``Last-Modified``.
+        deleted_at (datetime): Fecha de eliminación, o ``None`` si la empresa no está eliminada.
+
+    Las empresas se eliminan de forma lógica (``deleted_at``): ``objects`` solo
+    retorna las no eliminadas y ``all_objects`` todas. El símbolo de una
+    empresa eliminada queda libre, ya que el índice único solo cubre las no
+    eliminadas.
+
+    Las columnas de mercado se extraen de los datos de referencia de polygon.io
+    al asignar ``alpha_vantage``. Los datos en bruto se guardan aparte, en
+    ``CompanyReference``, y solo se leen cuando se accede a ``alpha_vantage``.
     """
     
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     name = models.CharField(max_length=50)
     description = models.CharField(max_length=100)
     symbol = models.CharField(max_length=5)
-    alpha_vantage = models.JSONField(blank=True, null=True)
+    market_cap = models.FloatField(blank=True, null=True)
+    exchange = models.CharField(max_length=10, blank=True, default='')
+    sic_code = models.CharField(max_length=4, blank=True, default='')
+    currency = models.CharField(max_length=3, blank=True, default='')
+    list_date = models.DateField(blank=True, null=True)
+    shares_outstanding = models.BigIntegerField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    deleted_at = models.DateTimeField(blank=True, null=True)
+
+    objects = CompanyManager()
+    all_objects = CompanyQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            # Índice único sobre el símbolo normalizado, usado también por las búsquedas por símbolo.
+            # Es parcial: las empresas eliminadas no ocupan su símbolo
+            models.UniqueConstraint(
+                Upper('symbol'), condition=Q(deleted_at__isnull=True), name='api_company_symbol_upper_uniq',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['sic_code'], name='api_company_sic_code_idx'),
+            # Solo contiene las empresas pendientes de purgar, de modo que la purga no recorre la tabla
+            models.Index(fields=['deleted_at'], condition=Q(deleted_at__isnull=False), name='api_company_deleted_at_idx'),
+        ]
 
     def __str__(self):
         """
@@ -28,3 +185,161 @@ class Company(models.Model):
             str: El nombre de la empresa.
         """
         return self.name
+
+    @property
+    def alpha_vantage(self):
+        """
+        Datos de referencia en bruto de polygon.io, leídos de ``CompanyReference`` al acceder a ellos.
+
+        Returns:
+            dict: Los datos, o ``None`` si no se guardaron.
+        """
+        if '_alpha_vantage' in self.__dict__:
+            return self._alpha_vantage
+        try:
+            return self.reference.data
+        except CompanyReference.DoesNotExist:
+            return None
+
+    @alpha_vantage.setter
+    def alpha_vantage(self, data):
+        """
+        Asigna los datos de referencia y actualiza las columnas extraídas de ellos.
+        Los datos en bruto se guardan en ``CompanyReference`` con ``save``.
+        """
+        self._alpha_vantage = data
+        for name, value in reference_fields(data).items():
+            setattr(self, name, value)
+
+    def save(self, *args, **kwargs):
+        """
+        Guarda la empresa y, si se asignaron datos de referencia, también sus datos en bruto.
+        """
+        if '_alpha_vantage' not in self.__dict__:
+            return super().save(*args, **kwargs)
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            self.save_references([self])
+
+    @classmethod
+    def save_references(cls, companies):
+        """
+        Guarda los datos de referencia en bruto asignados a ``companies``, si
+        ``settings.STORE_RAW_REFERENCE_DATA`` está activo, con una sola consulta.
+
+        Las empresas sin datos pierden los que tuvieran almacenados.
+        """
+        store = getattr(settings, 'STORE_RAW_REFERENCE_DATA', True)
+        stored, cleared = [], []
+        for company in companies:
+            if '_alpha_vantage' not in company.__dict__:
+                continue
+            data = company.__dict__.pop('_alpha_vantage')
+            if store and data is not None:
+                company.reference = CompanyReference(company=company, data=data)
+                stored.append(company.reference)
+            else:
+                cleared.append(company)
+
+        if cleared:
+            CompanyReference.objects.filter(company__in=cleared).delete()
+        if stored:
+            CompanyReference.objects.bulk_create(
+                stored, update_conflicts=True, unique_fields=['company'], update_fields=['data'],
+            )
+
+
+class DailyBar(models.Model):
+    """
+    Modelo que representa una barra diaria (OHLCV) de la serie de precios de una empresa.
+
+    Las barras se descargan de la API de polygon.io y se almacenan localmente para
+    que las lecturas de la serie temporal se resuelvan con una consulta por rango
+    sobre el índice único (company, date).
+
+    Atributos:
+        company (Company): Empresa a la que pertenece la barra.
+        date (date): Día de la barra.
+        timestamp (int): Inicio de la ventana de agregación en milisegundos (campo `t` de la API).
+        open (float): Precio de apertura.
+        high (float): Precio máximo.
+        low (float): Precio mínimo.
+        close (float): Precio de cierre.
+        volume (float): Volumen negociado.
+        vwap (float): Precio medio ponderado por volumen (opcional).
+        transactions (int): Número de transacciones (opcional).
+    """
+
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='daily_bars')
+    date = models.DateField()
+    timestamp = models.BigIntegerField()
+    open = models.FloatField()
+    high = models.FloatField()
+    low = models.FloatField()
+    close = models.FloatField()
+    volume = models.FloatField()
+    vwap = models.FloatField(blank=True, null=True)
+    transactions = models.IntegerField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['date']
+        constraints = [
+            models.UniqueConstraint(fields=['company', 'date'], name='api_dailybar_company_date_uniq'),
+        ]
+
+    def __str__(self):
+        """
+        Retorna una representación en cadena del objeto DailyBar.
+
+        Returns:
+            str: El símbolo de la empresa y la fecha de la barra.
+        """
+        return f'{self.company.symbol} {self.date}'
+
+
+class CompanyReference(models.Model):
+    """
+    Datos de referencia en bruto de una empresa, tal como los retorna polygon.io.
+
+    Se guardan en una tabla aparte para que las lecturas de ``Company`` no
+    carguen ni analicen el JSON; las columnas que se consultan están en
+    ``Company`` (ver ``REFERENCE_FIELDS``).
+
+    Atributos:
+        company (Company): Empresa a la que pertenecen los datos.
+        data (JSONField): Respuesta de ``/v3/reference/tickers`` (campo ``results``).
+    """
+
+    company = models.OneToOneField(Company, on_delete=models.CASCADE, primary_key=True, related_name='reference')
+    data = models.JSONField()
+
+    def __str__(self):
+        """
+        Returns:
+            str: El símbolo de la empresa.
+        """
+        return self.company.symbol
+
+
+class CacheEntry(models.Model):
+    """
+    Entrada de los datos compartidos entre procesos en la base de datos (ver
+    ``_apps.api.cache.DatabaseBackend``), como las respuestas guardadas por
+    ``Idempotency-Key``.
+
+    Atributos:
+        key (str): Clave de la entrada, con el prefijo de su backend.
+        value (JSONField): Valor guardado; los contadores son enteros.
+        expires_at (datetime): Fecha a partir de la cual la entrada se ignora y puede borrarse.
+    """
+
+    key = models.CharField(max_length=255, primary_key=True)
+    value = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        """
+        Returns:
+            str: La clave de la entrada.
+        """
+        return self.key
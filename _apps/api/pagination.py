@@ -0,0 +1,166 @@
+import base64
+import json
+import uuid
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Paginación por cursor (keyset) sobre una columna de ordenación más la clave primaria.
+
+    Cada página se obtiene con ``WHERE (columna, id) > (valor, id)`` sobre el
+    último elemento de la página anterior, en lugar de un ``OFFSET``: el coste
+    no crece con la profundidad de la página y el resultado es estable aunque se
+    inserten o eliminen filas entre peticiones. El desempate por ``id`` (UUID)
+    garantiza un orden total aunque la columna tenga valores repetidos.
+
+    La columna se elige con ``?ordering=`` entre los ``ordering_fields`` de la
+    vista (``-`` para orden descendente) y el tamaño de página con ``?page_size=``.
+    La vista puede redefinir ``default_ordering``, que puede ser una anotación
+    del queryset (p. ej. la relevancia de una búsqueda).
+
+    En las columnas que admiten nulos, los nulos se ordenan como el menor
+    valor (primero en orden ascendente y al final en descendente) y el cursor
+    los trata de forma explícita, ya que ``NULL`` no se compara con ``<`` ni ``>``.
+
+    Atributos:
+        page_size (int): Tamaño de página por defecto.
+        max_page_size (int): Tamaño de página máximo admitido.
+        default_ordering (str): Ordenación cuando no se indica ``?ordering=``.
+    """
+    page_size = 50
+    max_page_size = 500
+    default_ordering = 'name'
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    ordering_query_param = 'ordering'
+    invalid_cursor_message = 'Cursor inválido.'
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def get_ordering(self, request, view):
+        """
+        Retorna la columna de ordenación solicitada y si el orden es descendente.
+
+        Returns:
+            tuple: (columna, descendente).
+        """
+        default = getattr(view, 'default_ordering', self.default_ordering)
+        ordering = request.query_params.get(self.ordering_query_param, default)
+        field = ordering.lstrip('-')
+        if field not in {*getattr(view, 'ordering_fields', []), default.lstrip('-')}:
+            ordering = default
+            field = ordering.lstrip('-')
+        return field, ordering.startswith('-')
+
+    @staticmethod
+    def is_nullable(model, field):
+        try:
+            return model._meta.get_field(field).null
+        except FieldDoesNotExist:
+            return False
+
+    def after_cursor(self, value, pk, lookup, nullable):
+        """
+        Retorna la condición de las filas posteriores a ``(value, pk)`` en el sentido de ``lookup``.
+
+        Con nulos (el menor valor), en sentido ascendente los nulos preceden a
+        cualquier valor y en sentido descendente van detrás.
+        """
+        if value is None:
+            condition = Q(**{f'{self.field}__isnull': True, f'pk__{lookup}': pk})
+            return condition | Q(**{f'{self.field}__isnull': False}) if lookup == 'gt' else condition
+        condition = Q(**{f'{self.field}__{lookup}': value}) | Q(**{self.field: value, f'pk__{lookup}': pk})
+        if nullable and lookup == 'lt':
+            condition |= Q(**{f'{self.field}__isnull': True})
+        return condition
+
+    def encode_cursor(self, instance, reverse):
+        payload = {'v': getattr(instance, self.field), 'id': str(instance.pk), 'r': int(reverse)}
+        encoded = base64.urlsafe_b64encode(json.dumps(payload, cls=DjangoJSONEncoder).encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            # El id se compara con la clave primaria: un valor que no es un UUID fallaría en la consulta
+            return payload['v'], uuid.UUID(payload['id']), bool(payload['r'])
+        except (TypeError, ValueError, KeyError, AttributeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.field, descending = self.get_ordering(request, view)
+
+        cursor = self.decode_cursor(request)
+        reverse = cursor[2] if cursor else False
+
+        # Al retroceder se recorre el índice en sentido contrario y se invierte la página
+        backwards = descending != reverse
+        lookup = 'lt' if backwards else 'gt'
+        prefix = '-' if backwards else ''
+        nullable = self.is_nullable(queryset.model, self.field)
+        if cursor:
+            queryset = queryset.filter(self.after_cursor(cursor[0], cursor[1], lookup, nullable))
+        if nullable:
+            column = F(self.field).desc(nulls_last=True) if backwards else F(self.field).asc(nulls_first=True)
+        else:
+            column = f'{prefix}{self.field}'
+        rows = list(queryset.order_by(column, f'{prefix}pk')[:self.page_size + 1])
+
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = cursor is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+
+        self.page = rows
+        return rows
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,33 @@
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class NDJSONParser(BaseParser):
+    """
+    Parser para cuerpos NDJSON (un objeto JSON por línea).
+
+    El cuerpo se lee línea a línea desde el stream de la petición, sin cargarlo
+    completo en memoria antes de decodificarlo. Las líneas vacías se ignoran.
+
+    Returns:
+        list: Los objetos decodificados, en el orden de la petición.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+
+        rows = []
+        for number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rows.append(json.loads(line.decode(encoding)))
+            except ValueError as exc:
+                raise ParseError(f'NDJSON parse error - línea {number}: {exc}')
+        return rows
@@ -0,0 +1,207 @@
+import csv
+import io
+import json
+import struct
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+from .timeseries import SerieColumns
+
+# Columnas de precios, que se empaquetan como float32 (unos 7 dígitos significativos)
+PRICE_FIELDS = ('o', 'h', 'l', 'c', 'vw')
+# Enteros candidatos para las columnas enteras, de menor a mayor, con sus límites
+UNSIGNED_DTYPES = [('<u1', 0, 2**8 - 1), ('<u2', 0, 2**16 - 1), ('<u4', 0, 2**32 - 1), ('<i8', -2**63, 2**63 - 1)]
+SIGNED_DTYPES = [('<i1', -2**7, 2**7 - 1), ('<i2', -2**15, 2**15 - 1), ('<i4', -2**31, 2**31 - 1), ('<i8', -2**63, 2**63 - 1)]
+
+
+def packed_dtype(field, values):
+    """
+    Retorna el dtype más estrecho con el que se empaqueta una columna de ``PackedSeriesRenderer``.
+
+    Los precios son ``<f4``. Las columnas enteras sin nulos (``d``, ``v``,
+    ``n``) usan el entero más pequeño que contiene sus valores; con nulos o
+    decimales, ``<f8`` con ``NaN`` para los ausentes.
+
+    Args:
+        field (str): Nombre de la columna.
+        values (ndarray): Los valores como ``float64``, con ``NaN`` para los nulos.
+
+    Returns:
+        str: El dtype, o ``None`` si todos los valores son nulos y la columna se omite.
+    """
+    import numpy as np
+
+    if not values.size:
+        return None
+    low = np.fmin.reduce(values)
+    if np.isnan(low):
+        # ``fmin`` solo retorna ``NaN`` si todos los valores lo son
+        return None
+    if field in PRICE_FIELDS:
+        return '<f4'
+    # Un ``NaN`` no es igual a sí mismo, de modo que los nulos también van a ``<f8``
+    if not (values == np.trunc(values)).all():
+        return '<f8'
+    high = values.max()
+    for dtype, lowest, highest in SIGNED_DTYPES if low < 0 else UNSIGNED_DTYPES:
+        if lowest <= low and high <= highest:
+            return dtype
+    return '<f8'
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Renderer NDJSON (un objeto JSON por línea).
+
+    Las exportaciones construyen directamente una respuesta en streaming con
+    ``ndjson_lines``; el renderer se usa para la negociación de contenido
+    (``?format=ndjson``) y para las respuestas no streaming, como los errores.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        return ''.join(ndjson_lines(rows)).encode(self.charset)
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    Renderer CSV. La primera fila contiene los nombres de las columnas.
+
+    Al igual que ``NDJSONRenderer``, se usa para la negociación de contenido
+    (``?format=csv``) y para las respuestas no streaming.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        columns = list(rows[0]) if rows else []
+        return ''.join(csv_lines(columns, rows)).encode(self.charset)
+
+
+class ColumnarJSONRenderer(JSONRenderer):
+    """
+    Renderer JSON en el que las series temporales se representan por columnas.
+
+    Se elige con ``?format=columnar`` o ``Accept: application/vnd.columnar+json``.
+    Las vistas consultan ``columnar`` en el renderer aceptado y los
+    serializadores construyen las series con ``serie_columns``.
+    """
+    media_type = 'application/vnd.columnar+json'
+    format = 'columnar'
+    columnar = True
+
+
+class PackedSeriesRenderer(BaseRenderer):
+    """
+    Renderer binario con las series temporales empaquetadas como arrays numéricos.
+
+    La respuesta contiene:
+
+    - La longitud de la cabecera (``uint32`` little-endian).
+    - La cabecera, el documento JSON de la respuesta en UTF-8, rellenada con
+      espacios hasta que los datos empiezan en un múltiplo de 8 bytes. Cada
+      serie aparece como ``{"length": n, "columns": {campo: [dtype, offset]}}``.
+    - Los datos: una columna tras otra, alineadas a 8 bytes, con el dtype más
+      estrecho que admiten sus valores (ver ``packed_dtype``): ``<f4`` para los
+      precios y el entero más pequeño para ``d``, ``v`` y ``n`` (``<f8`` con
+      ``NaN`` si faltan valores). Las columnas sin ningún valor se omiten. Los
+      ``offset`` son relativos al inicio de los datos.
+
+    En JavaScript cada columna se lee sin copiar con el array tipado de su
+    dtype, p. ej. ``new Float32Array(buffer, inicio + offset, length)`` para
+    ``<f4`` o ``Uint16Array`` para ``<u2``. Se elige con ``?format=packed`` o
+    ``Accept: application/vnd.packed-series``.
+    """
+    media_type = 'application/vnd.packed-series'
+    format = 'packed'
+    charset = None
+    render_style = 'binary'
+    columnar = True
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        import numpy as np
+
+        chunks, size = [], 0
+
+        def pack(value):
+            nonlocal size
+            if isinstance(value, SerieColumns):
+                columns = {}
+                for field, values in value.items():
+                    # ``None`` se convierte en ``NaN`` al crear el array de floats
+                    values = np.array(values, dtype=np.float64)
+                    dtype = packed_dtype(field, values)
+                    if dtype is None:
+                        continue
+                    buffer = values.astype(dtype).tobytes()
+                    buffer += b'\0' * (-len(buffer) % 8)
+                    columns[field] = [dtype, size]
+                    chunks.append(buffer)
+                    size += len(buffer)
+                return {'length': len(value['d']), 'columns': columns}
+            if isinstance(value, dict):
+                return {key: pack(item) for key, item in value.items()}
+            if isinstance(value, list):
+                return [pack(item) for item in value]
+            return value
+
+        header = json.dumps(pack(data), cls=DjangoJSONEncoder).encode()
+        header += b' ' * (-(len(header) + 4) % 8)
+        return struct.pack('<I', len(header)) + header + b''.join(chunks)
+
+
+def ndjson_lines(rows):
+    """
+    Genera una línea JSON por fila.
+
+    Args:
+        rows (iterable): Diccionarios a serializar.
+
+    Yields:
+        str: La fila en JSON terminada en salto de línea.
+    """
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+
+def csv_lines(columns, rows):
+    """
+    Genera las líneas CSV de la cabecera y de cada fila.
+
+    Los valores compuestos (diccionarios y listas) se escriben como JSON.
+
+    Args:
+        columns (list): Nombres de las columnas, en orden.
+        rows (iterable): Diccionarios con esas columnas.
+
+    Yields:
+        str: La línea CSV terminada en salto de línea.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def line(values):
+        writer.writerow(values)
+        value = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return value
+
+    yield line(columns)
+    for row in rows:
+        yield line([
+            json.dumps(row[column], cls=DjangoJSONEncoder) if isinstance(row[column], (dict, list)) else row[column]
+            for column in columns
+        ])
@@ -0,0 +1,107 @@
+"""
+Enrutado de las lecturas a las réplicas de la base de datos.
+
+Las réplicas se declaran en ``settings.DATABASE_REPLICAS`` (alias de
+``DATABASES``). Por defecto todas las consultas van a ``default``: solo las
+lecturas que se ejecutan dentro de ``replica_reads()`` se envían a una réplica
+elegida al azar. ``CompanyViewSet`` lo activa en las acciones de lectura
+(``replica_actions``), de modo que las lecturas que preceden a una escritura
+(p. ej. la comprobación de unicidad del símbolo) nunca leen datos atrasados.
+
+*Read-your-writes*: tras una escritura con éxito, ``ReadYourWritesMiddleware``
+responde con la cabecera ``READ_YOUR_WRITES['HEADER']`` (``Primary-Until``),
+que indica hasta cuándo (timestamp UNIX) deben ir las lecturas a ``default``.
+El cliente la reenvía en sus peticiones y, mientras no caduque, sus lecturas
+van a ``default`` (ver ``is_pinned``). La ventana debe cubrir el retraso
+habitual de la replicación.
+
+Se usa una cabecera y no una cookie porque el cliente web es de otro origen:
+una cookie ``SameSite=Lax`` no viaja en sus ``fetch`` y una ``SameSite=None``
+exigiría credenciales en CORS. La cabecera se expone y se admite en CORS
+(``CORS_EXPOSE_HEADERS`` y ``CORS_ALLOW_HEADERS``). Un valor más allá de la
+ventana se ignora, de modo que un cliente no puede fijarse a ``default``
+indefinidamente.
+"""
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+DEFAULT_SETTINGS = {
+    'HEADER': 'Primary-Until',
+    'WINDOW': 5,
+}
+
+_read_alias = ContextVar('read_alias', default=None)
+
+
+def read_your_writes_setting(name):
+    """
+    Retorna un parámetro de ``settings.READ_YOUR_WRITES``, con su valor por defecto.
+    """
+    return getattr(settings, 'READ_YOUR_WRITES', {}).get(name, DEFAULT_SETTINGS[name])
+
+
+def replica_aliases():
+    return list(getattr(settings, 'DATABASE_REPLICAS', []))
+
+
+@contextmanager
+def replica_reads():
+    """
+    Envía a una réplica las lecturas del bloque ``with``, si hay réplicas configuradas.
+
+    Yields:
+        str: El alias de la réplica elegida, o ``None`` si no hay réplicas.
+    """
+    replicas = replica_aliases()
+    if not replicas:
+        yield None
+        return
+    alias = random.choice(replicas)
+    token = _read_alias.set(alias)
+    try:
+        yield alias
+    finally:
+        _read_alias.reset(token)
+
+
+def is_pinned(request):
+    """
+    Indica si las lecturas del cliente deben ir a ``default`` porque escribió hace poco.
+    """
+    try:
+        until = float(request.headers.get(read_your_writes_setting('HEADER'), 0))
+    except ValueError:
+        return False
+    now = time.time()
+    return now < until <= now + read_your_writes_setting('WINDOW')
+
+
+def pin_to_primary(response):
+    """
+    Marca al cliente para que sus lecturas vayan a ``default`` durante ``READ_YOUR_WRITES['WINDOW']`` segundos.
+    """
+    response[read_your_writes_setting('HEADER')] = f"{time.time() + read_your_writes_setting('WINDOW'):.3f}"
+
+
+class PrimaryReplicaRouter:
+    """
+    Router de ``DATABASE_ROUTERS``: las escrituras y las migraciones van a
+    ``default`` y las lecturas a la réplica activa en ``replica_reads()``, si la hay.
+    """
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Todas las bases de datos contienen los mismos datos
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return False if db in replica_aliases() else None
@@ -0,0 +1,99 @@
+"""
+Búsqueda de empresas por nombre, símbolo y descripción (``?q=`` en el listado).
+
+En PostgreSQL la búsqueda combina:
+
+- Texto completo con prefijos (``to_tsquery('simple', 'appl:*')``) sobre un
+  ``SearchVector`` de símbolo, nombre y descripción, con un índice GIN sobre
+  la misma expresión.
+- Similitud de trigramas por palabra sobre el nombre (``pg_trgm``), que tolera
+  errores de escritura, con un índice GIN ``gin_trgm_ops``.
+- Prefijo del símbolo sobre ``UPPER(symbol)``, con un índice ``text_pattern_ops``.
+
+Los índices se crean en la migración ``0005_company_search_indexes`` solo en
+PostgreSQL, con una copia de las expresiones de este módulo, que deben
+coincidir exactamente con las de las consultas. Cambiar ``search_vector`` o la
+expresión del símbolo requiere una migración nueva que recree el índice con la
+expresión nueva.
+
+En otros motores (SQLite en los tests) se usa una búsqueda por subcadena sin
+índices, con la misma relevancia para los símbolos.
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity
+from django.db import connections, models
+from django.db.models import Case, F, Q, Value, When
+from django.db.models.functions import Cast, Upper
+
+# Configuración de texto sin stemming ni stopwords: los nombres propios y los símbolos no se normalizan
+SEARCH_CONFIG = 'simple'
+
+
+def search_vector():
+    return (
+        SearchVector('symbol', 'name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('description', weight='B', config=SEARCH_CONFIG)
+    )
+
+
+def prefix_query(term):
+    """
+    Construye la consulta de texto completo que exige, como prefijo, cada palabra de ``term``.
+
+    Returns:
+        SearchQuery: La consulta, o ``None`` si ``term`` no contiene palabras.
+    """
+    words = re.findall(r'\w+', term)
+    if not words:
+        return None
+    return SearchQuery(' & '.join(f'{word}:*' for word in words), search_type='raw', config=SEARCH_CONFIG)
+
+
+def symbol_boost(term):
+    """
+    Relevancia adicional de los símbolos: 2 si coinciden con ``term`` y 1 si empiezan por él.
+    """
+    term = term.upper()
+    return Case(
+        When(symbol_upper=term, then=Value(2.0)),
+        When(symbol_upper__startswith=term, then=Value(1.0)),
+        default=Value(0.0),
+        output_field=models.FloatField(),
+    )
+
+
+def search(queryset, term):
+    """
+    Filtra ``queryset`` por ``term`` y anota la relevancia de cada fila en ``rank``.
+
+    ``rank`` se expresa en doble precisión para que su valor sea estable entre
+    consultas y sirva como columna de la paginación por cursor.
+
+    Args:
+        queryset (QuerySet): Las empresas.
+        term (str): El texto buscado.
+
+    Returns:
+        QuerySet: Las empresas que coinciden, con la anotación ``rank``.
+    """
+    queryset = queryset.alias(symbol_upper=Upper('symbol'))
+    matches = Q(symbol_upper__startswith=term.upper())
+
+    if connections[queryset.db].vendor != 'postgresql':
+        matches |= Q(name__icontains=term) | Q(description__icontains=term)
+        name_boost = Case(
+            When(name__istartswith=term, then=Value(0.5)), default=Value(0.0), output_field=models.FloatField(),
+        )
+        return queryset.filter(matches).annotate(
+            rank=Cast(symbol_boost(term) + name_boost, models.FloatField())
+        )
+
+    query = prefix_query(term)
+    relevance = symbol_boost(term) + TrigramWordSimilarity(term, 'name')
+    matches |= Q(name__trigram_word_similar=term)
+    if query is not None:
+        queryset = queryset.alias(search=search_vector())
+        matches |= Q(search=query)
+        relevance += SearchRank(F('search'), query)
+    return queryset.filter(matches).annotate(rank=Cast(relevance, models.FloatField()))
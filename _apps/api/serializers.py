@@ -1,11 +1,35 @@
-import os
-import requests
-
-from datetime import datetime, timedelta
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
 from rest_framework import serializers
+from rest_framework.exceptions import APIException
+from .analytics import INDICATORS
+from .cache import get_reference_data_cache, get_time_series_cache
 from .models import Company
+from .timeseries import load_time_serie, serie_columns, time_serie_window
+from .upstream import api_key, fetch_ticker
+
+DUPLICATED_SYMBOL_MESSAGE = "Ya existe una empresa con este símbolo."
+
+
+class SparseFieldsetMixin:
+    """
+    Mixin que limita los campos serializados a los solicitados por el cliente.
+
+    Los campos se reciben en el contexto (``fields``), normalmente desde el
+    parámetro ``?fields=id,name``. Los nombres desconocidos se ignoran; si no se
+    indica ninguno se serializan todos los campos.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = self.context.get('fields')
+        if requested:
+            for name in set(self.fields) - set(requested):
+                self.fields.pop(name)
 
-class CompanyReadSerializer(serializers.ModelSerializer):
+
+class CompanyReadSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializador para la lectura de datos básicos de la entidad Company.
 
@@ -14,55 +38,60 @@ class CompanyReadSerializer(serializers.ModelSerializer):
     """
     class Meta:
         model = Company
-        fields = ['id', 'name', 'description', 'symbol']
+        fields = ['id', 'name', 'description', 'symbol', 'exchange', 'market_cap', 'currency']
 
 
-class CompanyReadFullSerializer(serializers.ModelSerializer):
+class CompanyReadFullSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializador para la lectura detallada de la entidad Company, 
     incluyendo datos externos de Alpha Vantage.
 
     Este serializador extiende el CompanyReadSerializer añadiendo el campo 
     'alpha_vantage' que contiene información adicional y un campo 'time_serie' 
-    que se obtiene a través de la API de Alpha Vantage.
+    que se obtiene a través de la API de Alpha Vantage. Si el cliente excluye
+    'time_serie' con ``?fields=`` la serie no se consulta, y si excluye
+    'alpha_vantage' no se leen los datos en bruto (ver ``CompanyReference``).
     """
+    alpha_vantage = serializers.JSONField(read_only=True)
     time_serie = serializers.SerializerMethodField()
 
     class Meta:
         model = Company
-        fields = ['id', 'name', 'description', 'symbol', 'alpha_vantage', 'time_serie']
+        fields = [
+            'id', 'name', 'description', 'symbol', 'exchange', 'market_cap', 'currency', 'sic_code',
+            'list_date', 'shares_outstanding', 'alpha_vantage', 'time_serie',
+        ]
 
     def get_time_serie(self, obj):
         """
         Obtiene la serie temporal diaria de la empresa desde la API de Alpha Vantage.
 
+        La serie se cachea por (símbolo, fecha inicial, fecha final) hasta el
+        próximo cierre de barra diaria (ver ``_apps.api.cache``). En un fallo de
+        caché se lee del almacén local de barras y solo se consultan a la API los
+        días que faltan (ver ``_apps.api.timeseries``).
+
         Args:
             obj (Company): La instancia de Company para la que se solicita la serie temporal.
 
+        Con ``columnar`` en el contexto la serie se retorna por columnas (ver
+        ``serie_columns``).
+
         Returns:
-            dict: Los datos de la serie temporal en formato JSON obtenidos de la API.
+            list: Las barras diarias de la serie temporal.
         """
-        # Obtén el símbolo y la clave de API del entorno
-        symbol = obj.symbol
-        api_key = os.getenv('ALPHAVANTAGE_KEY', '')
-        end_date = datetime.now().strftime('%Y-%m-%d')
-        start_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
-
-        # Crea la URL para la consulta de la API
-        url = f"https://api.polygon.io/v2/aggs/ticker/{symbol}/range/1/day/{start_date}/{end_date}?apiKey={api_key}"
-
-        # Envía una solicitud GET a la API
-        try:
-            response = requests.get(url)
-            response.raise_for_status()
-            data = response.json()
-        except requests.exceptions.RequestException as e:
-            error_response = e.response.json()
-            response_message = f"{error_response['status']}: {error_response['message']}"
-            raise serializers.ValidationError(response_message)
-        
-        # Retorna los datos de la API
-        return data['results'] if 'results' in data and data['results'] else []
+        # La vista asíncrona entrega la serie ya cargada en el contexto
+        if 'time_serie' in self.context:
+            serie = self.context['time_serie']
+        else:
+            start_date, end_date = time_serie_window()
+
+            # La serie se sirve desde la caché; en un fallo se lee del almacén de barras
+            serie = get_time_series_cache().get_or_load(
+                obj.symbol, start_date.isoformat(), end_date.isoformat(),
+                lambda: load_time_serie(obj, start_date, end_date),
+            )
+        return serie_columns(serie) if self.context.get('columnar') else serie
 
 
 class CompanyWriteSerializer(serializers.ModelSerializer):
@@ -88,11 +117,29 @@ class CompanyWriteSerializer(serializers.ModelSerializer):
             str: El símbolo en mayúsculas si es válido.
 
         Raises:
-            serializers.ValidationError: Si el símbolo no es válido o no se encuentra información.
+            serializers.ValidationError: Si el símbolo no es válido, ya existe o no se encuentra información.
         """
         symbol_upper = value.upper()
 
-        data = self.get_company_data(symbol_upper)
+        # Si el símbolo no cambia se conservan los datos ya almacenados
+        if self.instance is not None and self.instance.symbol == symbol_upper:
+            return symbol_upper
+
+        # En las importaciones masivas la unicidad y los datos se resuelven
+        # antes, para todas las filas a la vez
+        reference_data = self.context.get('reference_data', {})
+        if symbol_upper in reference_data:
+            data = reference_data[symbol_upper]
+            if isinstance(data, Exception):
+                raise data
+        else:
+            # Se comprueba la unicidad antes de consultar la API
+            existing = Company.objects.by_symbol(symbol_upper)
+            if self.instance is not None:
+                existing = existing.exclude(pk=self.instance.pk)
+            if existing.exists():
+                raise serializers.ValidationError(DUPLICATED_SYMBOL_MESSAGE)
+            data = self.get_company_data(symbol_upper)
         if not data:
             raise serializers.ValidationError("El símbolo no es válido o no se encontró información.")
         
@@ -104,6 +151,9 @@ class CompanyWriteSerializer(serializers.ModelSerializer):
         """
         Obtiene los datos de la empresa desde la API de Alpha Vantage.
 
+        Los datos se cachean por símbolo, incluidos los símbolos inválidos
+        (ver ``ReferenceDataCache``).
+
         Args:
             symbol (str): El símbolo de la empresa.
 
@@ -111,26 +161,43 @@ class CompanyWriteSerializer(serializers.ModelSerializer):
             dict: Los datos de la empresa en formato JSON si existen.
 
         Raises:
-            serializers.ValidationError: Si ocurre un error al contactar la API o si la clave de API no está configurada.
+            serializers.ValidationError: Si la API responde con un error o si la clave de API no está configurada.
+            UpstreamUnavailable: Si la API no está disponible.
         """
-        api_key = os.getenv('ALPHAVANTAGE_KEY', '')
-        if not api_key:
+        if not api_key():
             raise serializers.ValidationError("API key for Alpha Vantage is not set.")
-        
-        url = f"https://api.polygon.io/v3/reference/tickers/{symbol}?apiKey={api_key}"
-        print( url )
-        
-        try:
-            response = requests.get(url)
-            response.raise_for_status()
-            data = response.json()
-        except requests.exceptions.RequestException as e:
-            error_response = e.response.json()
-            response_message = f"{error_response['status']}: {error_response['message']}"
-            raise serializers.ValidationError(response_message)
 
         # Retorna el JSON si existe y si es igual al símbolo ingresado.
-        return data['results'] if 'results' in data and data['results'] else None
+        return get_reference_data_cache().get_or_load(symbol, lambda: fetch_ticker(symbol))
+
+    @classmethod
+    def fetch_reference_data(cls, symbols, max_workers):
+        """
+        Consulta en paralelo los datos de varios símbolos, con un pool de hilos acotado.
+
+        El resultado se pasa en el contexto (``reference_data``) a los serializadores
+        de cada fila, de modo que ``validate_symbol`` no vuelve a consultar la API.
+
+        Args:
+            symbols (list): Símbolos en mayúsculas, sin duplicados.
+            max_workers (int): Número máximo de consultas simultáneas.
+
+        Returns:
+            dict: Para cada símbolo, sus datos, ``None`` si no existe o la
+            ``ValidationError`` a lanzar si la consulta falló.
+        """
+        serializer = cls()
+
+        def lookup(symbol):
+            try:
+                return serializer.get_company_data(symbol)
+            except APIException as e:
+                return serializers.ValidationError(e.detail)
+
+        if not symbols:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(symbols))) as executor:
+            return dict(zip(symbols, executor.map(lookup, symbols)))
 
     def create(self, validated_data):
         """
@@ -157,6 +224,117 @@ class CompanyWriteSerializer(serializers.ModelSerializer):
         Returns:
             Company: La instancia de Company actualizada.
         """
-        # Actualiza los datos validados con el response de la API
-        validated_data['alpha_vantage'] = self.company_data
+        # Actualiza los datos validados con el response de la API; si el símbolo
+        # no cambia se conservan los datos actuales sin leerlos
+        if hasattr(self, 'company_data'):
+            validated_data['alpha_vantage'] = self.company_data
         return super().update(instance, validated_data)
+
+
+def validate_date_range(attrs):
+    """
+    Completa ``start`` y ``end`` con el rango del detalle de una empresa y valida
+    que el rango no supere ``settings.TIME_SERIES_BATCH['MAX_DAYS']``.
+    """
+    start_date, end_date = time_serie_window()
+    attrs.setdefault('start', start_date)
+    attrs.setdefault('end', end_date)
+    if attrs['start'] > attrs['end']:
+        raise serializers.ValidationError("La fecha inicial no puede ser posterior a la final.")
+    max_days = settings.TIME_SERIES_BATCH['MAX_DAYS']
+    if (attrs['end'] - attrs['start']).days > max_days:
+        raise serializers.ValidationError(f"El rango no puede superar {max_days} días.")
+    return attrs
+
+
+class TimeSeriesBatchQuerySerializer(serializers.Serializer):
+    """
+    Serializador de los parámetros de la consulta de series temporales de varias empresas.
+
+    Las empresas se indican con ``ids`` y/o ``symbols`` (valores separados por
+    comas) y el rango con ``start`` y ``end`` (``YYYY-MM-DD``); por defecto se
+    usa el mismo rango que en el detalle de una empresa. El número de empresas
+    y la longitud del rango se acotan con ``settings.TIME_SERIES_BATCH``.
+    """
+    ids = serializers.CharField(required=False)
+    symbols = serializers.CharField(required=False)
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+    @staticmethod
+    def split(value):
+        return list(dict.fromkeys(item.strip() for item in value.split(',') if item.strip()))
+
+    def validate_ids(self, value):
+        ids = []
+        for item in self.split(value):
+            try:
+                ids.append(uuid.UUID(item))
+            except ValueError:
+                raise serializers.ValidationError(f"Identificador inválido: {item}.")
+        return ids
+
+    def validate_symbols(self, value):
+        return self.split(value.upper())
+
+    def validate(self, attrs):
+        attrs.setdefault('ids', [])
+        attrs.setdefault('symbols', [])
+        max_companies = settings.TIME_SERIES_BATCH['MAX_COMPANIES']
+        if not attrs['ids'] and not attrs['symbols']:
+            raise serializers.ValidationError("Indique las empresas con ids o symbols.")
+        if len(attrs['ids']) + len(attrs['symbols']) > max_companies:
+            raise serializers.ValidationError(f"Se admiten como máximo {max_companies} empresas por petición.")
+
+        return validate_date_range(attrs)
+
+
+class BulkDeleteSerializer(serializers.Serializer):
+    """
+    Serializador del cuerpo de la eliminación masiva de empresas: ``{"ids": [...]}``.
+
+    Los identificadores repetidos se descartan y su número se acota con
+    ``settings.SOFT_DELETE['MAX_IDS']``.
+    """
+    ids = serializers.ListField(child=serializers.UUIDField(), allow_empty=False)
+
+    def validate_ids(self, value):
+        ids = list(dict.fromkeys(value))
+        max_ids = settings.SOFT_DELETE['MAX_IDS']
+        if len(ids) > max_ids:
+            raise serializers.ValidationError(f"Se admiten como máximo {max_ids} empresas por petición.")
+        return ids
+
+
+class AnalyticsQuerySerializer(serializers.Serializer):
+    """
+    Serializador de los parámetros de los indicadores de una empresa.
+
+    ``indicators`` es una lista separada por comas de ``INDICATORS`` (por
+    defecto, todos), ``window`` la ventana de los indicadores móviles y el rango
+    se indica como en ``TimeSeriesBatchQuerySerializer``.
+    """
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    indicators = serializers.CharField(required=False)
+    window = serializers.IntegerField(required=False, default=20, min_value=2, max_value=250)
+
+    def validate_indicators(self, value):
+        indicators = TimeSeriesBatchQuerySerializer.split(value.lower())
+        unknown = [name for name in indicators if name not in INDICATORS]
+        if unknown:
+            raise serializers.ValidationError(
+                f"Indicadores desconocidos: {', '.join(unknown)}. Admitidos: {', '.join(INDICATORS)}."
+            )
+        return indicators
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        attrs['indicators'] = attrs.get('indicators') or list(INDICATORS)
+        return validate_date_range(attrs)
+
+
+class AnalyticsBatchQuerySerializer(AnalyticsQuerySerializer, TimeSeriesBatchQuerySerializer):
+    """
+    Serializador de los parámetros de los indicadores de varias empresas (``ids`` y/o ``symbols``).
+    """
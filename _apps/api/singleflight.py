@@ -0,0 +1,152 @@
+"""
+Coalescencia de llamadas concurrentes idénticas al upstream (*single-flight*).
+
+``SingleFlight.do(key, fn)`` ejecuta ``fn`` una sola vez para todas las
+llamadas concurrentes con la misma ``key`` dentro del proceso: el primer hilo
+(el líder) la ejecuta y los demás esperan y reciben el mismo resultado, o la
+misma excepción. Cuando la llamada termina la clave se libera, de modo que las
+llamadas posteriores vuelven a ejecutarse (el resultado se comparte a través
+de las cachés, no aquí).
+
+Con ``SINGLE_FLIGHT['ADVISORY_LOCK']`` activo y PostgreSQL, el líder de cada
+proceso toma además un advisory lock de sesión sobre la clave, de modo que
+los procesos coalescen entre sí: mientras otro proceso carga la clave se
+consulta periódicamente ``recheck`` (normalmente la caché compartida) y se usa
+su resultado en cuanto está disponible. Si el bloqueo no se obtiene en
+``LOCK_TIMEOUT`` segundos la llamada se ejecuta igualmente. Solo tiene sentido
+con un backend de caché compartido entre procesos (``DjangoCacheBackend``).
+
+Las llamadas coalescidas se cuentan en ``api_upstream_coalesced_total``.
+"""
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+
+from . import metrics
+
+DEFAULT_SETTINGS = {
+    'ADVISORY_LOCK': False,
+    'LOCK_TIMEOUT': 10.0,
+    'POLL_INTERVAL': 0.05,
+}
+
+
+def single_flight_setting(name):
+    """
+    Retorna un parámetro de ``settings.SINGLE_FLIGHT``, con su valor por defecto.
+    """
+    return getattr(settings, 'SINGLE_FLIGHT', {}).get(name, DEFAULT_SETTINGS[name])
+
+
+def advisory_lock_id(key):
+    """
+    Retorna el identificador (``bigint``) del advisory lock de ``key``.
+    """
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'big', signed=True)
+
+
+@contextmanager
+def advisory_lock(resource, key, recheck=None):
+    """
+    Toma el advisory lock de ``key`` mientras dura el bloque, si está configurado.
+
+    Mientras otro proceso tiene el bloqueo se consulta ``recheck`` cada
+    ``POLL_INTERVAL`` segundos. Se usa ``pg_try_advisory_lock`` y no la
+    variante bloqueante para no ocupar la conexión esperando y poder
+    abandonar la espera.
+
+    Yields:
+        El resultado de ``recheck`` si otro proceso ya lo obtuvo, o ``None``.
+    """
+    if not single_flight_setting('ADVISORY_LOCK') or connection.vendor != 'postgresql':
+        yield None
+        return
+
+    lock_id = advisory_lock_id(f'{resource}:{key}')
+    deadline = time.monotonic() + single_flight_setting('LOCK_TIMEOUT')
+    with connection.cursor() as cursor:
+        while True:
+            cursor.execute('SELECT pg_try_advisory_lock(%s)', [lock_id])
+            acquired = cursor.fetchone()[0]
+            # El proceso que tenía el bloqueo pudo terminar justo antes de soltarlo
+            value = recheck() if recheck is not None else None
+            if acquired or value is not None or time.monotonic() >= deadline:
+                break
+            time.sleep(single_flight_setting('POLL_INTERVAL'))
+
+    try:
+        if value is not None:
+            metrics.UPSTREAM_COALESCED.inc(resource=resource, scope='process')
+        yield value
+    finally:
+        if acquired:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_unlock(%s)', [lock_id])
+
+
+class _Call:
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Registro de las llamadas en curso de un tipo de recurso.
+
+    Args:
+        resource (str): Nombre del recurso, usado como prefijo de las claves y en las métricas.
+    """
+
+    def __init__(self, resource):
+        self.resource = resource
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, recheck=None):
+        """
+        Ejecuta ``fn`` una sola vez para todas las llamadas concurrentes con ``key``.
+
+        Args:
+            key (str): Identificador del recurso solicitado.
+            fn (callable): Función sin argumentos que lo obtiene.
+            recheck (callable, opcional): Función sin argumentos que retorna el
+                resultado ya obtenido por otro proceso, o ``None``. Solo se usa
+                con el advisory lock.
+
+        Returns:
+            El resultado de ``fn``, propio o de la llamada en curso.
+
+        Raises:
+            Exception: La excepción de ``fn``, también en las llamadas coalescidas.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            metrics.UPSTREAM_COALESCED.inc(resource=self.resource, scope='thread')
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            with advisory_lock(self.resource, key, recheck) as value:
+                call.value = value if value is not None else fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.value
@@ -0,0 +1,98 @@
+import json
+import math
+
+from django.test import SimpleTestCase
+from .analytics import INDICATORS, IndicatorMemo, compute
+from .cache import LocMemBackend, TimeSeriesCache
+
+
+def make_serie(closes):
+    return [
+        {'c': close, 'v': 1000.0 + index, 'vw': close + 0.5, 't': 1724630400000 + index * 86400000}
+        for index, close in enumerate(closes)
+    ]
+
+
+class IndicatorsTest(SimpleTestCase):
+
+    closes = [10.0, 11.0, 10.5, 12.0, 9.0, 9.5, 13.0, 12.5]
+
+    def test_indicators_match_reference_loops(self):
+        result = compute(make_serie(self.closes), INDICATORS, window=3)
+
+        self.assertIsNone(result['returns'][0])
+        self.assertAlmostEqual(result['returns'][1], 0.1)
+        self.assertEqual(result['sma'][:2], [None, None])
+        for index in range(2, len(self.closes)):
+            self.assertAlmostEqual(result['sma'][index], sum(self.closes[index - 2:index + 1]) / 3)
+
+        alpha, expected = 0.5, self.closes[0]
+        for index, close in enumerate(self.closes):
+            if index:
+                expected = alpha * close + (1 - alpha) * expected
+            self.assertAlmostEqual(result['ema'][index], expected)
+
+        returns = result['returns']
+        window = returns[-3:]
+        mean = sum(window) / 3
+        expected = math.sqrt(sum((value - mean) ** 2 for value in window) / 2) * math.sqrt(252)
+        self.assertEqual(result['volatility'][:3], [None, None, None])
+        self.assertAlmostEqual(result['volatility'][-1], expected)
+
+        self.assertAlmostEqual(result['vwap'][0], 10.5)
+        self.assertAlmostEqual(result['drawdown'][4], 9.0 / 12.0 - 1)
+        self.assertAlmostEqual(result['summary']['max_drawdown'], 9.0 / 12.0 - 1)
+        self.assertAlmostEqual(result['summary']['total_return'], 12.5 / 10.0 - 1)
+
+    def test_ema_long_series(self):
+        closes = [100.0 + 10 * math.sin(index / 7) for index in range(5000)]
+        for window in (2, 3, 250):
+            with self.subTest(window=window):
+                result = compute(make_serie(closes), ['ema'], window=window)['ema']
+                alpha, expected = 2 / (window + 1), closes[0]
+                for index, close in enumerate(closes):
+                    if index:
+                        expected = alpha * close + (1 - alpha) * expected
+                    self.assertAlmostEqual(result[index], expected, places=9)
+
+    def test_short_and_empty_series(self):
+        result = compute(make_serie([10.0]), ['sma', 'ema', 'volatility'], window=5)
+        self.assertEqual(result['sma'], [None])
+        self.assertEqual(result['ema'], [10.0])
+        self.assertIsNone(result['summary']['volatility'])
+
+        result = compute([], INDICATORS)
+        self.assertEqual(result['close'], [])
+        self.assertIsNone(result['summary']['total_return'])
+
+    def test_zero_close_gives_json_nulls(self):
+        result = compute(make_serie([0.0, 10.0, 11.0, 0.0, 12.0]), INDICATORS, window=2)
+
+        json.dumps(result, allow_nan=False)
+        self.assertEqual(result['returns'][:2], [None, None])
+        self.assertAlmostEqual(result['returns'][2], 0.1)
+        self.assertIsNone(result['returns'][4])
+        self.assertEqual(result['drawdown'][:2], [None, 0.0])
+        self.assertEqual(result['summary'], {'total_return': None, 'max_drawdown': -1.0, 'volatility': None})
+
+    def test_selected_indicators_only(self):
+        result = compute(make_serie(self.closes), ['sma'], window=3)
+        self.assertEqual(set(result), {'t', 'close', 'sma', 'summary'})
+
+
+class IndicatorMemoTest(SimpleTestCase):
+
+    def test_results_are_invalidated_when_the_serie_changes(self):
+        cache = TimeSeriesCache(LocMemBackend())
+        memo = IndicatorMemo(cache, ['sma'], 3)
+        serie = make_serie([10.0, 11.0, 12.0])
+
+        cache.set('AAPL', '2024-08-26', '2024-08-28', serie)
+        self.assertEqual(memo.get_many(['AAPL'], '2024-08-26', '2024-08-28'), {})
+        value = memo.compute('AAPL', '2024-08-26', '2024-08-28', serie)
+        self.assertEqual(memo.get_many(['AAPL'], '2024-08-26', '2024-08-28'), {'AAPL': value})
+
+        # Una barra nueva cambia la versión de la serie
+        cache.set('AAPL', '2024-08-26', '2024-08-28', make_serie([10.0, 11.0, 12.0, 13.0]))
+        self.assertEqual(memo.get_many(['AAPL'], '2024-08-26', '2024-08-28'), {})
+        self.assertEqual(IndicatorMemo(cache, ['ema'], 3).get_many(['AAPL'], '2024-08-26', '2024-08-28'), {})
@@ -0,0 +1,199 @@
+import threading
+import time
+from datetime import datetime, timezone
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.exceptions import ValidationError
+from .cache import (
+    AccessCounter, DatabaseBackend, DjangoCacheBackend, LocMemBackend, ReferenceDataCache, TimeSeriesCache, is_process_local,
+    seconds_until_next_bar,
+)
+from .idempotency import check_shared_backend, get_idempotency_store
+from .models import CacheEntry
+
+class TimeSeriesCacheTest(SimpleTestCase):
+
+    def setUp(self):
+        self.cache = TimeSeriesCache(LocMemBackend())
+        self.calls = 0
+
+    def loader(self):
+        self.calls += 1
+        return [{'c': 100 + self.calls}]
+
+    def test_seconds_until_next_bar(self):
+        now = datetime(2024, 8, 27, 20, 0, tzinfo=timezone.utc)
+        self.assertEqual(seconds_until_next_bar(now, '21:15'), 75 * 60)
+        now = datetime(2024, 8, 27, 22, 0, tzinfo=timezone.utc)
+        self.assertEqual(seconds_until_next_bar(now, '21:15'), (23 * 60 + 15) * 60)
+
+    def test_fresh_entry_is_served_without_loading(self):
+        first = self.cache.get_or_load('aapl', '2024-07-28', '2024-08-27', self.loader)
+        second = self.cache.get_or_load('AAPL', '2024-07-28', '2024-08-27', self.loader)
+        self.assertEqual(first, second)
+        self.assertEqual(self.calls, 1)
+
+    def test_key_includes_date_range(self):
+        self.cache.get_or_load('AAPL', '2024-07-28', '2024-08-27', self.loader)
+        self.cache.get_or_load('AAPL', '2024-07-29', '2024-08-28', self.loader)
+        self.assertEqual(self.calls, 2)
+
+    def test_stale_entry_is_served_while_refreshing(self):
+        self.cache.get_or_load('AAPL', '2024-07-28', '2024-08-27', self.loader)
+        key = self.cache.make_key('AAPL', '2024-07-28', '2024-08-27')
+        entry = self.cache.backend.get(key)
+        entry['fresh_until'] = time.time() - 1
+
+        value = self.cache.get_or_load('AAPL', '2024-07-28', '2024-08-27', self.loader)
+        self.assertEqual(value, [{'c': 101}])
+
+        self.cache._executor.shutdown(wait=True)
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(self.cache.get('AAPL', '2024-07-28', '2024-08-27'), [{'c': 102}])
+
+    def test_concurrent_misses_share_one_load(self):
+        def slow_loader():
+            time.sleep(0.05)
+            return self.loader()
+
+        threads = [
+            threading.Thread(target=self.cache.get_or_load, args=('AAPL', '2024-07-28', '2024-08-27', slow_loader))
+            for _ in range(20)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.calls, 1)
+
+    def test_loader_errors_are_not_cached(self):
+        def failing_loader():
+            raise RuntimeError('upstream down')
+
+        with self.assertRaises(RuntimeError):
+            self.cache.get_or_load('AAPL', '2024-07-28', '2024-08-27', failing_loader)
+        self.assertIsNone(self.cache.get('AAPL', '2024-07-28', '2024-08-27'))
+
+    def test_django_cache_backend(self):
+        cache = TimeSeriesCache(DjangoCacheBackend())
+        cache.get_or_load('MSFT', '2024-07-28', '2024-08-27', self.loader)
+        cache.get_or_load('MSFT', '2024-07-28', '2024-08-27', self.loader)
+        self.assertEqual(self.calls, 1)
+        cache.backend.clear()
+
+
+class AccessCounterTest(TestCase):
+
+    def test_counts(self):
+        for backend in (LocMemBackend(), DjangoCacheBackend(), DatabaseBackend(key_prefix='hits')):
+            counter = AccessCounter(backend, flush_interval=0)
+            counter.record('aapl')
+            counter.record('AAPL')
+            counter.record('MSFT')
+            self.assertEqual(counter.counts(['AAPL', 'MSFT', 'TSLA']), {'AAPL': 2, 'MSFT': 1})
+            backend.clear()
+
+    def test_accesses_are_buffered_until_flush(self):
+        backend = DatabaseBackend(key_prefix='hits')
+        counter, other = AccessCounter(backend, flush_interval=3600), AccessCounter(backend, flush_interval=0)
+        with self.assertNumQueries(0):
+            counter.record('AAPL')
+            counter.record('AAPL')
+        other.record('AAPL')
+        self.assertEqual(other.counts(['AAPL']), {'AAPL': 1})
+        counter.flush()
+        self.assertEqual(other.counts(['AAPL']), {'AAPL': 3})
+
+
+class ReferenceDataCacheTest(SimpleTestCase):
+
+    def setUp(self):
+        self.cache = ReferenceDataCache(LocMemBackend(), ttl=3600, negative_ttl=60)
+        self.calls = 0
+
+    def test_valid_symbols_are_cached(self):
+        def loader():
+            self.calls += 1
+            return {'ticker': 'AAPL'}
+
+        self.assertEqual(self.cache.get_or_load('aapl', loader), {'ticker': 'AAPL'})
+        self.assertEqual(self.cache.get_or_load('AAPL', loader), {'ticker': 'AAPL'})
+        self.assertEqual(self.calls, 1)
+
+    def test_invalid_symbols_are_negatively_cached(self):
+        def loader():
+            self.calls += 1
+            raise ValidationError('NOT_FOUND: Ticker not found.')
+
+        for _ in range(2):
+            with self.assertRaisesMessage(ValidationError, 'NOT_FOUND: Ticker not found.'):
+                self.cache.get_or_load('NOPE', loader)
+        self.assertIsNone(self.cache.get_or_load('NONE', lambda: None))
+        self.assertIsNone(self.cache.get_or_load('NONE', loader))
+        self.assertEqual(self.calls, 1)
+
+
+class DatabaseBackendTest(TestCase):
+
+    def setUp(self):
+        self.backend = DatabaseBackend(key_prefix='test', cull_every=2)
+
+    def test_get_set_delete(self):
+        self.backend.set('a', {'data': [1, 2]}, 60)
+        self.backend.set('a', {'data': [3]}, 60)
+        self.backend.set('b', None, 60)
+        self.assertEqual(self.backend.get('a'), {'data': [3]})
+        self.assertEqual(self.backend.get_many(['a', 'b', 'c']), {'a': {'data': [3]}})
+        self.backend.delete('a')
+        self.assertIsNone(self.backend.get('a'))
+
+    def test_expired_entries_are_ignored_and_culled(self):
+        self.backend.set('old', 1, -1)
+        self.assertIsNone(self.backend.get('old'))
+        self.assertEqual(self.backend.incr('old', 60), 1)
+        self.backend.set('other', 1, -1)
+        self.backend.set('new', 1, 60)
+        self.assertEqual(set(CacheEntry.objects.values_list('key', flat=True)), {'test:old', 'test:new'})
+
+    def test_incr(self):
+        self.assertEqual(self.backend.incr('lock', 60), 1)
+        self.assertEqual(self.backend.incr('lock', 60), 2)
+        self.backend.delete('lock')
+        self.assertEqual(self.backend.incr('lock', 60), 1)
+
+    def test_long_keys_are_hashed(self):
+        key = 'idem:POST:/api/companies/:' + 'k' * 255
+        self.backend.set(key, 'value', 60)
+        self.assertEqual(self.backend.get(key), 'value')
+        self.assertNotEqual(self.backend.get(key[:-1] + 'x'), 'value')
+
+    def test_clear_only_removes_its_prefix(self):
+        other = DatabaseBackend(key_prefix='other')
+        self.backend.set('a', 1, 60)
+        other.set('a', 2, 60)
+        self.backend.clear()
+        self.assertIsNone(self.backend.get('a'))
+        self.assertEqual(other.get('a'), 2)
+
+
+class ProcessLocalBackendTest(SimpleTestCase):
+
+    def test_is_process_local(self):
+        self.assertTrue(is_process_local({'BACKEND': '_apps.api.cache.LocMemBackend'}))
+        self.assertFalse(is_process_local({'BACKEND': '_apps.api.cache.DatabaseBackend'}))
+        # La caché por defecto de Django es LocMemCache
+        self.assertTrue(is_process_local({'BACKEND': '_apps.api.cache.DjangoCacheBackend'}))
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache'}}):
+            self.assertFalse(is_process_local({'BACKEND': '_apps.api.cache.DjangoCacheBackend'}))
+
+    @override_settings(DEBUG=False, IDEMPOTENCY={'BACKEND': '_apps.api.cache.LocMemBackend'})
+    def test_idempotency_requires_shared_backend_outside_debug(self):
+        self.assertEqual([error.id for error in check_shared_backend(None)], ['api.E001'])
+        with self.assertRaises(ImproperlyConfigured):
+            get_idempotency_store()
+
+    @override_settings(DEBUG=True, IDEMPOTENCY={'BACKEND': '_apps.api.cache.LocMemBackend'})
+    def test_idempotency_allows_process_local_backend_in_debug(self):
+        self.assertEqual(check_shared_backend(None), [])
+        self.assertIsInstance(get_idempotency_store().backend, LocMemBackend)
@@ -0,0 +1,90 @@
+import asyncio
+import json
+from contextlib import ExitStack
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from .live import LiveHub
+from .models import Company
+from .test_upstream import FakeUpstreamMixin
+
+
+class FakeFetcher:
+    """
+    Instantáneas falsas con un precio nuevo en cada consulta.
+    """
+
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self, symbol):
+        self.calls += 1
+        return {'ticker': symbol, 'lastTrade': {'p': 100.0 + self.calls}}
+
+
+class LiveHubTest(SimpleTestCase):
+
+    async def test_one_poll_per_interval_for_all_subscribers(self):
+        fetcher = FakeFetcher()
+        hub = LiveHub(fetcher, interval=60, queue_size=4)
+        with ExitStack() as stack:
+            queues = [stack.enter_context(hub.subscription('aapl')) for _ in range(1000)]
+            events = await asyncio.gather(*(queue.get() for queue in queues))
+            self.assertEqual(fetcher.calls, 1)
+            self.assertEqual({event['data']['lastTrade']['p'] for event in events}, {101.0})
+
+            # Un suscriptor nuevo recibe el último precio sin consultar el upstream
+            with hub.subscription('AAPL') as queue:
+                self.assertEqual(queue.get_nowait()['data']['lastTrade']['p'], 101.0)
+            self.assertEqual(fetcher.calls, 1)
+            task = hub.feeds['AAPL'].task
+
+        # Al salir el último suscriptor el poller se detiene
+        self.assertEqual(hub.feeds, {})
+        await asyncio.sleep(0)
+        self.assertTrue(task.cancelled())
+
+    async def test_slow_subscribers_do_not_block_the_poller(self):
+        fetcher = FakeFetcher()
+        hub = LiveHub(fetcher, interval=0.001, queue_size=2)
+        with hub.subscription('AAPL') as slow, hub.subscription('AAPL') as fast:
+            for _ in range(10):
+                latest = await fast.get()
+            self.assertGreaterEqual(fetcher.calls, 10)
+            self.assertEqual(slow.qsize(), 2)
+            # La cola del cliente lento descarta los eventos más antiguos
+            self.assertGreaterEqual(slow.get_nowait()['data']['lastTrade']['p'], latest['data']['lastTrade']['p'] - 1)
+
+
+@override_settings(LIVE_STREAM={'INTERVAL': 60})
+class CompanyLiveStreamViewTest(FakeUpstreamMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        Company.objects.create(name="Test Company", description="A test company", symbol="TTC")
+
+    async def test_stream_prices(self):
+        response = await self.async_client.get(reverse('company-live-stream', args=['ttc']))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        chunks = aiter(response.streaming_content)
+        self.assertEqual(await anext(chunks), b'retry: 60000\n\n')
+        event, data = (await anext(chunks)).decode().strip().split('\n')
+        self.assertEqual(event, 'event: price')
+        self.assertEqual(json.loads(data.removeprefix('data: '))['ticker'], 'TTC')
+        await chunks.aclose()
+
+    def test_stream_requires_asgi(self):
+        # El cliente de tests síncrono sirve la petición por WSGI
+        with mock.patch('_apps.api.views.event_stream') as event_stream:
+            response = self.client.get(reverse('company-live-stream', args=['ttc']))
+        self.assertEqual(response.status_code, status.HTTP_501_NOT_IMPLEMENTED)
+        self.assertFalse(response.streaming)
+        event_stream.assert_not_called()
+
+    async def test_stream_unknown_symbol(self):
+        response = await self.async_client.get(reverse('company-live-stream', args=['nope']))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
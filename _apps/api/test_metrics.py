@@ -0,0 +1,112 @@
+import json
+import os
+import tempfile
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from .metrics import Counter, Histogram
+from . import metrics
+from .models import Company
+
+
+class MetricsRegistryTest(SimpleTestCase):
+
+    def test_histogram_samples_are_cumulative(self):
+        histogram = Histogram('test_seconds', 'Test.', ('view',), buckets=(0.1, 1.0))
+        histogram.observe(0.05, view='a')
+        histogram.observe(0.5, view='a')
+        histogram.observe(5, view='a')
+        self.assertEqual(list(histogram.samples()), [
+            'test_seconds_bucket{view="a",le="0.1"} 1',
+            'test_seconds_bucket{view="a",le="1.0"} 2',
+            'test_seconds_bucket{view="a",le="+Inf"} 3',
+            'test_seconds_sum{view="a"} 5.55',
+            'test_seconds_count{view="a"} 3',
+        ])
+
+    def test_counter_escapes_labels(self):
+        counter = Counter('test_total', 'Test.', ('path',))
+        counter.inc(path='a"b')
+        counter.inc(2, path='a"b')
+        self.assertEqual(list(counter.samples()), ['test_total{path="a\\"b"} 3'])
+
+    def test_upstream_errors_and_responses_share_an_endpoint(self):
+        histogram = Histogram('test_seconds', 'Test.', ('endpoint', 'status'), buckets=(1.0,))
+        histogram.observe(0.5, endpoint='aggregates', status='error')
+        histogram.observe(0.5, endpoint='aggregates', status=200)
+        histogram.observe(0.5, endpoint='aggregates', status='200')
+        samples = list(histogram.samples())
+        self.assertIn('test_seconds_count{endpoint="aggregates",status="200"} 2', samples)
+        self.assertIn('test_seconds_count{endpoint="aggregates",status="error"} 1', samples)
+
+
+class MultiprocessMetricsTest(SimpleTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        metrics.CACHE_REQUESTS.clear()
+        metrics.REQUEST_DURATION.clear()
+        self.addCleanup(metrics.CACHE_REQUESTS.clear)
+        self.addCleanup(metrics.REQUEST_DURATION.clear)
+
+    def write_worker(self, pid, hits):
+        other = {metric.name: [] for metric in metrics.REGISTRY}
+        other['api_cache_requests_total'] = [[['time_series', 'hit'], hits]]
+        other['api_request_duration_seconds'] = [[['company-list', 'GET', 200], [1] + [0] * 11, 0.004]]
+        with open(os.path.join(self.directory, f'{pid}.json'), 'w') as f:
+            json.dump(other, f)
+
+    def test_render_sums_every_process(self):
+        metrics.CACHE_REQUESTS.inc(cache='time_series', result='hit')
+        metrics.REQUEST_DURATION.observe(0.2, view='company-list', method='GET', status=200)
+        self.write_worker(1, 2)
+
+        text = metrics.render(self.directory)
+        self.assertIn('api_cache_requests_total{cache="time_series",result="hit"} 3', text)
+        self.assertIn('api_request_duration_seconds_count{view="company-list",method="GET",status="200"} 2', text)
+        self.assertIn(f'{os.getpid()}.json', os.listdir(self.directory))
+
+    def test_exited_workers_are_archived(self):
+        self.write_worker(1, 2)
+        self.write_worker(2, 5)
+        metrics.archive_snapshot(self.directory, 1)
+        metrics.archive_snapshot(self.directory, 2)
+        self.assertEqual(sorted(os.listdir(self.directory)), [metrics.ARCHIVE])
+        self.assertIn('api_cache_requests_total{cache="time_series",result="hit"} 7', metrics.render(self.directory))
+
+
+class MetricsMiddlewareTest(TestCase):
+
+    def setUp(self):
+        Company.objects.create(name="Test Company", description="A test company", symbol="TTC")
+
+    @override_settings(METRICS_SERVER_TIMING=True)
+    def test_request_is_measured(self):
+        requests = metrics.REQUEST_DURATION.count(view='company-list', method='GET', status=200)
+        queries = metrics.DB_QUERIES.value(view='company-list')
+
+        response = self.client.get(reverse('company-list'))
+
+        self.assertEqual(
+            metrics.REQUEST_DURATION.count(view='company-list', method='GET', status=200), requests + 1
+        )
+        self.assertGreater(metrics.DB_QUERIES.value(view='company-list'), queries)
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries", upstream;dur=')
+
+    @override_settings(METRICS_SERVER_TIMING=False, METRICS_TOKEN='secret')
+    def test_metrics_endpoint(self):
+        self.client.get(reverse('company-list'))
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 401)
+        self.assertEqual(self.client.get(reverse('metrics'), headers={'Authorization': 'Bearer nope'}).status_code, 401)
+        response = self.client.get(reverse('metrics'), headers={'Authorization': 'Bearer secret'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('# TYPE api_request_duration_seconds histogram', response.content.decode())
+        self.assertIn('api_request_duration_seconds_count{view="company-list",method="GET",status="200"}',
+                      response.content.decode())
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(METRICS_TOKEN='', DEBUG=False)
+    def test_metrics_endpoint_requires_a_token_outside_debug(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        with self.settings(DEBUG=True):
+            self.assertEqual(self.client.get(reverse('metrics')).status_code, 200)
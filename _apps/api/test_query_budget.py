@@ -0,0 +1,131 @@
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from .models import Company
+from .test_upstream import FakeUpstreamMixin
+from .views import CompanyViewSet
+
+# Consultas máximas por acción de ``CompanyViewSet``, con la caché de series vacía.
+# Deben ser independientes del número de filas: una consulta por fila es un N+1
+QUERY_BUDGETS = {
+    'list': 1,
+    'retrieve': 3,
+    'by_symbol': 3,
+    'create': 3,
+    'update': 4,
+    'partial_update': 4,
+    'destroy': 2,
+    'bulk_create': 3,
+    'bulk_delete': 2,
+    'export': 1,
+    'time_series': 3,
+    'analytics': 3,
+    'analytics_batch': 3,
+}
+
+# Las transacciones anidadas de los tests emiten estas sentencias, que no cuentan
+TRANSACTION_STATEMENTS = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+
+class QueryBudgetMixin:
+    """
+    Aserciones sobre el número de consultas de las acciones de ``CompanyViewSet``.
+
+    Se cuentan las consultas de todas las bases de datos (``default`` y
+    réplicas) y el fallo incluye el SQL, para localizar la consulta repetida.
+    """
+    query_budgets = QUERY_BUDGETS
+
+    @contextmanager
+    def assertQueryBudget(self, action):
+        budget = self.query_budgets[action]
+        with ExitStack() as stack:
+            contexts = [stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in connections]
+            yield
+        queries = [
+            query['sql'] for context in contexts for query in context.captured_queries
+            if not query['sql'].startswith(TRANSACTION_STATEMENTS)
+        ]
+        if len(queries) > budget:
+            self.fail(f'{action}: {len(queries)} consultas, presupuesto {budget}:\n' + '\n'.join(queries))
+
+
+@override_settings(
+    TIME_SERIES_CACHE={'BACKEND': '_apps.api.cache.LocMemBackend'},
+    REFERENCE_DATA_CACHE={'BACKEND': '_apps.api.cache.LocMemBackend'},
+    # Los accesos se escriben cada FLUSH_INTERVAL segundos, no en cada petición
+    ACCESS_COUNTS={'BACKEND': '_apps.api.cache.LocMemBackend', 'OPTIONS': {}},
+)
+class CompanyViewSetQueryBudgetTest(QueryBudgetMixin, FakeUpstreamMixin, APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        # Varias empresas, con datos de referencia, para que un N+1 supere el presupuesto
+        cls.companies = [
+            Company.objects.create(
+                name=f'Company {symbol}', description='Budget', symbol=symbol,
+                alpha_vantage={'ticker': symbol, 'primary_exchange': 'XNYS', 'market_cap': 1e9},
+            )
+            for symbol in ['AAA', 'BBB', 'CCC', 'DDD', 'EEE']
+        ]
+        cls.company = cls.companies[0]
+
+    def test_every_action_has_a_budget(self):
+        actions = {'list', 'retrieve', 'create', 'update', 'partial_update', 'destroy'}
+        actions |= {action.__name__ for action in CompanyViewSet.get_extra_actions()}
+        self.assertEqual(actions, set(self.query_budgets))
+
+    def test_read_actions(self):
+        detail = reverse('company-detail', args=[self.company.id])
+        symbols = ','.join(company.symbol for company in self.companies)
+        requests = [
+            ('list', reverse('company-list'), {'ordering': '-market_cap'}),
+            ('retrieve', detail, {}),
+            ('by_symbol', reverse('company-by-symbol', args=['bbb']), {}),
+            ('export', reverse('company-export'), {'include_alpha_vantage': 'true'}),
+            ('time_series', reverse('company-time-series'), {'symbols': symbols}),
+            ('analytics', reverse('company-analytics', args=[self.companies[2].id]), {}),
+            ('analytics_batch', reverse('company-analytics-batch'), {'symbols': symbols}),
+        ]
+        for action, url, params in requests:
+            with self.subTest(action), self.assertQueryBudget(action):
+                response = self.client.get(url, params)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                self.assertEqual(response.status_code, 200)
+
+    def test_write_actions(self):
+        detail = reverse('company-detail', args=[self.company.id])
+        with self.assertQueryBudget('create'):
+            response = self.client.post(
+                reverse('company-list'), {'name': 'New', 'description': 'Budget', 'symbol': 'NEW'}, format='json',
+            )
+        self.assertEqual(response.status_code, 201)
+
+        with self.assertQueryBudget('update'):
+            response = self.client.put(
+                detail, {'name': 'Renamed', 'description': 'Budget', 'symbol': 'UPD'}, format='json',
+            )
+        self.assertEqual(response.status_code, 200)
+
+        with self.assertQueryBudget('partial_update'):
+            response = self.client.patch(detail, {'symbol': 'PAT'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        rows = [{'name': f'Bulk {symbol}', 'description': 'Budget', 'symbol': symbol} for symbol in ['BKA', 'BKB', 'BKC']]
+        with self.assertQueryBudget('bulk_create'):
+            response = self.client.post(reverse('company-bulk-create'), rows, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        with self.assertQueryBudget('destroy'):
+            response = self.client.delete(detail)
+        self.assertEqual(response.status_code, 204)
+
+        ids = [str(company.id) for company in self.companies[1:]]
+        with self.assertQueryBudget('bulk_delete'):
+            response = self.client.post(reverse('company-bulk-delete'), {'ids': ids}, format='json')
+        self.assertEqual(response.status_code, 200)
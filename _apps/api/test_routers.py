@@ -0,0 +1,91 @@
+import time
+from unittest import mock
+
+from django.db import router
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from . import routers
+from .models import Company
+from .test_upstream import FakeUpstreamMixin
+
+
+@override_settings(DATABASE_REPLICAS=['replica_0', 'replica_1'])
+class PrimaryReplicaRouterTest(SimpleTestCase):
+
+    def test_reads_go_to_replicas_only_when_requested(self):
+        self.assertEqual(router.db_for_read(Company), 'default')
+        with routers.replica_reads() as alias:
+            self.assertIn(alias, ['replica_0', 'replica_1'])
+            self.assertEqual(router.db_for_read(Company), alias)
+            self.assertEqual(router.db_for_write(Company), 'default')
+        self.assertEqual(router.db_for_read(Company), 'default')
+
+    def test_replicas_are_not_migrated(self):
+        self.assertFalse(router.allow_migrate('replica_0', 'api'))
+        self.assertTrue(router.allow_migrate('default', 'api'))
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas(self):
+        with routers.replica_reads() as alias:
+            self.assertIsNone(alias)
+            self.assertEqual(router.db_for_read(Company), 'default')
+
+
+# ``default`` hace de réplica para que las consultas se ejecuten en los tests
+@override_settings(DATABASE_REPLICAS=['default'])
+class ReadYourWritesTest(FakeUpstreamMixin, APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.company = Company.objects.create(name="Test Company", description="A test company", symbol="TTC")
+
+    def test_read_actions_use_replicas(self):
+        with mock.patch('_apps.api.views.replica_reads', wraps=routers.replica_reads) as replica_reads:
+            self.client.get(reverse('company-list'))
+            self.client.get(reverse('company-export'))
+            self.assertEqual(replica_reads.call_count, 2)
+            self.client.patch(reverse('company-detail', args=[self.company.id]), {'name': 'Patched'}, format='json')
+            self.assertEqual(replica_reads.call_count, 2)
+
+    def test_reads_after_a_write_go_to_the_primary(self):
+        response = self.client.patch(
+            reverse('company-detail', args=[self.company.id]), {'name': 'Patched'}, format='json',
+        )
+        until = response['Primary-Until']
+        self.assertGreater(float(until), time.time())
+
+        with mock.patch('_apps.api.views.replica_reads') as replica_reads:
+            response = self.client.get(reverse('company-list'), headers={'Primary-Until': until})
+        replica_reads.assert_not_called()
+        self.assertEqual(response.data['results'][0]['name'], 'Patched')
+
+    def test_cross_origin_client(self):
+        origin = {'Origin': 'https://main.dlz6ua40g7mkh.amplifyapp.com'}
+        response = self.client.patch(
+            reverse('company-detail', args=[self.company.id]), {'name': 'Patched'}, format='json', headers=origin,
+        )
+        self.assertEqual(response['Access-Control-Allow-Origin'], origin['Origin'])
+        self.assertIn('Primary-Until', response['Access-Control-Expose-Headers'])
+        until = response['Primary-Until']
+
+        # El navegador pregunta antes si puede enviar la cabecera
+        preflight = self.client.options(reverse('company-list'), headers={
+            **origin, 'Access-Control-Request-Method': 'GET', 'Access-Control-Request-Headers': 'primary-until',
+        })
+        self.assertIn('primary-until', preflight['Access-Control-Allow-Headers'])
+
+        with mock.patch('_apps.api.views.replica_reads') as replica_reads:
+            self.client.get(reverse('company-list'), headers={**origin, 'Primary-Until': until})
+        replica_reads.assert_not_called()
+
+    def test_pins_beyond_the_window_are_ignored(self):
+        with mock.patch('_apps.api.views.replica_reads', wraps=routers.replica_reads) as replica_reads:
+            for until in (time.time() - 1, time.time() + 3600, 'nope'):
+                self.client.get(reverse('company-list'), headers={'Primary-Until': str(until)})
+        self.assertEqual(replica_reads.call_count, 3)
+
+    def test_failed_writes_do_not_pin(self):
+        response = self.client.patch(reverse('company-detail', args=[self.company.id]), {'name': ''}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.has_header('Primary-Until'))
@@ -1,9 +1,13 @@
-from django.test import TestCase
+import os
+from unittest import mock
+
+from django.test import TestCase, override_settings
 from rest_framework.exceptions import ValidationError
 from .models import Company
 from .serializers import CompanyReadSerializer, CompanyReadFullSerializer, CompanyWriteSerializer
+from .test_upstream import FakeUpstreamMixin
 
-class CompanySerializerTest(TestCase):
+class CompanySerializerTest(FakeUpstreamMixin, TestCase):
 
     def setUp(self):
         self.company = Company.objects.create(
@@ -53,3 +57,35 @@ class CompanySerializerTest(TestCase):
         serializer = CompanyWriteSerializer(data=data)
         with self.assertRaises(ValidationError):
             serializer.is_valid(raise_exception=True)
+
+    @override_settings(REFERENCE_DATA_CACHE={'BACKEND': '_apps.api.cache.LocMemBackend'})
+    @mock.patch.dict(os.environ, {'ALPHAVANTAGE_KEY': 'test'})
+    def test_company_write_serializer_update_same_symbol(self):
+        data = {'name': 'Renamed Company', 'description': 'A test company', 'symbol': 'ttc'}
+        with mock.patch('_apps.api.serializers.fetch_ticker') as fetch:
+            serializer = CompanyWriteSerializer(instance=self.company, data=data)
+            self.assertTrue(serializer.is_valid())
+            company = serializer.save()
+        fetch.assert_not_called()
+        self.assertEqual(company.name, 'Renamed Company')
+        self.assertEqual(company.alpha_vantage, {"some_key": "some_value"})
+
+    @mock.patch.dict(os.environ, {'ALPHAVANTAGE_KEY': 'test'})
+    def test_company_write_serializer_partial_update(self):
+        with mock.patch('_apps.api.serializers.fetch_ticker') as fetch:
+            serializer = CompanyWriteSerializer(instance=self.company, data={'description': 'New'}, partial=True)
+            self.assertTrue(serializer.is_valid())
+            company = serializer.save()
+        fetch.assert_not_called()
+        self.assertEqual(company.description, 'New')
+        self.assertEqual(company.alpha_vantage, {"some_key": "some_value"})
+
+    @override_settings(REFERENCE_DATA_CACHE={'BACKEND': '_apps.api.cache.LocMemBackend'})
+    @mock.patch.dict(os.environ, {'ALPHAVANTAGE_KEY': 'test'})
+    def test_company_write_serializer_reference_data_is_cached(self):
+        data = {'name': 'New Company', 'description': 'A new company description', 'symbol': 'NCC'}
+        with mock.patch('_apps.api.serializers.fetch_ticker', return_value={'ticker': 'NCC'}) as fetch:
+            for _ in range(2):
+                serializer = CompanyWriteSerializer(data=data)
+                self.assertTrue(serializer.is_valid())
+        fetch.assert_called_once_with('NCC')
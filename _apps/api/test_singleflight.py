@@ -0,0 +1,90 @@
+import threading
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+from rest_framework.exceptions import ValidationError
+from . import metrics
+from .singleflight import SingleFlight
+
+
+class SingleFlightTest(SimpleTestCase):
+
+    def setUp(self):
+        metrics.UPSTREAM_COALESCED.clear()
+
+    def run_concurrently(self, flight, fn, callers=8):
+        """
+        Ejecuta ``callers`` llamadas a ``flight.do`` y retorna sus resultados o
+        excepciones, liberando ``fn`` cuando todas están esperando.
+        """
+        release = threading.Event()
+        results = [None] * callers
+
+        def blocked():
+            release.wait(5)
+            return fn()
+
+        def call(index):
+            try:
+                results[index] = flight.do('AAPL', blocked)
+            except Exception as e:
+                results[index] = e
+
+        threads = [threading.Thread(target=call, args=(index,)) for index in range(callers)]
+        for thread in threads:
+            thread.start()
+        deadline = time.monotonic() + 5
+        while metrics.UPSTREAM_COALESCED.value(resource='test', scope='thread') < callers - 1:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_calls_share_one_result(self):
+        flight, calls = SingleFlight('test'), []
+        results = self.run_concurrently(flight, lambda: calls.append(1) or {'ticker': 'AAPL'})
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'ticker': 'AAPL'}] * 8)
+
+        # Terminada la llamada la clave se libera
+        self.assertEqual(flight.do('AAPL', lambda: 'again'), 'again')
+
+    def test_errors_are_shared(self):
+        flight, calls = SingleFlight('test'), []
+
+        def fail():
+            calls.append(1)
+            raise ValidationError('NOT_FOUND: Ticker not found.')
+
+        results = self.run_concurrently(flight, fail)
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(isinstance(result, ValidationError) for result in results))
+
+    @override_settings(SINGLE_FLIGHT={'ADVISORY_LOCK': True, 'POLL_INTERVAL': 0})
+    def test_advisory_lock_uses_result_of_other_process(self):
+        connection = mock.MagicMock(vendor='postgresql')
+        cursor = connection.cursor.return_value.__enter__.return_value
+        # Otro proceso tiene el bloqueo y almacena el resultado en la segunda comprobación
+        cursor.fetchone.return_value = (False,)
+        recheck = mock.Mock(side_effect=[None, {'ticker': 'AAPL'}])
+        fetch = mock.Mock()
+
+        with mock.patch('_apps.api.singleflight.connection', connection):
+            self.assertEqual(SingleFlight('test').do('AAPL', fetch, recheck), {'ticker': 'AAPL'})
+        fetch.assert_not_called()
+        self.assertEqual(cursor.execute.call_count, 2)
+        self.assertEqual(metrics.UPSTREAM_COALESCED.value(resource='test', scope='process'), 1)
+
+    @override_settings(SINGLE_FLIGHT={'ADVISORY_LOCK': True})
+    def test_advisory_lock_is_released(self):
+        connection = mock.MagicMock(vendor='postgresql')
+        cursor = connection.cursor.return_value.__enter__.return_value
+        cursor.fetchone.return_value = (True,)
+
+        with mock.patch('_apps.api.singleflight.connection', connection):
+            self.assertEqual(SingleFlight('test').do('AAPL', lambda: 'loaded', lambda: None), 'loaded')
+        statements = [call.args[0] for call in cursor.execute.call_args_list]
+        self.assertEqual(statements, ['SELECT pg_try_advisory_lock(%s)', 'SELECT pg_advisory_unlock(%s)'])
@@ -0,0 +1,129 @@
+from datetime import date, datetime, timezone
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from .cache import get_access_counter, get_time_series_cache
+from .models import Company, DailyBar
+from .timeseries import load_time_serie, load_time_series, missing_ranges, serie_columns, time_serie_window
+
+TODAY = date(2024, 8, 28)  # Miércoles
+
+
+def make_result(day, close=100.0):
+    t = int(datetime(day.year, day.month, day.day, 4, tzinfo=timezone.utc).timestamp() * 1000)
+    return {'v': 1000.0, 'vw': close, 'o': close, 'c': close, 'h': close, 'l': close, 't': t, 'n': 10}
+
+
+def fake_aggregates(symbol, start_date, end_date):
+    results, day = [], start_date
+    while day <= end_date:
+        if day.weekday() < 5:
+            results.append(make_result(day))
+        day = date.fromordinal(day.toordinal() + 1)
+    return results
+
+
+@mock.patch('_apps.api.timeseries.today', return_value=TODAY)
+class TimeSerieStoreTest(TestCase):
+
+    def setUp(self):
+        self.company = Company.objects.create(
+            name="Test Company",
+            description="A test company",
+            symbol="TTC",
+            alpha_vantage={"some_key": "some_value"}
+        )
+
+    def test_missing_ranges(self, _today):
+        start, end = date(2024, 8, 1), date(2024, 8, 28)
+        self.assertEqual(missing_ranges([], start, end), [(start, date(2024, 8, 27))])
+        self.assertEqual(missing_ranges([date(2024, 8, 1), date(2024, 8, 27)], start, end), [])
+        self.assertEqual(
+            missing_ranges([date(2024, 8, 12), date(2024, 8, 23)], start, end),
+            [(start, date(2024, 8, 11)), (date(2024, 8, 24), date(2024, 8, 27))],
+        )
+
+    def test_window_ends_on_the_utc_date(self, _today):
+        self.assertEqual(time_serie_window(), (date(2024, 7, 29), TODAY))
+
+    def test_cold_load_stores_closed_bars(self, _today):
+        with mock.patch('_apps.api.timeseries.fetch_aggregates', side_effect=fake_aggregates) as fetch:
+            serie = load_time_serie(self.company, date(2024, 8, 19), date(2024, 8, 28))
+
+        fetch.assert_called_once_with('TTC', date(2024, 8, 19), date(2024, 8, 27))
+        self.assertEqual(len(serie), 7)
+        self.assertEqual(DailyBar.objects.filter(company=self.company).count(), 7)
+        self.assertEqual(serie[0], make_result(date(2024, 8, 19)))
+
+    def test_batch_load_reads_store_once(self, _today):
+        other = Company.objects.create(name="Other Company", description="Batch", symbol="OTH")
+        with mock.patch('_apps.api.timeseries.fetch_aggregates', side_effect=fake_aggregates):
+            load_time_serie(self.company, date(2024, 8, 19), date(2024, 8, 28))
+
+        with mock.patch('_apps.api.timeseries.fetch_aggregates', side_effect=fake_aggregates) as fetch:
+            with self.assertNumQueries(2):
+                series, errors = load_time_series(
+                    [self.company, other], date(2024, 8, 19), date(2024, 8, 28), max_workers=4
+                )
+
+        fetch.assert_called_once_with('OTH', date(2024, 8, 19), date(2024, 8, 27))
+        self.assertEqual(errors, {})
+        self.assertEqual(len(series[self.company.pk]), 7)
+        self.assertEqual(series[other.pk], series[self.company.pk])
+        self.assertEqual(DailyBar.objects.filter(company=other).count(), 7)
+
+    def test_warm_load_does_not_call_upstream(self, _today):
+        with mock.patch('_apps.api.timeseries.fetch_aggregates', side_effect=fake_aggregates):
+            load_time_serie(self.company, date(2024, 8, 19), date(2024, 8, 28))
+        with mock.patch('_apps.api.timeseries.fetch_aggregates') as fetch:
+            serie = load_time_serie(self.company, date(2024, 8, 19), date(2024, 8, 28))
+
+        fetch.assert_not_called()
+        self.assertEqual(len(serie), 7)
+
+    def test_incremental_top_up(self, _today):
+        with mock.patch('_apps.api.timeseries.fetch_aggregates', side_effect=fake_aggregates):
+            load_time_serie(self.company, date(2024, 8, 19), date(2024, 8, 23))
+        with mock.patch('_apps.api.timeseries.fetch_aggregates', side_effect=fake_aggregates) as fetch:
+            serie = load_time_serie(self.company, date(2024, 8, 19), date(2024, 8, 28))
+
+        fetch.assert_called_once_with('TTC', date(2024, 8, 24), date(2024, 8, 27))
+        self.assertEqual(len(serie), 7)
+
+    def test_backfill_command(self, _today):
+        with mock.patch('_apps.api.management.commands.backfill_bars.today', return_value=TODAY), \
+                mock.patch('_apps.api.management.commands.backfill_bars.fetch_aggregates',
+                           side_effect=fake_aggregates):
+            call_command('backfill_bars', days=14, stdout=StringIO())
+            call_command('backfill_bars', days=14, stdout=StringIO())
+
+        self.assertEqual(DailyBar.objects.filter(company=self.company).count(), 11)
+
+    @override_settings(TIME_SERIES_CACHE={'BACKEND': '_apps.api.cache.LocMemBackend'})
+    def test_prewarm_command_prioritizes_accessed_symbols(self, _today):
+        Company.objects.create(name="Other Company", description="Prewarm", symbol="OTH")
+        get_access_counter().record('OTH')
+        get_access_counter().flush()
+
+        window = (date(2024, 8, 19), date(2024, 8, 28))
+        with mock.patch('_apps.api.management.commands.prewarm_time_series.time_serie_window', return_value=window), \
+                mock.patch('_apps.api.timeseries.fetch_aggregates', side_effect=fake_aggregates) as fetch:
+            call_command('prewarm_time_series', calls_per_minute=600, stdout=StringIO())
+            call_command('prewarm_time_series', calls_per_minute=600, stdout=StringIO())
+
+        self.assertEqual([call.args[0] for call in fetch.call_args_list], ['OTH', 'TTC'])
+        self.assertEqual(len(get_time_series_cache().get('TTC', '2024-08-19', '2024-08-28')), 7)
+
+
+class SerieColumnsTest(SimpleTestCase):
+
+    def test_columns_with_day_deltas(self):
+        serie = [make_result(date(2024, 8, 23)), make_result(date(2024, 8, 26), close=101.0)]
+        del serie[1]['n']
+        columns = serie_columns(serie)
+        self.assertEqual(columns['d'], [date(2024, 8, 23).toordinal() - date(1970, 1, 1).toordinal(), 3])
+        self.assertEqual(columns['c'], [100.0, 101.0])
+        self.assertEqual(columns['n'], [10, None])
+        self.assertEqual(serie_columns([]), {'d': [], 'o': [], 'h': [], 'l': [], 'c': [], 'v': [], 'vw': [], 'n': []})
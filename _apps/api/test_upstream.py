@@ -0,0 +1,107 @@
+import json
+import os
+from unittest import mock
+
+import requests
+from django.test import SimpleTestCase, override_settings
+from rest_framework.exceptions import ValidationError
+from benchmarks.fake_upstream import start_fake_upstream
+from . import upstream
+from .upstream import CircuitBreaker, TokenBucket, UpstreamUnavailable, fetch_ticker
+
+UPSTREAM_SETTINGS = {'MAX_RETRIES': 2, 'BACKOFF_BASE': 0, 'BREAKER_FAILURE_THRESHOLD': 2, 'BREAKER_RESET_TIMEOUT': 60}
+
+
+def make_response(status_code, payload):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = json.dumps(payload).encode()
+    return response
+
+
+class FakeUpstreamMixin:
+    """
+    Apunta el cliente de polygon.io al servidor falso de ``benchmarks/fake_upstream.py``
+    durante toda la clase de tests, para no depender de la red ni de una clave real.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.fake_upstream = start_fake_upstream()
+        for context in (
+            override_settings(POLYGON_API_URL=f'http://127.0.0.1:{cls.fake_upstream.server_port}'),
+            mock.patch.dict(os.environ, {'ALPHAVANTAGE_KEY': 'test'}),
+        ):
+            context.__enter__()
+            cls.addClassCleanup(context.__exit__, None, None, None)
+        cls.addClassCleanup(cls.fake_upstream.server_close)
+        cls.addClassCleanup(cls.fake_upstream.shutdown)
+        super().setUpClass()
+
+    def setUp(self):
+        super().setUp()
+        upstream.get_breaker().record_success()
+
+
+@override_settings(UPSTREAM=UPSTREAM_SETTINGS)
+class UpstreamClientTest(SimpleTestCase):
+
+    def setUp(self):
+        upstream.get_breaker().record_success()
+
+    def patch_get(self, *side_effect):
+        return mock.patch.object(upstream.get_session(), 'get', side_effect=list(side_effect))
+
+    def test_session_is_shared(self):
+        self.assertIs(upstream.get_session(), upstream.get_session())
+
+    def test_retries_on_server_errors(self):
+        with self.patch_get(make_response(503, {}), make_response(200, {'results': {'ticker': 'AAPL'}})) as get:
+            self.assertEqual(fetch_ticker('AAPL'), {'ticker': 'AAPL'})
+        self.assertEqual(get.call_count, 2)
+        self.assertEqual(get.call_args.kwargs['timeout'], (3.05, 10.0))
+
+    def test_client_errors_are_not_retried(self):
+        error = make_response(404, {'status': 'NOT_FOUND', 'message': 'Ticker not found.'})
+        with self.patch_get(error) as get, self.assertRaisesMessage(ValidationError, 'NOT_FOUND: Ticker not found.'):
+            fetch_ticker('INVALID')
+        self.assertEqual(get.call_count, 1)
+
+    def test_connection_errors_without_response(self):
+        failures = [requests.exceptions.ConnectionError()] * 3
+        with self.patch_get(*failures) as get, self.assertRaises(UpstreamUnavailable):
+            fetch_ticker('AAPL')
+        self.assertEqual(get.call_count, 3)
+
+    def test_circuit_opens_and_fails_fast(self):
+        failures = [requests.exceptions.Timeout()] * 6
+        with self.patch_get(*failures) as get:
+            for _ in range(3):
+                with self.assertRaises(UpstreamUnavailable):
+                    fetch_ticker('AAPL')
+        # Tras dos fallos el circuito está abierto y la tercera llamada no sale
+        self.assertEqual(get.call_count, 6)
+        self.assertEqual(upstream.get_breaker().state, CircuitBreaker.OPEN)
+
+
+class CircuitBreakerTest(SimpleTestCase):
+
+    def test_half_open_allows_single_trial(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow_request())
+        self.assertFalse(breaker.allow_request())
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+
+class TokenBucketTest(SimpleTestCase):
+
+    def test_waits_when_bucket_is_empty(self):
+        bucket = TokenBucket(rate=100, capacity=2)
+        with mock.patch('_apps.api.upstream.time.sleep') as sleep:
+            self.assertEqual(bucket.acquire(), 0)
+            self.assertEqual(bucket.acquire(), 0)
+            sleep.side_effect = lambda delay: setattr(bucket, 'tokens', 1)
+            self.assertGreater(bucket.acquire(), 0)
+        sleep.assert_called_once()
@@ -1,9 +1,27 @@
+import base64
+import json
+import os
+import struct
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
 from rest_framework.test import APITestCase
+from .cache import get_reference_data_cache
+from .idempotency import get_idempotency_store
 from .models import Company
+from .renderers import PackedSeriesRenderer
+from .test_timeseries import fake_aggregates
+from .test_upstream import FakeUpstreamMixin
+from .timeseries import SerieColumns
+from core import schema
 
-class CompanyViewSetTest(APITestCase):
+class CompanyViewSetTest(FakeUpstreamMixin, APITestCase):
 
     def setUp(self):
         self.company = Company.objects.create(
@@ -17,8 +35,87 @@ class CompanyViewSetTest(APITestCase):
     def test_list_companies(self):
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['symbol'], self.company.symbol)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['symbol'], self.company.symbol)
+
+    def test_list_companies_cursor_pagination(self):
+        for index in range(6):
+            Company.objects.create(name=f"Company {index}", description="Paged", symbol=f"PG{index}")
+        # Nombres repetidos: el desempate por id mantiene el orden estable
+        Company.objects.create(name="Company 3", description="Paged", symbol="PGX")
+
+        symbols, url = [], f'{self.url}?page_size=3&ordering=name'
+        while url:
+            response = self.client.get(url)
+            self.assertLessEqual(len(response.data['results']), 3)
+            symbols.extend(row['symbol'] for row in response.data['results'])
+            last_page, url = response.data, response.data['next']
+
+        self.assertEqual(len(symbols), 8)
+        self.assertEqual(len(set(symbols)), 8)
+        previous = self.client.get(last_page['previous'])
+        self.assertEqual([row['symbol'] for row in previous.data['results']], symbols[3:6])
+
+    def test_list_companies_invalid_cursor(self):
+        def cursor(payload):
+            return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+        for value in ['nope', cursor({'v': 'a'}), cursor({'v': 'a', 'id': 'nope', 'r': 0}),
+                      cursor({'v': 'a', 'id': 42, 'r': 0}), cursor(['a'])]:
+            with self.subTest(value):
+                response = self.client.get(self.url, {'cursor': value})
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_companies_descending(self):
+        Company.objects.create(name="Zeta Company", description="Last", symbol="ZZZ")
+        response = self.client.get(f'{self.url}?ordering=-name')
+        self.assertEqual(response.data['results'][0]['symbol'], 'ZZZ')
+
+    def test_list_companies_sparse_fields(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'{self.url}?fields=id,symbol')
+        self.assertEqual(set(response.data['results'][0]), {'id', 'symbol'})
+        self.assertNotIn('description', queries.captured_queries[0]['sql'])
+
+    def test_list_companies_defers_alpha_vantage(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('api_companyreference', queries.captured_queries[0]['sql'])
+
+    def test_list_companies_by_market_columns(self):
+        for symbol, exchange, market_cap in [
+            ('BIG', 'XNYS', 3e12), ('MID', 'XNYS', 5e10), ('NUL', 'XNYS', None), ('SML', 'XNYS', 2e9),
+            ('NAS', 'XNAS', 1e13),
+        ]:
+            Company.objects.create(
+                name=f"Company {symbol}", description="Market", symbol=symbol,
+                alpha_vantage={'primary_exchange': exchange, 'market_cap': market_cap},
+            )
+
+        def pages(ordering):
+            symbols, url = [], f'{self.url}?exchange=xnys&ordering={ordering}&page_size=2'
+            while url:
+                response = self.client.get(url)
+                symbols.extend(row['symbol'] for row in response.data['results'])
+                url = response.data['next']
+            return symbols
+
+        # Las empresas sin capitalización se ordenan como el menor valor
+        self.assertEqual(pages('-market_cap'), ['BIG', 'MID', 'SML', 'NUL'])
+        self.assertEqual(pages('market_cap'), ['NUL', 'SML', 'MID', 'BIG'])
+
+    def test_retrieve_company_reads_reference_data_only_when_requested(self):
+        url = reverse('company-detail', args=[self.company.id])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'fields': 'id,symbol,exchange'})
+        self.assertEqual(set(response.data), {'id', 'symbol', 'exchange'})
+        self.assertNotIn('api_companyreference', ' '.join(query['sql'] for query in queries.captured_queries))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'fields': 'id,alpha_vantage'})
+        self.assertEqual(response.data['alpha_vantage'], {"some_key": "some_value"})
+        self.assertEqual(len(queries), 1)
 
     def test_create_company(self):
         data = {
@@ -52,3 +149,398 @@ class CompanyViewSetTest(APITestCase):
         response = self.client.delete(url)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertEqual(Company.objects.count(), 0)
+        # La eliminación es lógica: la fila se conserva hasta la purga
+        self.assertIsNotNone(Company.all_objects.get(pk=self.company.pk).deleted_at)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.delete(url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_bulk_delete_companies(self):
+        other = Company.objects.create(name="Other", description="Another company", symbol="OTH")
+        missing = '00000000-0000-0000-0000-000000000000'
+        url = reverse('company-bulk-delete')
+        response = self.client.post(url, {'ids': [str(self.company.id), str(other.id), missing]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'deleted': 2, 'not_found': [missing]})
+        self.assertEqual(Company.objects.count(), 0)
+
+        # Las ya eliminadas se informan como no encontradas
+        response = self.client.post(url, {'ids': [str(other.id)]}, format='json')
+        self.assertEqual(response.data, {'deleted': 0, 'not_found': [str(other.id)]})
+
+        response = self.client.post(url, {'ids': ['not-a-uuid']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        with override_settings(SOFT_DELETE={'MAX_IDS': 1}):
+            response = self.client.post(url, {'ids': [str(self.company.id), missing]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(TIME_SERIES_CACHE={'BACKEND': '_apps.api.cache.LocMemBackend'})
+    def test_retrieve_company_conditional_get(self):
+        url = reverse('company-detail', args=[self.company.id])
+        with mock.patch('_apps.api.serializers.load_time_serie', return_value=[]) as load:
+            response = self.client.get(url)
+            etag = response['ETag']
+            self.assertIn('max-age=', response['Cache-Control'])
+            self.assertIn('Last-Modified', response)
+
+            with mock.patch('_apps.api.views.CompanyViewSet.get_serializer') as get_serializer:
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(response['ETag'], etag)
+            get_serializer.assert_not_called()
+            self.assertEqual(load.call_count, 1)
+
+            self.company.name = "Renamed Company"
+            self.company.save()
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_list_companies_conditional_get(self):
+        response = self.client.get(self.url)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        etag = response['ETag']
+        Company.objects.create(name="New Company", description="Listed", symbol="NEW")
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # Las eliminaciones no cambian el updated_at de las demás filas: sin Last-Modified,
+        # If-Modified-Since no puede producir un 304 con la fila eliminada
+        self.assertNotIn('Last-Modified', response)
+        etag = response['ETag']
+        self.client.delete(reverse('company-detail', args=[self.company.id]))
+        response = self.client.get(
+            self.url, HTTP_IF_NONE_MATCH=etag, HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT',
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn(str(self.company.id), [row['id'] for row in response.data['results']])
+
+    @override_settings(TIME_SERIES_CACHE={'BACKEND': '_apps.api.cache.LocMemBackend'})
+    async def test_retrieve_company_async(self):
+        url = reverse('company-detail-async', args=[self.company.id])
+        yesterday = datetime.now(timezone.utc).replace(hour=4, minute=0, second=0, microsecond=0) - timedelta(days=1)
+        t = int(yesterday.timestamp() * 1000)
+        bars = [{'v': 1000.0, 'vw': 10.0, 'o': 10.0, 'c': 10.0, 'h': 10.0, 'l': 10.0, 't': t, 'n': 5}]
+        with mock.patch('_apps.api.timeseries.afetch_aggregates', new=mock.AsyncMock(return_value=bars)) as fetch:
+            response = await self.async_client.get(url)
+            await self.async_client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['symbol'], self.company.symbol)
+        self.assertEqual(response.json()['time_serie'], bars)
+        self.assertEqual(fetch.await_count, 1)
+
+    async def test_retrieve_company_async_not_found(self):
+        url = reverse('company-detail-async', args=['00000000-0000-0000-0000-000000000000'])
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def fake_ticker(self, symbol):
+        if symbol.startswith('BAD'):
+            raise ValidationError('NOT_FOUND: Ticker not found.')
+        return {'ticker': symbol}
+
+    @override_settings(REFERENCE_DATA_CACHE={'BACKEND': '_apps.api.cache.LocMemBackend'})
+    @mock.patch.dict(os.environ, {'ALPHAVANTAGE_KEY': 'test'})
+    def test_bulk_create_companies(self):
+        url = reverse('company-bulk-create')
+        data = [
+            {'name': 'Apple', 'description': 'Apple Inc.', 'symbol': 'aapl'},
+            {'name': 'Apple again', 'description': 'Duplicated', 'symbol': 'AAPL'},
+            {'name': 'Microsoft', 'description': 'Microsoft Corp.', 'symbol': 'MSFT'},
+            {'name': 'Bad', 'description': 'Unknown ticker', 'symbol': 'BADX'},
+            {'name': 'Existing', 'description': 'Already registered', 'symbol': 'ttc'},
+        ]
+        with mock.patch('_apps.api.serializers.fetch_ticker', side_effect=self.fake_ticker) as fetch:
+            response = self.client.post(url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(fetch.call_count, 3)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual([row['status'] for row in response.data['results']],
+                         ['created', 'error', 'created', 'error', 'error'])
+        self.assertEqual(Company.objects.get(symbol='AAPL').alpha_vantage, {'ticker': 'AAPL'})
+
+    @override_settings(REFERENCE_DATA_CACHE={'BACKEND': '_apps.api.cache.LocMemBackend'})
+    @mock.patch.dict(os.environ, {'ALPHAVANTAGE_KEY': 'test'})
+    def test_bulk_create_rejects_non_string_symbols(self):
+        url = reverse('company-bulk-create')
+        data = [
+            {'name': 'Number', 'description': 'Numeric symbol', 'symbol': 123},
+            {'name': 'Null', 'description': 'Null symbol', 'symbol': None},
+            {'name': 'Missing', 'description': 'No symbol'},
+            {'name': 'Apple', 'description': 'Apple Inc.', 'symbol': 'AAPL'},
+        ]
+        with mock.patch('_apps.api.serializers.fetch_ticker', side_effect=self.fake_ticker) as fetch:
+            response = self.client.post(url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        fetch.assert_called_once_with('AAPL')
+        self.assertEqual([row['status'] for row in response.data['results']], ['error', 'error', 'error', 'created'])
+        self.assertEqual([row['errors']['symbol'] for row in response.data['results'][:3]],
+                         [['Not a valid string.'], ['This field may not be null.'], ['This field is required.']])
+        self.assertFalse(Company.objects.filter(symbol='123').exists())
+
+    @override_settings(REFERENCE_DATA_CACHE={'BACKEND': '_apps.api.cache.LocMemBackend'})
+    @mock.patch.dict(os.environ, {'ALPHAVANTAGE_KEY': 'test'})
+    def test_bulk_create_companies_ndjson(self):
+        url = reverse('company-bulk-create')
+        body = '\n'.join(json.dumps({'name': f'Company {symbol}', 'description': 'NDJSON', 'symbol': symbol})
+                         for symbol in ['AAA', 'BBB', 'CCC'])
+        with mock.patch('_apps.api.serializers.fetch_ticker', side_effect=self.fake_ticker):
+            response = self.client.post(url, body, content_type='application/x-ndjson')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Company.objects.filter(description='NDJSON').count(), 3)
+
+    def test_export_companies_ndjson(self):
+        Company.objects.create(name="Second Company", description="Export", symbol="SEC")
+        response = self.client.get(reverse('company-export'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(len(rows), 2)
+        self.assertNotIn('alpha_vantage', rows[0])
+
+    def test_export_companies_csv_with_alpha_vantage(self):
+        response = self.client.get(reverse('company-export'), {'format': 'csv', 'include_alpha_vantage': 'true'})
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'id,name,description,symbol,alpha_vantage')
+        self.assertIn('"{""some_key"": ""some_value""}"', lines[1])
+
+    def test_retrieve_company_by_symbol(self):
+        url = reverse('company-by-symbol', args=['ttc'])
+        with mock.patch('_apps.api.serializers.load_time_serie', return_value=[]):
+            response = self.client.get(f'{url}?fields=id,symbol,time_serie')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['id'], str(self.company.id))
+
+        response = self.client.get(reverse('company-by-symbol', args=['NOPE']))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_companies_by_symbols(self):
+        Company.objects.create(name="Second Company", description="Batch", symbol="SEC")
+        Company.objects.create(name="Third Company", description="Batch", symbol="THR")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {'symbol__in': 'ttc,THR,MISS'})
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(sorted(row['symbol'] for row in response.data['results']), ['THR', 'TTC'])
+
+    def test_search_companies(self):
+        Company.objects.create(name="Tesla Inc", description="Electric vehicles", symbol="TSLA")
+        Company.objects.create(name="Testing Labs", description="Quality", symbol="TLB")
+        Company.objects.create(name="Beta Corp", description="Testing tools", symbol="BTC")
+        Company.objects.create(name="Omega Corp", description="Misc", symbol="OMG")
+
+        response = self.client.get(self.url, {'q': 'tsla'})
+        self.assertEqual([row['symbol'] for row in response.data['results']], ['TSLA'])
+
+        # El símbolo pesa más que el nombre y este más que la descripción
+        response = self.client.get(self.url, {'q': 't'})
+        symbols = [row['symbol'] for row in response.data['results']]
+        self.assertEqual(set(symbols[:3]), {'TSLA', 'TLB', 'TTC'})
+        self.assertNotIn('OMG', symbols)
+
+        symbols, url = [], f'{self.url}?q=test&page_size=1'
+        while url:
+            response = self.client.get(url)
+            symbols.extend(row['symbol'] for row in response.data['results'])
+            url = response.data['next']
+        # Los nombres que empiezan por el texto van antes; los empates se ordenan por id
+        self.assertEqual(set(symbols[:2]), {'TLB', 'TTC'})
+        self.assertEqual(symbols[2:], ['BTC'])
+
+        response = self.client.get(self.url, {'q': 'test', 'ordering': 'symbol'})
+        self.assertEqual([row['symbol'] for row in response.data['results']], ['BTC', 'TLB', 'TTC'])
+
+    @override_settings(TIME_SERIES_CACHE={'BACKEND': '_apps.api.cache.LocMemBackend'})
+    def test_batch_time_series(self):
+        other = Company.objects.create(name="Other Company", description="Batch", symbol="OTH")
+        url = reverse('company-time-series')
+        params = {'ids': str(self.company.id), 'symbols': 'oth,MISS', 'start': '2024-08-19', 'end': '2024-08-28'}
+        with mock.patch('_apps.api.timeseries.fetch_aggregates', side_effect=fake_aggregates) as fetch:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(fetch.call_count, 2)
+        self.assertEqual([row['symbol'] for row in response.data['results']], [other.symbol, self.company.symbol])
+        self.assertEqual(len(response.data['results'][0]['time_serie']), 8)
+        self.assertEqual(response.data['not_found'], ['MISS'])
+
+        with mock.patch('_apps.api.timeseries.fetch_aggregates') as fetch:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, params)
+        fetch.assert_not_called()
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(len(response.data['results'][1]['time_serie']), 8)
+
+        response = self.client.get(url, {'ids': 'not-a-uuid'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(TIME_SERIES_CACHE={'BACKEND': '_apps.api.cache.LocMemBackend'})
+    def test_time_series_columnar_formats(self):
+        params = {'ids': str(self.company.id), 'start': '2024-08-19', 'end': '2024-08-28'}
+        url = reverse('company-time-series')
+        with mock.patch('_apps.api.timeseries.fetch_aggregates', side_effect=fake_aggregates):
+            rows = self.client.get(url, params).data['results'][0]['time_serie']
+
+        response = self.client.get(url, {**params, 'format': 'columnar'})
+        self.assertEqual(response['Content-Type'], 'application/vnd.columnar+json')
+        columns = response.json()['results'][0]['time_serie']
+        self.assertEqual(columns['c'], [row['c'] for row in rows])
+        self.assertEqual(sum(columns['d']), rows[-1]['t'] // 86400000)
+
+        response = self.client.get(url, params, HTTP_ACCEPT='application/vnd.packed-series')
+        body = response.content
+        header_length = struct.unpack('<I', body[:4])[0]
+        header = json.loads(body[4:4 + header_length])
+        data = body[4 + header_length:]
+        self.assertEqual((4 + header_length) % 8, 0)
+        packed = header['results'][0]['time_serie']
+        self.assertEqual(packed['length'], len(rows))
+        dtype, offset = packed['columns']['c']
+        self.assertEqual(dtype, '<f4')
+        self.assertEqual(list(struct.unpack(f'<{len(rows)}f', data[offset:offset + 4 * len(rows)])),
+                         columns['c'])
+        dtype, offset = packed['columns']['d']
+        self.assertEqual(dtype, '<u2')
+        self.assertEqual(list(struct.unpack(f'<{len(rows)}H', data[offset:offset + 2 * len(rows)])),
+                         columns['d'])
+
+        with mock.patch('_apps.api.serializers.load_time_serie', return_value=rows):
+            response = self.client.get(reverse('company-detail', args=[self.company.id]), {'format': 'columnar'})
+        self.assertEqual(response.json()['time_serie'], columns)
+
+    def test_packed_dtypes(self):
+        columns = SerieColumns(
+            d=[19950, 1, 3], c=[101.25, None, 99.5], v=[1000.0, 5e9, 2000.0], n=[10, None, 12], vw=[None] * 3,
+        )
+        body = PackedSeriesRenderer().render({'time_serie': columns})
+        header_length = struct.unpack('<I', body[:4])[0]
+        packed = json.loads(body[4:4 + header_length])['time_serie']
+        dtypes = {field: dtype for field, (dtype, _) in packed['columns'].items()}
+        self.assertEqual(dtypes, {'d': '<u2', 'c': '<f4', 'v': '<i8', 'n': '<f8'})
+
+        body = PackedSeriesRenderer().render({'time_serie': SerieColumns(d=[], c=[])})
+        self.assertIn(b'{"length": 0, "columns": {}}', body)
+
+    @override_settings(TIME_SERIES_CACHE={'BACKEND': '_apps.api.cache.LocMemBackend'})
+    def test_analytics(self):
+        url = reverse('company-analytics', args=[self.company.id])
+        params = {'start': '2024-08-19', 'end': '2024-08-28', 'indicators': 'sma,drawdown', 'window': 3}
+        with mock.patch('_apps.api.timeseries.fetch_aggregates', side_effect=fake_aggregates):
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        analytics = response.data['analytics']
+        self.assertEqual(set(analytics), {'t', 'close', 'sma', 'drawdown', 'summary'})
+        self.assertEqual(len(analytics['sma']), 8)
+
+        with mock.patch('_apps.api.analytics.compute') as compute:
+            response = self.client.get(url, params)
+        compute.assert_not_called()
+        self.assertEqual(response.data['analytics'], analytics)
+
+        response = self.client.get(url, {'indicators': 'sma,rsi'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(TIME_SERIES_CACHE={'BACKEND': '_apps.api.cache.LocMemBackend'})
+    def test_batch_analytics(self):
+        Company.objects.create(name="Other Company", description="Batch", symbol="OTH")
+        url = reverse('company-analytics-batch')
+        params = {'symbols': 'TTC,OTH,MISS', 'start': '2024-08-19', 'end': '2024-08-28', 'indicators': 'returns'}
+        with mock.patch('_apps.api.timeseries.fetch_aggregates', side_effect=fake_aggregates):
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['symbol'] for row in response.data['results']], ['OTH', 'TTC'])
+        self.assertEqual(len(response.data['results'][0]['analytics']['returns']), 8)
+        self.assertEqual(response.data['not_found'], ['MISS'])
+
+    @mock.patch.dict(os.environ, {'ALPHAVANTAGE_KEY': 'test'})
+    def test_create_company_duplicated_symbol(self):
+        data = {'name': 'Copy', 'description': 'Same ticker', 'symbol': 'ttc'}
+        with mock.patch('_apps.api.serializers.fetch_ticker') as fetch:
+            response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('symbol', response.data)
+        fetch.assert_not_called()
+
+    @override_settings(REFERENCE_DATA_CACHE={'BACKEND': '_apps.api.cache.LocMemBackend'})
+    def test_create_company_idempotency_key(self):
+        data = {'name': 'Idempotent', 'description': 'Retried', 'symbol': 'IDM'}
+        headers = {'Idempotency-Key': 'create-idm-1'}
+        with mock.patch('_apps.api.serializers.fetch_ticker', side_effect=self.fake_ticker) as fetch:
+            first = self.client.post(self.url, data, format='json', headers=headers)
+            get_reference_data_cache().invalidate('IDM')
+            retry = self.client.post(self.url, data, format='json', headers=headers)
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(fetch.call_count, 1)
+        self.assertEqual(Company.objects.filter(symbol='IDM').count(), 1)
+
+        # La misma clave con otro cuerpo se rechaza, y otra ruta tiene sus propias claves
+        response = self.client.post(self.url, {**data, 'name': 'Other'}, format='json', headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        url = reverse('company-detail', args=[self.company.id])
+        response = self.client.patch(url, {'description': 'Patched'}, format='json', headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('Idempotent-Replayed', response)
+
+    def test_update_company_idempotency_key_in_progress(self):
+        url = reverse('company-detail', args=[self.company.id])
+        headers = {'Idempotency-Key': 'update-ttc-1'}
+        self.assertTrue(get_idempotency_store().acquire(f'PATCH:{url}', 'update-ttc-1'))
+        response = self.client.patch(url, {'description': 'Patched'}, format='json', headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        # Los errores no se guardan: la clave se libera y puede reintentarse
+        get_idempotency_store().release(f'PATCH:{url}', 'update-ttc-1')
+        response = self.client.patch(url, {'name': ''}, format='json', headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.patch(url, {'name': 'Patched'}, format='json', headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(REFERENCE_DATA_CACHE={'BACKEND': '_apps.api.cache.LocMemBackend'})
+    def test_write_upstream_lookup_outside_transaction(self):
+        # Los tests ya se ejecutan dentro de transacciones: la consulta no debe añadir ninguna,
+        # ni siquiera con ATOMIC_REQUESTS
+        baseline = len(connection.atomic_blocks)
+        connection.settings_dict['ATOMIC_REQUESTS'] = True
+        self.addCleanup(connection.settings_dict.__setitem__, 'ATOMIC_REQUESTS', False)
+        depths = []
+
+        def fake_ticker(symbol):
+            depths.append(len(connection.atomic_blocks))
+            return {'ticker': symbol}
+
+        url = reverse('company-detail', args=[self.company.id])
+        with mock.patch('_apps.api.serializers.fetch_ticker', side_effect=fake_ticker):
+            self.client.post(self.url, {'name': 'New', 'description': 'Tx', 'symbol': 'NTX'}, format='json')
+            self.client.patch(url, {'symbol': 'UTX'}, format='json')
+        self.assertEqual(depths, [baseline, baseline])
+
+
+class SchemaViewTest(SimpleTestCase):
+
+    def setUp(self):
+        schema._schema = None
+        self.addCleanup(setattr, schema, '_schema', None)
+
+    def test_schema_is_generated_once(self):
+        from drf_yasg.generators import OpenAPISchemaGenerator
+
+        with mock.patch.object(OpenAPISchemaGenerator, 'get_schema', autospec=True,
+                               side_effect=OpenAPISchemaGenerator.get_schema) as get_schema:
+            first = self.client.get('/swagger.json', HTTP_HOST='localhost')
+            second = self.client.get('/swagger.json', HTTP_HOST='localhost')
+        get_schema.assert_called_once()
+        self.assertEqual(first.content, second.content)
+
+    def test_schema_does_not_depend_on_the_host(self):
+        response = self.client.get('/swagger.json', HTTP_HOST='localhost')
+        self.assertEqual(response['Content-Type'], 'application/json')
+        document = json.loads(response.content)
+        self.assertNotIn('host', document)
+        self.assertIn('/companies/bulk-delete/', document['paths'])
@@ -1,5 +1,11 @@
-from django.test import TestCase
-from .models import Company
+from datetime import date, timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from .models import Company, CompanyReference, DailyBar
 
 class CompanyModelTest(TestCase):
 
@@ -17,3 +23,81 @@ class CompanyModelTest(TestCase):
         self.assertEqual(company.description, "A test company")
         self.assertEqual(company.symbol, "TTC")
         self.assertEqual(company.alpha_vantage, {"some_key": "some_value"})
+
+    def test_company_symbol_is_unique_case_insensitive(self):
+        with self.assertRaises(IntegrityError):
+            Company.objects.create(name="Copy", description="Same ticker", symbol="ttc")
+
+    def test_company_by_symbol(self):
+        self.assertEqual(Company.objects.by_symbol("ttc").get(), self.company)
+        self.assertEqual(list(Company.objects.by_symbols(["TTC", "NOPE"])), [self.company])
+
+    def test_company_reference_columns(self):
+        company = Company.objects.create(
+            name="Apple", description="Apple Inc.", symbol="AAPL",
+            alpha_vantage={
+                'market_cap': 3.2e12, 'primary_exchange': 'xnas', 'sic_code': '3571', 'currency_name': 'usd',
+                'list_date': '1980-12-12', 'share_class_shares_outstanding': 15204137000,
+            },
+        )
+        company = Company.objects.get(pk=company.pk)
+        self.assertEqual(company.market_cap, 3.2e12)
+        self.assertEqual((company.exchange, company.sic_code, company.currency), ('XNAS', '3571', 'USD'))
+        self.assertEqual(company.list_date, date(1980, 12, 12))
+        self.assertEqual(company.shares_outstanding, 15204137000)
+        self.assertEqual(CompanyReference.objects.get(company=company).data['sic_code'], '3571')
+
+        # Los datos incompletos o mal formados dejan las columnas vacías
+        company.alpha_vantage = {'market_cap': 'n/a', 'list_date': '12/12/1980'}
+        company.save()
+        company.refresh_from_db()
+        self.assertIsNone(company.market_cap)
+        self.assertIsNone(company.list_date)
+        self.assertEqual(company.exchange, '')
+
+    @override_settings(STORE_RAW_REFERENCE_DATA=False)
+    def test_company_without_raw_reference_data(self):
+        company = Company.objects.create(
+            name="Apple", description="Apple Inc.", symbol="AAPL", alpha_vantage={'primary_exchange': 'XNAS'},
+        )
+        self.assertEqual(Company.objects.get(pk=company.pk).exchange, 'XNAS')
+        self.assertIsNone(Company.objects.get(pk=company.pk).alpha_vantage)
+        self.assertFalse(CompanyReference.objects.filter(company=company).exists())
+
+        # Los datos que ya estaban almacenados se eliminan al reasignarlos
+        self.company.alpha_vantage = {'primary_exchange': 'XNYS'}
+        self.company.save()
+        self.assertFalse(CompanyReference.objects.filter(company=self.company).exists())
+
+    def test_soft_delete_frees_the_symbol(self):
+        self.assertEqual(Company.objects.filter(pk=self.company.pk).soft_delete(), 1)
+        self.assertFalse(Company.objects.filter(pk=self.company.pk).exists())
+        self.assertIsNotNone(Company.all_objects.get(pk=self.company.pk).deleted_at)
+        # Eliminarla de nuevo no cambia su fecha de eliminación
+        self.assertEqual(Company.all_objects.filter(pk=self.company.pk).soft_delete(), 0)
+
+        Company.objects.create(name="New Company", description="Reuses the symbol", symbol="ttc")
+        self.assertEqual(Company.all_objects.by_symbol('TTC').count(), 2)
+
+    def test_purge_deleted_companies(self):
+        kept = Company.objects.create(name="Kept", description="Not deleted", symbol="KPT")
+        for company in (self.company, kept):
+            DailyBar.objects.bulk_create(
+                DailyBar(company=company, date=date(2024, 8, day), timestamp=day, open=1, high=1, low=1, close=1,
+                         volume=1)
+                for day in range(1, 8)
+            )
+        recent = Company.objects.create(name="Recent", description="Deleted recently", symbol="RCT")
+        Company.objects.filter(pk=self.company.pk).soft_delete()
+        Company.all_objects.filter(pk=self.company.pk).update(deleted_at=timezone.now() - timedelta(hours=2))
+        Company.objects.filter(pk=recent.pk).soft_delete()
+
+        out = StringIO()
+        call_command('purge_deleted_companies', retention=3600, batch_size=3, pause=0, stdout=out)
+
+        self.assertIn('1 empresas y 7 barras', out.getvalue())
+        self.assertFalse(Company.all_objects.filter(pk=self.company.pk).exists())
+        self.assertFalse(CompanyReference.objects.filter(company_id=self.company.pk).exists())
+        self.assertEqual(DailyBar.objects.count(), 7)
+        # Las eliminadas dentro del periodo de retención se conservan
+        self.assertTrue(Company.all_objects.filter(pk=recent.pk).exists())
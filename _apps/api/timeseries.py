@@ -0,0 +1,274 @@
+"""
+Almacén local de barras diarias.
+
+Las series temporales se leen de la tabla ``DailyBar`` con una consulta por
+rango y solo se consulta la API de polygon.io para los días que aún no están
+almacenados (recarga incremental).
+"""
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from rest_framework.exceptions import APIException
+from .models import DailyBar
+from .upstream import afetch_aggregates, fetch_aggregates
+
+# Días sin barras que se toleran al inicio del rango (fines de semana y festivos)
+LEADING_GAP_TOLERANCE = 4
+
+# Días que cubre la serie expuesta en el detalle de una empresa
+TIME_SERIE_DAYS = 30
+
+
+def today():
+    """
+    Returns:
+        date: La fecha actual en UTC. Las barras de este día aún no están cerradas.
+    """
+    return datetime.now(timezone.utc).date()
+
+
+def time_serie_window():
+    """
+    Retorna el rango de fechas de la serie expuesta en el detalle de una empresa.
+
+    Returns:
+        tuple: (fecha inicial, fecha final) de los últimos ``TIME_SERIE_DAYS`` días.
+    """
+    end_date = today()
+    return end_date - timedelta(days=TIME_SERIE_DAYS), end_date
+
+
+def result_to_bar(company, result):
+    """
+    Convierte una barra en formato de la API en una instancia (sin guardar) de DailyBar.
+    """
+    return DailyBar(
+        company=company,
+        date=datetime.fromtimestamp(result['t'] / 1000, tz=timezone.utc).date(),
+        timestamp=result['t'],
+        open=result['o'],
+        high=result['h'],
+        low=result['l'],
+        close=result['c'],
+        volume=result['v'],
+        vwap=result.get('vw'),
+        transactions=result.get('n'),
+    )
+
+
+def bar_to_result(bar):
+    """
+    Convierte una instancia de DailyBar al formato de la API, que es el que se expone en `time_serie`.
+    """
+    result = {'v': bar.volume, 'vw': bar.vwap, 'o': bar.open, 'c': bar.close, 'h': bar.high,
+              'l': bar.low, 't': bar.timestamp, 'n': bar.transactions}
+    return {key: value for key, value in result.items() if value is not None}
+
+
+# Campos de cada barra en la representación por columnas, además de ``d``
+SERIE_COLUMNS = ('o', 'h', 'l', 'c', 'v', 'vw', 'n')
+
+MS_PER_DAY = 24 * 60 * 60 * 1000
+
+
+class SerieColumns(dict):
+    """
+    Serie en representación por columnas (ver ``serie_columns``).
+
+    Es un ``dict`` corriente para los renderers JSON; el tipo permite que
+    ``PackedSeriesRenderer`` la reconozca y la empaquete en binario.
+    """
+
+
+def serie_columns(serie):
+    """
+    Convierte una serie en formato de la API en una lista por campo.
+
+    Los timestamps se sustituyen por días desde la época (UTC) codificados como
+    diferencias: ``d[0]`` es el día de la primera barra y ``d[i]`` los días
+    transcurridos desde la barra anterior. Los campos ausentes de una barra
+    (``vw``, ``n``) son ``None``.
+
+    Args:
+        serie (list): Las barras en el formato de la API, ordenadas por fecha.
+
+    Returns:
+        SerieColumns: ``d`` y una lista por cada campo de ``SERIE_COLUMNS``.
+    """
+    days = [int(bar['t']) // MS_PER_DAY for bar in serie]
+    columns = SerieColumns(d=[day - previous for previous, day in zip([0, *days], days)])
+    for field in SERIE_COLUMNS:
+        columns[field] = [bar.get(field) for bar in serie]
+    return columns
+
+
+def last_expected_session(end_date):
+    """
+    Retorna el último día hábil cuya barra debería estar cerrada dentro del rango.
+
+    Args:
+        end_date (date): Fecha final del rango.
+
+    Returns:
+        date: El último día de semana anterior a hoy y no posterior a ``end_date``.
+    """
+    day = min(end_date, today() - timedelta(days=1))
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day
+
+
+def missing_ranges(stored_dates, start_date, end_date):
+    """
+    Calcula los rangos de fechas que faltan en el almacén para cubrir [start_date, end_date].
+
+    Solo se consideran los huecos al inicio y al final del rango; los huecos
+    intermedios corresponden a festivos o se completan con ``backfill_bars``.
+
+    Args:
+        stored_dates (list): Fechas ya almacenadas dentro del rango, en orden ascendente.
+        start_date (date): Fecha inicial del rango.
+        end_date (date): Fecha final del rango.
+
+    Returns:
+        list: Tuplas (inicio, fin) a consultar en la API.
+    """
+    last_expected = last_expected_session(end_date)
+    if last_expected < start_date:
+        return []
+    if not stored_dates:
+        return [(start_date, last_expected)]
+
+    ranges = []
+    if (stored_dates[0] - start_date).days > LEADING_GAP_TOLERANCE:
+        ranges.append((start_date, stored_dates[0] - timedelta(days=1)))
+    if stored_dates[-1] < last_expected:
+        ranges.append((stored_dates[-1] + timedelta(days=1), last_expected))
+    return ranges
+
+
+def bars_to_persist(company, results):
+    """
+    Retorna las instancias (sin guardar) de DailyBar de las barras ya cerradas de una respuesta.
+    """
+    return [bar for bar in (result_to_bar(company, result) for result in results) if bar.date < today()]
+
+
+def store_results(company, results):
+    """
+    Persiste las barras cerradas de una respuesta de la API, ignorando las ya existentes.
+
+    Args:
+        company (Company): La empresa a la que pertenecen las barras.
+        results (list): Barras en formato de la API.
+
+    Returns:
+        list: Las instancias de DailyBar correspondientes a barras cerradas.
+    """
+    closed = bars_to_persist(company, results)
+    DailyBar.objects.bulk_create(closed, ignore_conflicts=True)
+    return closed
+
+
+def load_time_serie(company, start_date, end_date, rate_limiter=None):
+    """
+    Retorna la serie diaria de una empresa desde el almacén, completando
+    desde la API únicamente los días que faltan.
+
+    Args:
+        company (Company): La empresa.
+        start_date (date): Fecha inicial (inclusive).
+        end_date (date): Fecha final (inclusive).
+        rate_limiter (TokenBucket, opcional): Limitador que se consulta antes de cada llamada a la API.
+
+    Returns:
+        list: Las barras en el formato de la API, ordenadas por fecha.
+    """
+    bars = {
+        bar.date: bar
+        for bar in DailyBar.objects.filter(company=company, date__range=(start_date, end_date))
+    }
+    for range_start, range_end in missing_ranges(sorted(bars), start_date, end_date):
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        for bar in store_results(company, fetch_aggregates(company.symbol, range_start, range_end)):
+            bars.setdefault(bar.date, bar)
+
+    return [bar_to_result(bars[day]) for day in sorted(bars) if start_date <= day <= end_date]
+
+
+def load_time_series(companies, start_date, end_date, max_workers):
+    """
+    Retorna las series diarias de varias empresas con una sola consulta al almacén.
+
+    Las barras almacenadas de todas las empresas se leen en una única consulta,
+    los rangos que faltan se piden a la API en paralelo (como máximo
+    ``max_workers`` llamadas simultáneas) y las barras cerradas obtenidas se
+    persisten con un único ``bulk_create``. Los hilos solo esperan al
+    upstream; toda la escritura ocurre en el hilo de la petición.
+
+    Args:
+        companies (list): Las empresas.
+        start_date (date): Fecha inicial (inclusive).
+        end_date (date): Fecha final (inclusive).
+        max_workers (int): Llamadas simultáneas máximas a la API.
+
+    Returns:
+        tuple: (series, errores), diccionarios indexados por el ``pk`` de la
+        empresa con la serie en el formato de la API o la ``APIException``
+        del upstream, respectivamente.
+    """
+    stored = defaultdict(dict)
+    for bar in DailyBar.objects.filter(company__in=companies, date__range=(start_date, end_date)):
+        stored[bar.company_id][bar.date] = bar
+
+    pending = [
+        (company, range_start, range_end)
+        for company in companies
+        for range_start, range_end in missing_ranges(sorted(stored[company.pk]), start_date, end_date)
+    ]
+    errors, new_bars = {}, []
+    if pending:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(pending)), thread_name_prefix='ts-batch') as executor:
+            futures = [
+                (company, executor.submit(fetch_aggregates, company.symbol, range_start, range_end))
+                for company, range_start, range_end in pending
+            ]
+            for company, future in futures:
+                try:
+                    closed = bars_to_persist(company, future.result())
+                except APIException as e:
+                    errors.setdefault(company.pk, e)
+                    continue
+                new_bars.extend(closed)
+                for bar in closed:
+                    stored[company.pk].setdefault(bar.date, bar)
+        DailyBar.objects.bulk_create(new_bars, ignore_conflicts=True)
+
+    series = {}
+    for company in companies:
+        if company.pk not in errors:
+            bars = stored[company.pk]
+            series[company.pk] = [bar_to_result(bars[day]) for day in sorted(bars) if start_date <= day <= end_date]
+    return series, errors
+
+
+async def aload_time_serie(company, start_date, end_date):
+    """
+    Versión asíncrona de ``load_time_serie``, para las vistas servidas por ASGI.
+
+    Usa el ORM asíncrono y el cliente HTTP asíncrono compartido, de modo que
+    no bloquea el event loop mientras espera al upstream.
+    """
+    bars = {
+        bar.date: bar
+        async for bar in DailyBar.objects.filter(company=company, date__range=(start_date, end_date))
+    }
+    for range_start, range_end in missing_ranges(sorted(bars), start_date, end_date):
+        closed = bars_to_persist(company, await afetch_aggregates(company.symbol, range_start, range_end))
+        await DailyBar.objects.abulk_create(closed, ignore_conflicts=True)
+        for bar in closed:
+            bars.setdefault(bar.date, bar)
+
+    return [bar_to_result(bars[day]) for day in sorted(bars) if start_date <= day <= end_date]
@@ -0,0 +1,451 @@
+"""
+Clientes HTTP para la API de polygon.io.
+
+Todas las llamadas al upstream pasan por este módulo:
+
+- Una ``requests.Session`` por proceso con pool de conexiones keep-alive
+  (se evita un handshake TCP+TLS por llamada) y un ``httpx.AsyncClient``
+  compartido por event loop para las vistas asíncronas.
+- Timeouts de conexión y lectura, para que un upstream colgado no bloquee
+  un worker indefinidamente.
+- Reintentos acotados con backoff exponencial y jitter ante 429 y 5xx.
+- Un circuit breaker que falla de inmediato mientras polygon.io está caído.
+- Métricas de número, latencia y estado de cada llamada (ver ``_apps.api.metrics``).
+
+Los errores 4xx del upstream se exponen como ``ValidationError`` con el
+mensaje ``status: message`` de la API; la indisponibilidad (5xx, timeouts,
+errores de conexión o circuito abierto) como ``UpstreamUnavailable`` (503).
+
+``httpx`` se importa en el primer uso del cliente asíncrono: los workers WSGI
+no lo necesitan y su importación alarga el arranque. ``requests`` no gana nada
+con ello, ya que DRF lo importa al cargarse (``rest_framework.compat``).
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+import weakref
+import requests
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from requests.adapters import HTTPAdapter
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException
+
+from . import metrics
+
+DEFAULT_SETTINGS = {
+    'CONNECT_TIMEOUT': 3.05,
+    'READ_TIMEOUT': 10.0,
+    'MAX_RETRIES': 2,
+    'BACKOFF_BASE': 0.25,
+    'BACKOFF_MAX': 4.0,
+    'POOL_MAXSIZE': 20,
+    'ASYNC_MAX_CONNECTIONS': 200,
+    'BREAKER_FAILURE_THRESHOLD': 5,
+    'BREAKER_RESET_TIMEOUT': 30.0,
+}
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+_async_clients = weakref.WeakKeyDictionary()
+_breaker = None
+
+
+class UpstreamUnavailable(APIException):
+    """
+    Excepción lanzada cuando polygon.io no está disponible o el circuito está abierto.
+    """
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'El servicio de datos de mercado no está disponible temporalmente.'
+    default_code = 'upstream_unavailable'
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker de tres estados (cerrado, abierto y semiabierto).
+
+    Tras ``failure_threshold`` fallos consecutivos el circuito se abre y las
+    llamadas fallan de inmediato durante ``reset_timeout`` segundos. Pasado ese
+    tiempo se deja pasar una única llamada de prueba: si tiene éxito el circuito
+    se cierra y si falla vuelve a abrirse.
+
+    Args:
+        failure_threshold (int): Fallos consecutivos que abren el circuito.
+        reset_timeout (float): Segundos que el circuito permanece abierto.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        """
+        Returns:
+            bool: ``True`` si la llamada puede realizarse.
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class TokenBucket:
+    """
+    Limitador de tasa de tipo token bucket, seguro entre hilos.
+
+    El cubo se rellena a ``rate`` tokens por segundo hasta ``capacity``; cada
+    llamada consume un token y espera si no queda ninguno. Permite ajustar las
+    tareas en segundo plano a las llamadas por minuto del plan de polygon.io.
+
+    Args:
+        rate (float): Tokens añadidos por segundo.
+        capacity (int): Tokens máximos acumulables (ráfaga permitida).
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def per_minute(cls, calls):
+        return cls(rate=calls / 60, capacity=max(1, calls))
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def acquire(self):
+        """
+        Consume un token, esperando a que haya uno disponible.
+
+        Returns:
+            float: Segundos esperados.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+def upstream_setting(name):
+    """
+    Retorna un parámetro de ``settings.UPSTREAM``, con su valor por defecto.
+    """
+    return getattr(settings, 'UPSTREAM', {}).get(name, DEFAULT_SETTINGS[name])
+
+
+def get_breaker():
+    """
+    Returns:
+        CircuitBreaker: El circuit breaker compartido del proceso.
+    """
+    global _breaker
+    if _breaker is None:
+        _breaker = CircuitBreaker(
+            upstream_setting('BREAKER_FAILURE_THRESHOLD'), upstream_setting('BREAKER_RESET_TIMEOUT')
+        )
+    return _breaker
+
+
+def api_url(path):
+    """
+    Construye la URL absoluta de un recurso de la API a partir de ``settings.POLYGON_API_URL``.
+
+    Args:
+        path (str): Ruta del recurso, empezando por ``/``.
+
+    Returns:
+        str: La URL absoluta.
+    """
+    return f"{settings.POLYGON_API_URL.rstrip('/')}{path}"
+
+
+def api_key():
+    """
+    Returns:
+        str: La clave de la API definida en la variable de entorno ``ALPHAVANTAGE_KEY``.
+    """
+    return os.getenv('ALPHAVANTAGE_KEY', '')
+
+
+def error_message(response):
+    """
+    Construye el mensaje de error a partir de una respuesta fallida de la API.
+
+    Args:
+        response: Respuesta HTTP (``requests`` o ``httpx``) con el error.
+
+    Returns:
+        str: El mensaje en formato ``status: message``.
+    """
+    try:
+        error_response = response.json()
+        return f"{error_response['status']}: {error_response['message']}"
+    except (ValueError, KeyError, TypeError):
+        reason = getattr(response, 'reason', None) or getattr(response, 'reason_phrase', '')
+        return f"{response.status_code}: {reason}"
+
+
+def endpoint_name(path):
+    """
+    Retorna la etiqueta de métricas del recurso de ``path``, sin el símbolo ni las fechas.
+    """
+    if path.startswith('/v2/aggs/'):
+        return 'aggregates'
+    if path.startswith('/v3/reference/tickers/'):
+        return 'ticker'
+    if path.startswith('/v2/snapshot/'):
+        return 'snapshot'
+    return 'other'
+
+
+def backoff_delay(attempt, response=None):
+    """
+    Calcula la espera antes del reintento ``attempt`` (backoff exponencial con jitter completo).
+
+    Si la respuesta incluye ``Retry-After`` se respeta, acotada a ``BACKOFF_MAX``.
+    """
+    backoff_max = upstream_setting('BACKOFF_MAX')
+    retry_after = response.headers.get('Retry-After') if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), backoff_max)
+    return random.uniform(0, min(backoff_max, upstream_setting('BACKOFF_BASE') * 2 ** attempt))
+
+
+def get_session():
+    """
+    Retorna la sesión HTTP del proceso, creándola en el primer uso.
+
+    La sesión se recrea si el proceso cambió (p. ej. tras un fork de gunicorn),
+    para no compartir sockets entre procesos.
+
+    Returns:
+        requests.Session: Sesión con pool de conexiones keep-alive.
+    """
+    global _session, _session_pid
+    with _session_lock:
+        if _session is None or _session_pid != os.getpid():
+            pool_maxsize = upstream_setting('POOL_MAXSIZE')
+            session = requests.Session()
+            session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize))
+            session.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize))
+            _session, _session_pid = session, os.getpid()
+        return _session
+
+
+def get_async_client():
+    """
+    Retorna el cliente asíncrono compartido del event loop actual, creándolo en el primer uso.
+
+    Returns:
+        httpx.AsyncClient: Cliente con pool de conexiones keep-alive.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        import httpx
+
+        max_connections = upstream_setting('ASYNC_MAX_CONNECTIONS')
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=httpx.Timeout(upstream_setting('READ_TIMEOUT'), connect=upstream_setting('CONNECT_TIMEOUT')),
+        )
+        _async_clients[loop] = client
+    return client
+
+
+def get_json(path, params=None):
+    """
+    Realiza un GET a la API con reintentos, timeouts y circuit breaker.
+
+    Args:
+        path (str): Ruta del recurso, empezando por ``/``.
+        params (dict, opcional): Parámetros de la consulta; se añade la clave de la API.
+
+    Returns:
+        dict: El cuerpo JSON de la respuesta.
+
+    Raises:
+        serializers.ValidationError: Si la API responde con un error 4xx.
+        UpstreamUnavailable: Si la API no está disponible o el circuito está abierto.
+    """
+    breaker = get_breaker()
+    if not breaker.allow_request():
+        raise UpstreamUnavailable()
+
+    params = {**(params or {}), 'apiKey': api_key()}
+    timeout = (upstream_setting('CONNECT_TIMEOUT'), upstream_setting('READ_TIMEOUT'))
+    max_retries = upstream_setting('MAX_RETRIES')
+
+    endpoint = endpoint_name(path)
+
+    for attempt in range(max_retries + 1):
+        response = None
+        started = time.perf_counter()
+        try:
+            response = get_session().get(api_url(path), params=params, timeout=timeout)
+        except requests.exceptions.RequestException:
+            metrics.observe_upstream(endpoint, 'error', time.perf_counter() - started)
+        else:
+            metrics.observe_upstream(endpoint, str(response.status_code), time.perf_counter() - started)
+            if response.status_code < 400:
+                breaker.record_success()
+                return response.json()
+            if response.status_code not in RETRY_STATUSES:
+                # Un 4xx es una respuesta válida del upstream: no cuenta como fallo
+                breaker.record_success()
+                raise serializers.ValidationError(error_message(response))
+
+        if attempt < max_retries:
+            time.sleep(backoff_delay(attempt, response))
+
+    breaker.record_failure()
+    raise UpstreamUnavailable(error_message(response) if response is not None else None)
+
+
+async def aget_json(path, params=None):
+    """
+    Versión asíncrona de ``get_json``, sobre el cliente asíncrono compartido.
+    """
+    import httpx
+
+    breaker = get_breaker()
+    if not breaker.allow_request():
+        raise UpstreamUnavailable()
+
+    params = {**(params or {}), 'apiKey': api_key()}
+    max_retries = upstream_setting('MAX_RETRIES')
+
+    endpoint = endpoint_name(path)
+
+    for attempt in range(max_retries + 1):
+        response = None
+        started = time.perf_counter()
+        try:
+            response = await get_async_client().get(api_url(path), params=params)
+        except httpx.HTTPError:
+            metrics.observe_upstream(endpoint, 'error', time.perf_counter() - started)
+        else:
+            metrics.observe_upstream(endpoint, str(response.status_code), time.perf_counter() - started)
+            if response.status_code < 400:
+                breaker.record_success()
+                return response.json()
+            if response.status_code not in RETRY_STATUSES:
+                breaker.record_success()
+                raise serializers.ValidationError(error_message(response))
+
+        if attempt < max_retries:
+            await asyncio.sleep(backoff_delay(attempt, response))
+
+    breaker.record_failure()
+    raise UpstreamUnavailable(error_message(response) if response is not None else None)
+
+
+def aggregates_path(symbol, start_date, end_date):
+    return f"/v2/aggs/ticker/{symbol}/range/1/day/{start_date}/{end_date}"
+
+
+AGGREGATES_PARAMS = {'sort': 'asc', 'limit': 50000}
+
+
+def fetch_aggregates(symbol, start_date, end_date):
+    """
+    Obtiene las barras diarias de un símbolo desde la API de polygon.io.
+
+    Args:
+        symbol (str): El símbolo de la empresa.
+        start_date (date): Fecha inicial (inclusive).
+        end_date (date): Fecha final (inclusive).
+
+    Returns:
+        list: Las barras en el formato de la API (``o, h, l, c, v, vw, t, n``).
+    """
+    data = get_json(aggregates_path(symbol, start_date, end_date), AGGREGATES_PARAMS)
+    return data['results'] if 'results' in data and data['results'] else []
+
+
+async def afetch_aggregates(symbol, start_date, end_date):
+    """
+    Versión asíncrona de ``fetch_aggregates``.
+    """
+    data = await aget_json(aggregates_path(symbol, start_date, end_date), AGGREGATES_PARAMS)
+    return data['results'] if 'results' in data and data['results'] else []
+
+
+def fetch_ticker(symbol):
+    """
+    Obtiene los datos de referencia de un símbolo (``/v3/reference/tickers``).
+
+    Args:
+        symbol (str): El símbolo de la empresa.
+
+    Returns:
+        dict: Los datos de la empresa, o ``None`` si la API no retorna resultados.
+    """
+    data = get_json(f"/v3/reference/tickers/{symbol}")
+    return data['results'] if 'results' in data and data['results'] else None
+
+
+def snapshot_path(symbol):
+    return f"/v2/snapshot/locale/us/markets/stocks/tickers/{symbol}"
+
+
+async def afetch_snapshot(symbol):
+    """
+    Obtiene la instantánea intradía de un símbolo (último precio y barra del día en curso).
+
+    Args:
+        symbol (str): El símbolo de la empresa.
+
+    Returns:
+        dict: La instantánea en el formato de la API (``lastTrade``, ``day``, ``updated``...),
+        o ``None`` si la API no retorna datos.
+    """
+    data = await aget_json(snapshot_path(symbol))
+    return data.get('ticker') or None
+
+
+@receiver(setting_changed)
+def _reset_upstream_clients(setting, **kwargs):
+    global _session, _breaker
+    if setting == 'UPSTREAM':
+        _session = None
+        _breaker = None
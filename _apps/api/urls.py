@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CompanyViewSet
+from .views import CompanyAsyncDetailView, CompanyLiveStreamView, CompanyViewSet
 
 # Se crea una instancia del enrutador por defecto de Django REST Framework
 router = DefaultRouter()
@@ -10,4 +10,8 @@ router.register(r'companies', CompanyViewSet)
 # Se incluyen las rutas generadas por el enrutador en las URLs del proyecto
 urlpatterns = [
     path('', include(router.urls)),
+    # Lectura detallada asíncrona, servida por ASGI (core/asgi.py)
+    path('async/companies/<uuid:pk>/', CompanyAsyncDetailView.as_view(), name='company-detail-async'),
+    # Precios en directo por server-sent events, servidos por ASGI
+    path('async/companies/symbol/<str:symbol>/stream/', CompanyLiveStreamView.as_view(), name='company-live-stream'),
 ]
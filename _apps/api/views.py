@@ -1,8 +1,40 @@
-from rest_framework import viewsets
+import hashlib
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers, quote_etag
+from django.utils.crypto import constant_time_compare
+from django.utils.http import http_date
+from django.views import View
+from rest_framework import serializers, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import APIException
+from rest_framework.generics import get_object_or_404
+from rest_framework.parsers import JSONParser
 from rest_framework.response import Response
 
+from . import metrics
+from .analytics import IndicatorMemo
+from .cache import get_access_counter, get_time_series_cache, seconds_until_next_bar
+from .idempotency import idempotent_response
+from .live import event_stream
 from .models import Company
-from .serializers import CompanyReadSerializer, CompanyWriteSerializer, CompanyReadFullSerializer
+from .pagination import KeysetCursorPagination
+from .routers import is_pinned, replica_reads
+from .parsers import NDJSONParser
+from .renderers import (
+    ColumnarJSONRenderer, CSVRenderer, NDJSONRenderer, PackedSeriesRenderer, csv_lines, ndjson_lines,
+)
+from .serializers import (
+    DUPLICATED_SYMBOL_MESSAGE, CompanyReadSerializer, CompanyWriteSerializer, CompanyReadFullSerializer,
+    AnalyticsBatchQuerySerializer, AnalyticsQuerySerializer, BulkDeleteSerializer, TimeSeriesBatchQuerySerializer,
+)
+from .timeseries import aload_time_serie, load_time_serie, load_time_series, serie_columns, time_serie_window
+
 
 class CompanyViewSet(viewsets.ModelViewSet):
     """
@@ -14,28 +46,249 @@ class CompanyViewSet(viewsets.ModelViewSet):
 
     Atributos:
         queryset (QuerySet): El conjunto de consultas que devuelve todas las instancias del modelo Company.
+        pagination_class: Paginación por cursor (keyset) para el listado.
+        ordering_fields (list): Columnas admitidas en ``?ordering=`` para el listado.
+        filter_fields (list): Columnas por las que se puede filtrar el listado por igualdad.
+        max_symbols (int): Número máximo de símbolos admitidos en ``?symbol__in=``.
+        max_search_length (int): Longitud máxima del texto de ``?q=``.
+        series_actions (tuple): Acciones que admiten ``?format=columnar|packed``.
+        replica_actions (tuple): Acciones cuyas lecturas se envían a una réplica (ver ``dispatch``).
     """
     queryset = Company.objects.all()
+    pagination_class = KeysetCursorPagination
+    ordering_fields = ['name', 'symbol', 'market_cap', 'list_date']
+    filter_fields = ['exchange', 'sic_code', 'currency']
+    max_symbols = 100
+    max_search_length = 100
+    series_actions = ('retrieve', 'by_symbol', 'time_series')
+    replica_actions = ('list', 'retrieve', 'export')
+
+    @classmethod
+    def as_view(cls, *args, **kwargs):
+        """
+        Excluye las vistas de ``ATOMIC_REQUESTS``: las escrituras validan el
+        símbolo contra el upstream y esa consulta lenta no debe hacerse con una
+        transacción abierta. Cada escritura abre su propia transacción tras la
+        validación (ver ``perform_create`` y ``perform_update``).
+        """
+        return transaction.non_atomic_requests(super().as_view(*args, **kwargs))
+
+    def dispatch(self, request, *args, **kwargs):
+        """
+        Ejecuta las acciones de ``replica_actions`` con las lecturas en una réplica
+        (ver ``_apps.api.routers``), salvo que el cliente haya escrito hace poco.
+        """
+        action = self.action_map.get(request.method.lower())
+        if action not in self.replica_actions or is_pinned(request):
+            return super().dispatch(request, *args, **kwargs)
+        with replica_reads():
+            return super().dispatch(request, *args, **kwargs)
+
+    def get_search_term(self):
+        """
+        Retorna el texto de búsqueda de ``?q=``, o una cadena vacía si no se indicó.
+        """
+        term = self.request.query_params.get('q', '') if self.request else ''
+        return term.strip()[:self.max_search_length]
+
+    @property
+    def default_ordering(self):
+        """
+        Ordenación del listado sin ``?ordering=``: por relevancia al buscar y por nombre en otro caso.
+        """
+        return '-rank' if self.action == 'list' and self.get_search_term() else 'name'
+
+    def get_requested_fields(self):
+        """
+        Retorna los campos solicitados con ``?fields=`` (sparse fieldsets).
+
+        Returns:
+            list: Los nombres de campo, o una lista vacía si no se indicaron.
+        """
+        fields = self.request.query_params.get('fields', '') if self.request else ''
+        return [name.strip() for name in fields.split(',') if name.strip()]
+
+    def get_renderers(self):
+        """
+        Añade los formatos por columnas (``columnar`` y ``packed``) a las acciones que retornan series temporales.
+        """
+        renderers = super().get_renderers()
+        if self.action in self.series_actions:
+            renderers += [ColumnarJSONRenderer(), PackedSeriesRenderer()]
+        return renderers
+
+    def is_columnar(self):
+        """
+        Indica si la respuesta debe representar las series por columnas, según el renderer negociado.
+        """
+        return getattr(getattr(self.request, 'accepted_renderer', None), 'columnar', False)
+
+    def get_serializer_context(self):
+        """
+        Añade al contexto los campos solicitados y el formato de las series, para los serializadores de lectura.
+        """
+        context = super().get_serializer_context()
+        if self.request and self.request.method == 'GET':
+            context['fields'] = self.get_requested_fields()
+            context['columnar'] = self.is_columnar()
+        return context
+
+    def get_queryset(self):
+        """
+        Retorna el queryset de la acción, proyectando solo las columnas necesarias en el listado.
+
+        Con ``?fields=`` el listado carga únicamente las columnas pedidas (más
+        ``id`` y las de ordenación, que necesita la paginación, y ``updated_at``,
+        que necesita el ``ETag``).
+        Con ``?symbol__in=AAPL,MSFT`` se filtra por varios símbolos en una
+        sola consulta sobre el índice del símbolo, con ``?exchange=``,
+        ``?sic_code=`` y ``?currency=`` por las columnas de mercado, y con
+        ``?q=`` se buscan empresas por símbolo, nombre y descripción, anotando
+        su relevancia en ``rank`` (ver ``CompanyQuerySet.search``).
+
+        El detalle lee los datos de referencia en bruto (``alpha_vantage``) con
+        un ``JOIN`` solo si se van a serializar.
+
+        Returns:
+            QuerySet: El conjunto de consultas de la acción.
+        """
+        queryset = super().get_queryset()
+        if self.action in ('retrieve', 'by_symbol'):
+            requested = self.get_requested_fields()
+            return queryset.select_related('reference') if not requested or 'alpha_vantage' in requested else queryset
+        if self.action != 'list':
+            return queryset
+
+        symbols = [symbol.strip() for symbol in self.request.query_params.get('symbol__in', '').split(',')]
+        symbols = [symbol for symbol in symbols if symbol]
+        if symbols:
+            queryset = queryset.by_symbols(symbols[:self.max_symbols])
+        for name in self.filter_fields:
+            value = self.request.query_params.get(name, '').strip()
+            if value:
+                queryset = queryset.filter(**{name: value.upper()})
+        term = self.get_search_term()
+        if term:
+            queryset = queryset.search(term)
+
+        model_fields = {field.name for field in Company._meta.concrete_fields}
+        serializer_fields = set(self.get_serializer_class().Meta.fields)
+        requested = set(self.get_requested_fields()) & serializer_fields & model_fields
+        if requested:
+            return queryset.only('id', 'updated_at', *self.ordering_fields, *requested)
+        return queryset
 
     def get_serializer_class(self):
         """
         Retorna la clase de serializador adecuada según la operación HTTP y la acción.
 
+        - Para la acción 'bulk_delete': utiliza BulkDeleteSerializer.
         - Para métodos POST, PUT, PATCH: utiliza CompanyWriteSerializer.
-        - Para la acción 'retrieve': utiliza CompanyReadFullSerializer.
+        - Para las acciones 'retrieve' y 'by_symbol': utiliza CompanyReadFullSerializer.
         - Para los demás casos: utiliza CompanyReadSerializer.
 
         Returns:
             Serializer class: La clase de serializador correspondiente.
         """
+        if self.action == 'bulk_delete':
+            return BulkDeleteSerializer
+
         if self.request.method in ['POST', 'PUT', 'PATCH']:
             return CompanyWriteSerializer
 
-        if self.action == 'retrieve':
+        if self.action in ['retrieve', 'by_symbol']:
             return CompanyReadFullSerializer
         
         return CompanyReadSerializer
 
+    def get_etag(self, *parts):
+        """
+        Construye un ``ETag`` fuerte a partir de ``parts``, el formato de la respuesta y los campos solicitados.
+        """
+        parts = (self.request.accepted_renderer.format, self.get_requested_fields(), *parts)
+        return quote_etag(hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest())
+
+    def get_max_age(self):
+        """
+        Retorna el ``max-age`` de las respuestas de lectura.
+
+        Las series cambian como mucho una vez por barra diaria, de modo que
+        ``max-age`` nunca supera el próximo cierre de barra; el resto de los
+        datos se acota con ``settings.HTTP_CACHE_MAX_AGE``.
+        """
+        bar_close = get_time_series_cache().bar_close
+        return int(min(settings.HTTP_CACHE_MAX_AGE, seconds_until_next_bar(bar_close=bar_close)))
+
+    def conditional_response(self, etag, last_modified, render):
+        """
+        Responde ``304 Not Modified`` si el cliente ya tiene la representación actual.
+
+        Las precondiciones (``If-None-Match`` e ``If-Modified-Since``) se evalúan
+        antes de llamar a ``render``, de modo que un 304 no serializa nada ni
+        consulta el upstream.
+
+        Args:
+            etag (str): El ``ETag`` de la representación actual.
+            last_modified (datetime): Fecha de la última modificación, o ``None``.
+            render (callable): Función sin argumentos que construye la respuesta completa.
+
+        Returns:
+            Response: La respuesta 304 o la completa, con las cabeceras de caché.
+        """
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(self.request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = render()
+        response['ETag'] = etag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+        patch_cache_control(response, public=True, max_age=self.get_max_age())
+        patch_vary_headers(response, ['Accept'])
+        return response
+
+    def time_serie_validators(self, instance, fresh_only=False):
+        """
+        Retorna la versión y la fecha de carga de la serie en caché de la instancia.
+
+        Returns:
+            tuple: (versión, fecha de carga), ``('', None)`` si el cliente excluyó
+            ``time_serie`` con ``?fields=`` o ``None`` si la serie no está en caché.
+        """
+        fields = self.get_requested_fields()
+        if fields and 'time_serie' not in fields:
+            return '', None
+        start_date, end_date = time_serie_window()
+        validators = get_time_series_cache().validators(
+            instance.symbol, start_date.isoformat(), end_date.isoformat(), fresh_only=fresh_only
+        )
+        if validators is None:
+            return None
+        version, loaded_at = validators
+        return version, datetime.fromtimestamp(loaded_at, tz=timezone.utc)
+
+    def list(self, request, *args, **kwargs):
+        """
+        Maneja el listado paginado de empresas, con ``ETag``.
+
+        El ``ETag`` se calcula a partir de la URL y del ``(id, updated_at)`` de
+        las filas de la página, de modo que una petición condicional sin cambios
+        solo paga la consulta de la página. No se envía ``Last-Modified``: el
+        máximo ``updated_at`` de la página no cambia cuando se elimina una
+        empresa, y un ``If-Modified-Since`` respondería 304 con la fila ya
+        eliminada; el ``ETag`` sí cambia porque la fila desaparece de la página.
+
+        Args:
+            request (HttpRequest): El objeto de solicitud HTTP recibido.
+
+        Returns:
+            Response: La página serializada o una respuesta 304.
+        """
+        page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+        etag = self.get_etag(request.get_full_path(), [(company.pk, company.updated_at) for company in page])
+        return self.conditional_response(
+            etag, None, lambda: self.get_paginated_response(self.get_serializer(page, many=True).data),
+        )
+
     def retrieve(self, request, *args, **kwargs):
         """
         Maneja la operación de lectura detallada (retrieve) para una instancia de Company.
@@ -44,6 +297,12 @@ class CompanyViewSet(viewsets.ModelViewSet):
         para obtener una instancia específica del modelo Company y devolverla 
         serializada en la respuesta.
 
+        El ``ETag`` combina ``updated_at`` con la versión de la serie en caché.
+        Si la serie está fresca en caché, una petición con ``If-None-Match``
+        coincidente recibe un 304 sin serializar la instancia ni consultar el
+        upstream; en otro caso se responde completa y el ``ETag`` usa la
+        versión de la serie recién cargada.
+
         Args:
             request (HttpRequest): El objeto de solicitud HTTP recibido.
             *args: Argumentos adicionales.
@@ -53,5 +312,502 @@ class CompanyViewSet(viewsets.ModelViewSet):
             Response: La respuesta HTTP con los datos serializados de la instancia.
         """
         instance = self.get_object()
-        serializer = self.get_serializer(instance)
-        return Response(serializer.data)
+        return self.detail_response(instance)
+
+    def detail_response(self, instance):
+        """
+        Construye la respuesta de lectura detallada de ``instance`` con ``ETag`` y ``Last-Modified``.
+        """
+        # Los accesos priorizan la precarga de series (ver ``prewarm_time_series``)
+        get_access_counter().record(instance.symbol)
+
+        response = None
+        validators = self.time_serie_validators(instance, fresh_only=True)
+        if validators is None:
+            # Serie fría u obsoleta: se carga al serializar y se versiona después
+            response = Response(self.get_serializer(instance).data)
+            validators = self.time_serie_validators(instance) or ('', None)
+
+        version, loaded_at = validators
+        etag = self.get_etag(instance.pk, instance.updated_at, version)
+        last_modified = max(filter(None, [instance.updated_at, loaded_at]))
+        return self.conditional_response(
+            etag, last_modified,
+            lambda: response if response is not None else Response(self.get_serializer(instance).data),
+        )
+
+    @action(detail=False, methods=['get'], url_path=r'by-symbol/(?P<symbol>[^/.]+)')
+    def by_symbol(self, request, symbol=None):
+        """
+        Lectura detallada de una empresa a partir de su símbolo, sin distinguir mayúsculas.
+
+        La búsqueda es una única consulta sobre el índice único ``UPPER(symbol)``.
+
+        Args:
+            request (HttpRequest): El objeto de solicitud HTTP recibido.
+            symbol (str): El símbolo de la empresa.
+
+        Returns:
+            Response: La respuesta HTTP con los datos serializados de la instancia.
+        """
+        instance = get_object_or_404(self.get_queryset().by_symbol(symbol))
+        return self.detail_response(instance)
+
+    @action(detail=False, methods=['get'], url_path='time-series')
+    def time_series(self, request):
+        """
+        Retorna las series temporales de varias empresas en una sola petición.
+
+        Las empresas se indican con ``?ids=`` y/o ``?symbols=`` (separados por
+        comas) y el rango con ``?start=`` y ``?end=``. Las empresas se resuelven
+        con una sola consulta y las series se leen de la caché con una sola
+        lectura del backend; las que faltan se cargan juntas (ver
+        ``load_time_series``): una consulta al almacén y las llamadas a la API
+        en paralelo, acotadas por ``TIME_SERIES_BATCH['MAX_WORKERS']``.
+
+        Args:
+            request (HttpRequest): El objeto de solicitud HTTP recibido.
+
+        Returns:
+            Response: Una entrada por empresa con su ``time_serie`` (o ``error``
+            si el upstream falló para ella) y los identificadores no encontrados
+            en ``not_found``. Con ``?format=columnar|packed`` las series se
+            representan por columnas (ver ``serie_columns``).
+        """
+        query = TimeSeriesBatchQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        encode = serie_columns if self.is_columnar() else (lambda serie: serie)
+        return self.batch_response(
+            query.validated_data,
+            lambda series: {symbol: {'time_serie': encode(serie)} for symbol, serie in series.items()},
+        )
+
+    @action(detail=False, methods=['get'], url_path='analytics')
+    def analytics_batch(self, request):
+        """
+        Retorna los indicadores de varias empresas en una sola petición.
+
+        Acepta los parámetros de ``time_series`` más ``?indicators=`` y
+        ``?window=``. Las series se obtienen como en ``time_series`` y los
+        indicadores se leen de la memoria de resultados con una sola lectura del
+        backend; solo se calculan los que faltan (ver ``_apps.api.analytics``).
+
+        Args:
+            request (HttpRequest): El objeto de solicitud HTTP recibido.
+
+        Returns:
+            Response: Una entrada por empresa con sus ``analytics`` (o ``error``)
+            y los identificadores no encontrados en ``not_found``.
+        """
+        query = AnalyticsBatchQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        start, end = params['start'].isoformat(), params['end'].isoformat()
+        memo = IndicatorMemo(get_time_series_cache(), params['indicators'], params['window'])
+
+        def render(series):
+            values = memo.get_many(series, start, end)
+            for symbol, serie in series.items():
+                if symbol not in values:
+                    values[symbol] = memo.compute(symbol, start, end, serie)
+            return {symbol: {'analytics': value} for symbol, value in values.items()}
+
+        return self.batch_response(params, render)
+
+    @action(detail=True, methods=['get'])
+    def analytics(self, request, pk=None):
+        """
+        Retorna los indicadores derivados de la serie diaria de una empresa.
+
+        Los parámetros son ``?start=``, ``?end=``, ``?indicators=`` y ``?window=``
+        (ver ``AnalyticsQuerySerializer``). Los indicadores se memorizan por
+        versión de la serie, de modo que solo se recalculan cuando la serie
+        cambia.
+
+        Args:
+            request (HttpRequest): El objeto de solicitud HTTP recibido.
+            pk (str): El identificador de la empresa.
+
+        Returns:
+            Response: El rango, el símbolo y los indicadores calculados.
+        """
+        query = AnalyticsQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        start_date, end_date = params['start'], params['end']
+        start, end = start_date.isoformat(), end_date.isoformat()
+        company = get_object_or_404(Company.objects.only('id', 'symbol'), pk=pk)
+
+        get_access_counter().record(company.symbol)
+        cache = get_time_series_cache()
+        serie = cache.get_or_load(
+            company.symbol, start, end, lambda: load_time_serie(company, start_date, end_date)
+        )
+        memo = IndicatorMemo(cache, params['indicators'], params['window'])
+        value = memo.get_many([company.symbol], start, end).get(company.symbol)
+        if value is None:
+            value = memo.compute(company.symbol, start, end, serie)
+        return Response({'start': start, 'end': end, 'id': str(company.pk), 'symbol': company.symbol, 'analytics': value})
+
+    def batch_response(self, params, render):
+        """
+        Construye la respuesta de una consulta por lotes sobre las series de varias empresas.
+
+        Las empresas se resuelven con una sola consulta y las series se leen de
+        la caché con una sola lectura del backend; las que faltan se cargan
+        juntas (ver ``load_time_series``): una consulta al almacén y las
+        llamadas a la API en paralelo, acotadas por ``TIME_SERIES_BATCH['MAX_WORKERS']``.
+
+        Args:
+            params (dict): ``ids``, ``symbols``, ``start`` y ``end`` validados.
+            render (callable): Función que recibe las series cargadas, indexadas por
+                símbolo, y retorna los campos de la entrada de cada símbolo.
+
+        Returns:
+            Response: Una entrada por empresa (con ``error`` si el upstream falló
+            para ella) y los identificadores no encontrados en ``not_found``.
+        """
+        ids, symbols = params['ids'], params['symbols']
+        start_date, end_date = params['start'], params['end']
+        start, end = start_date.isoformat(), end_date.isoformat()
+
+        companies = list(
+            (Company.objects.filter(pk__in=ids) | Company.objects.by_symbols(symbols))
+            .only('id', 'symbol').order_by('symbol')
+        )
+        by_symbol = {company.symbol: company for company in companies}
+
+        counter = get_access_counter()
+        for symbol in by_symbol:
+            counter.record(symbol)
+        cache = get_time_series_cache()
+        series = cache.get_many(
+            by_symbol, start, end,
+            loader_for=lambda symbol: lambda: load_time_serie(by_symbol[symbol], start_date, end_date),
+        )
+        errors = {}
+        missing = [company for company in companies if company.symbol not in series]
+        if missing:
+            loaded, errors = load_time_series(
+                missing, start_date, end_date, settings.TIME_SERIES_BATCH['MAX_WORKERS']
+            )
+            for company in missing:
+                if company.pk in loaded:
+                    cache.set(company.symbol, start, end, loaded[company.pk])
+                    series[company.symbol] = loaded[company.pk]
+            if len(errors) == len(companies):
+                raise next(iter(errors.values()))
+
+        rendered = render(series)
+        results = []
+        for company in companies:
+            result = {'id': str(company.pk), 'symbol': company.symbol}
+            if company.pk in errors:
+                result['error'] = errors[company.pk].detail
+            else:
+                result.update(rendered[company.symbol])
+            results.append(result)
+
+        found_symbols = {symbol.upper() for symbol in by_symbol}
+        found_ids = {company.pk for company in companies}
+        not_found = [str(pk) for pk in ids if pk not in found_ids]
+        not_found += [symbol for symbol in symbols if symbol not in found_symbols]
+        return Response({'start': start, 'end': end, 'results': results, 'not_found': not_found})
+
+    def create(self, request, *args, **kwargs):
+        """
+        Crea una empresa. Con ``Idempotency-Key`` los reintentos retornan la
+        respuesta original sin consultar el upstream (ver ``_apps.api.idempotency``).
+        """
+        create = super().create
+        return idempotent_response(request, lambda: create(request, *args, **kwargs))
+
+    def update(self, request, *args, **kwargs):
+        """
+        Actualiza una empresa (``PUT`` y ``PATCH``), con ``Idempotency-Key`` como en ``create``.
+        """
+        update = super().update
+        return idempotent_response(request, lambda: update(request, *args, **kwargs))
+
+    def perform_create(self, serializer):
+        """
+        Guarda la empresa ya validada. La consulta al upstream se hizo en la
+        validación, de modo que la transacción solo cubre las escrituras.
+
+        Raises:
+            serializers.ValidationError: Si otra petición registró el símbolo mientras se validaba.
+        """
+        try:
+            with transaction.atomic():
+                serializer.save()
+        except IntegrityError:
+            raise serializers.ValidationError({'symbol': [DUPLICATED_SYMBOL_MESSAGE]})
+
+    def perform_update(self, serializer):
+        self.perform_create(serializer)
+
+    def perform_destroy(self, instance):
+        """
+        Elimina la empresa de forma lógica, con un solo ``UPDATE`` cuyo coste no
+        depende de sus barras almacenadas. Los datos se borran después, por
+        lotes, con el comando ``purge_deleted_companies``.
+        """
+        Company.objects.filter(pk=instance.pk).soft_delete()
+
+    @action(detail=False, methods=['post'], url_path='bulk-delete')
+    def bulk_delete(self, request):
+        """
+        Elimina varias empresas en una sola petición.
+
+        Acepta ``{"ids": [...]}`` con hasta ``SOFT_DELETE['MAX_IDS']``
+        identificadores. Las empresas se eliminan de forma lógica, como en
+        ``destroy``, con una consulta para localizarlas y un único ``UPDATE``.
+
+        Args:
+            request (HttpRequest): El objeto de solicitud HTTP recibido.
+
+        Returns:
+            Response: El número de empresas eliminadas en ``deleted`` y los
+            identificadores no encontrados (o ya eliminados) en ``not_found``.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+
+        with transaction.atomic():
+            found = set(Company.objects.select_for_update().filter(pk__in=ids).values_list('pk', flat=True))
+            deleted = Company.objects.filter(pk__in=found).soft_delete() if found else 0
+        return Response({'deleted': deleted, 'not_found': [str(pk) for pk in ids if pk not in found]})
+
+    @action(detail=False, methods=['post'], url_path='bulk', parser_classes=[JSONParser, NDJSONParser])
+    def bulk_create(self, request):
+        """
+        Crea varias empresas en una sola petición.
+
+        Acepta un array JSON o un cuerpo NDJSON (``application/x-ndjson``) con
+        objetos como los de la creación individual. Los símbolos repetidos en la
+        petición o ya registrados se descartan, los símbolos únicos se validan contra la API en
+        paralelo (pool de hilos acotado por ``BULK_IMPORT['MAX_WORKERS']``) y las
+        filas válidas se insertan con un único ``bulk_create`` en una transacción.
+
+        Args:
+            request (HttpRequest): El objeto de solicitud HTTP recibido.
+
+        Returns:
+            Response: Un informe por fila (``created`` con su ``id`` o ``error`` con
+            sus ``errors``). 201 si todas las filas se crearon, 207 si solo algunas
+            y 400 si ninguna.
+        """
+        rows = request.data
+        if not isinstance(rows, list):
+            return Response({'detail': 'Se esperaba una lista de empresas.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > settings.BULK_IMPORT['MAX_ROWS']:
+            return Response(
+                {'detail': f"Se admiten como máximo {settings.BULK_IMPORT['MAX_ROWS']} empresas por petición."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Descarta los símbolos repetidos dentro de la misma petición
+        results = [None] * len(rows)
+        symbols = {}
+        symbol_errors = CompanyWriteSerializer().fields['symbol'].error_messages
+        for index, row in enumerate(rows):
+            if not isinstance(row, dict):
+                # El serializador informa de las filas que no son objetos
+                continue
+            symbol = row.get('symbol')
+            if not isinstance(symbol, str):
+                # Sin un símbolo de texto la fila no se puede deduplicar ni precargar
+                error = 'required' if 'symbol' not in row else 'null' if symbol is None else 'invalid'
+                results[index] = {'index': index, 'symbol': symbol, 'status': 'error',
+                                  'errors': {'symbol': [symbol_errors[error]]}}
+            elif symbol.upper() in symbols:
+                results[index] = {'index': index, 'symbol': symbol, 'status': 'error',
+                                  'errors': {'symbol': ['Símbolo duplicado en la solicitud.']}}
+            else:
+                symbols[symbol.upper()] = index
+
+        # Los símbolos ya registrados se resuelven con una sola consulta
+        existing = set(Company.objects.by_symbols(symbols).values_list('symbol', flat=True))
+        for symbol in existing:
+            index = symbols.pop(symbol.upper())
+            results[index] = {'index': index, 'symbol': rows[index]['symbol'], 'status': 'error',
+                              'errors': {'symbol': [DUPLICATED_SYMBOL_MESSAGE]}}
+
+        max_length = Company._meta.get_field('symbol').max_length
+        reference_data = CompanyWriteSerializer.fetch_reference_data(
+            [symbol for symbol in symbols if 0 < len(symbol) <= max_length],
+            settings.BULK_IMPORT['MAX_WORKERS'],
+        )
+
+        context = {**self.get_serializer_context(), 'reference_data': reference_data}
+        companies = []
+        for index, row in enumerate(rows):
+            if results[index] is not None:
+                continue
+            serializer = CompanyWriteSerializer(data=row, context=context)
+            if serializer.is_valid():
+                companies.append((index, Company(alpha_vantage=serializer.company_data, **serializer.validated_data)))
+            else:
+                symbol = row.get('symbol') if isinstance(row, dict) else None
+                results[index] = {'index': index, 'symbol': symbol, 'status': 'error', 'errors': serializer.errors}
+
+        try:
+            with transaction.atomic():
+                Company.objects.bulk_create([company for _, company in companies])
+                Company.save_references([company for _, company in companies])
+        except IntegrityError:
+            # Otra petición registró alguno de los símbolos mientras se validaban
+            return Response({'detail': DUPLICATED_SYMBOL_MESSAGE}, status=status.HTTP_409_CONFLICT)
+        for index, company in companies:
+            results[index] = {'index': index, 'symbol': company.symbol, 'status': 'created', 'id': str(company.id)}
+
+        created = len(companies)
+        if created == len(rows):
+            response_status = status.HTTP_201_CREATED
+        elif created:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response(
+            {'created': created, 'failed': len(rows) - created, 'results': results},
+            status=response_status,
+        )
+
+    @action(detail=False, methods=['get'], url_path='export', renderer_classes=[NDJSONRenderer, CSVRenderer])
+    def export(self, request):
+        """
+        Exporta todas las empresas en streaming, en NDJSON (por defecto) o CSV.
+
+        El formato se elige con ``?format=ndjson|csv`` o con la cabecera ``Accept``.
+        Las filas se leen con un cursor del servidor (``iterator(chunk_size=...)``)
+        y se escriben a medida que llegan, de modo que la memoria del proceso no
+        depende del número de filas. El JSON ``alpha_vantage`` solo se incluye con
+        ``?include_alpha_vantage=true``.
+
+        Args:
+            request (HttpRequest): El objeto de solicitud HTTP recibido.
+
+        Returns:
+            StreamingHttpResponse: La respuesta con las filas exportadas.
+        """
+        columns = ['id', 'name', 'description', 'symbol']
+        expressions = {}
+        if request.query_params.get('include_alpha_vantage', '').lower() in ('1', 'true', 'yes'):
+            # Los datos en bruto viven en ``CompanyReference``: se leen con un ``LEFT JOIN``
+            expressions['alpha_vantage'] = F('reference__data')
+
+        # Las filas se leen al enviar la respuesta, fuera de ``dispatch``: la base de datos se fija ahora
+        queryset = self.get_queryset()
+        rows = queryset.using(queryset.db).order_by('pk').values(*columns, **expressions).iterator(
+            chunk_size=settings.EXPORT_CHUNK_SIZE
+        )
+        renderer = request.accepted_renderer
+        lines = csv_lines([*columns, *expressions], rows) if renderer.format == 'csv' else ndjson_lines(rows)
+
+        response = StreamingHttpResponse(lines, content_type=f'{renderer.media_type}; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="companies.{renderer.format}"'
+        return response
+
+
+class CompanyAsyncDetailView(View):
+    """
+    Vista asíncrona de lectura detallada de una empresa, pensada para servirse con ASGI.
+
+    Retorna la misma representación que ``CompanyViewSet.retrieve`` pero sin
+    ocupar un hilo mientras espera al upstream: la búsqueda en base de datos
+    usa el ORM asíncrono y la serie temporal se obtiene con el cliente HTTP
+    asíncrono compartido (ver ``_apps.api.upstream``). Con ``?format=columnar``
+    la serie se representa por columnas, como en la vista síncrona.
+    """
+
+    async def get(self, request, pk):
+        """
+        Maneja la operación de lectura detallada de una instancia de Company.
+
+        Args:
+            request (HttpRequest): El objeto de solicitud HTTP recibido.
+            pk (UUID): El identificador de la empresa.
+
+        Returns:
+            JsonResponse: La respuesta HTTP con los datos serializados de la instancia.
+        """
+        try:
+            company = await Company.objects.select_related('reference').aget(pk=pk)
+        except Company.DoesNotExist:
+            return JsonResponse({'detail': 'Not found.'}, status=404)
+
+        start_date, end_date = time_serie_window()
+        await get_access_counter().arecord(company.symbol)
+        cache = get_time_series_cache()
+        try:
+            time_serie = await cache.aget_or_load(
+                company.symbol, start_date.isoformat(), end_date.isoformat(),
+                lambda: aload_time_serie(company, start_date, end_date),
+            )
+        except APIException as e:
+            # Mismo formato que el manejador de excepciones de DRF
+            data = e.detail if isinstance(e.detail, (list, dict)) else {'detail': e.detail}
+            return JsonResponse(data, status=e.status_code, safe=False)
+
+        context = {'time_serie': time_serie, 'columnar': request.GET.get('format') == ColumnarJSONRenderer.format}
+        serializer = CompanyReadFullSerializer(company, context=context)
+        return JsonResponse(serializer.data)
+
+
+class CompanyLiveStreamView(View):
+    """
+    Vista asíncrona que emite los precios en directo de una empresa como server-sent events.
+
+    Todas las conexiones a un mismo símbolo comparten un único poller del
+    upstream (ver ``_apps.api.live``). Los eventos ``price`` llevan la
+    instantánea intradía de polygon.io y los eventos ``error`` los fallos del
+    upstream; sin eventos se envía periódicamente un comentario para mantener
+    viva la conexión. Debe servirse con ASGI: con WSGI cada cliente ocuparía
+    un hilo.
+    """
+
+    async def get(self, request, symbol):
+        """
+        Abre el flujo de eventos de la empresa con el símbolo ``symbol``.
+
+        Args:
+            request (HttpRequest): El objeto de solicitud HTTP recibido.
+            symbol (str): El símbolo de la empresa, sin distinguir mayúsculas.
+
+        Returns:
+            StreamingHttpResponse: El flujo ``text/event-stream``, 404 si la empresa
+            no existe o 501 si la aplicación no se sirve con ASGI.
+        """
+        if not isinstance(request, ASGIRequest):
+            return JsonResponse(
+                {'detail': 'El flujo en directo requiere un servidor ASGI (GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker).'},
+                status=501,
+            )
+        if not await Company.objects.by_symbol(symbol).aexists():
+            return JsonResponse({'detail': 'Not found.'}, status=404)
+
+        response = StreamingHttpResponse(event_stream(symbol), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Evita que nginx acumule los eventos en su búfer
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
+def metrics_view(request):
+    """
+    Expone las métricas en formato de texto de Prometheus (ver ``_apps.api.metrics``).
+
+    Exige ``Authorization: Bearer <METRICS_TOKEN>``; sin ``METRICS_TOKEN``
+    configurado solo responde con ``DEBUG``, de modo que en producción las
+    métricas nunca quedan abiertas.
+    """
+    token = settings.METRICS_TOKEN
+    if not token and not settings.DEBUG:
+        return HttpResponse('METRICS_TOKEN no configurado.', status=403, content_type='text/plain')
+    if token and not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        response = HttpResponse('Token de métricas inválido.', status=401, content_type='text/plain')
+        response['WWW-Authenticate'] = 'Bearer'
+        return response
+    text = metrics.render(settings.METRICS_MULTIPROCESS_DIR or None)
+    return HttpResponse(text, content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,74 @@
+"""
+Benchmark de la lectura detallada: WSGI síncrono frente a ASGI asíncrono.
+
+Arranca un polygon.io falso con latencia inyectada, levanta la aplicación con
+gunicorn (WSGI, workers síncronos) y con uvicorn (ASGI) apuntando a él, y lanza
+la misma carga concurrente contra:
+
+- ``GET /api/companies/{id}/`` servido por WSGI.
+- ``GET /api/async/companies/{id}/`` servido por ASGI.
+
+Cada petición usa una empresa distinta recién creada, de modo que todas pagan
+la llamada al upstream (caché y almacén de barras fríos).
+
+Uso (con la base de datos configurada en el entorno, como en ``.env``):
+    python benchmarks/async_retrieve.py --requests 400 --concurrency 100 --latency 0.25
+"""
+import argparse
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from benchmarks.common import (  # noqa: E402
+    cleanup_companies, run_load, seed_companies, setup_django, start_server,
+)
+from benchmarks.fake_upstream import start_fake_upstream  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.25, help='Latencia del upstream falso en segundos.')
+    parser.add_argument('--wsgi-workers', type=int, default=4)
+    parser.add_argument('--wsgi-port', type=int, default=8101)
+    parser.add_argument('--asgi-port', type=int, default=8102)
+    args = parser.parse_args()
+
+    setup_django()
+    upstream = start_fake_upstream(latency=args.latency)
+    env = {**os.environ, 'POLYGON_API_URL': f'http://127.0.0.1:{upstream.server_port}'}
+
+    cleanup_companies()
+    wsgi_ids = seed_companies(args.requests, 'W')
+    asgi_ids = seed_companies(args.requests, 'A')
+
+    servers = {
+        'wsgi': (['gunicorn', 'core.wsgi:application', '--workers', str(args.wsgi_workers),
+                  '--bind', f'127.0.0.1:{args.wsgi_port}'], args.wsgi_port,
+                 [f'http://localhost:{args.wsgi_port}/api/companies/{pk}/' for pk in wsgi_ids]),
+        'asgi': (['uvicorn', 'core.asgi:application', '--port', str(args.asgi_port), '--log-level', 'warning'],
+                 args.asgi_port,
+                 [f'http://localhost:{args.asgi_port}/api/async/companies/{pk}/' for pk in asgi_ids]),
+    }
+
+    try:
+        for name, (command, port, urls) in servers.items():
+            process = start_server(command, port, env, BASE_DIR)
+            try:
+                result = asyncio.run(run_load(urls, args.concurrency))
+            finally:
+                process.terminate()
+                process.wait()
+            print(f'{name}: {result}')
+    finally:
+        cleanup_companies()
+        upstream.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Utilidades compartidas por los scripts de benchmark.
+"""
+import asyncio
+import os
+import statistics
+import string
+import subprocess
+import time
+
+import httpx
+
+SEED_DESCRIPTION = 'benchmark-seed'
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+    os.environ.setdefault('DJANGO_CONFIGURATION', 'Dev')
+    import configurations
+    configurations.setup()
+
+
+def make_symbol(prefix, index):
+    """
+    Retorna el símbolo número ``index`` de la serie ``prefix`` (una letra seguida de cuatro).
+    """
+    letters = string.ascii_uppercase
+    suffix = ''.join(letters[(index // 26 ** power) % 26] for power in range(3, -1, -1))
+    return f'{prefix}{suffix}'[:5]
+
+
+def seed_companies(count, prefix, batch_size=5000):
+    """
+    Crea ``count`` empresas con símbolos únicos (``prefix`` más cuatro letras) y sin barras almacenadas.
+
+    Returns:
+        list: Los identificadores de las empresas creadas.
+    """
+    from _apps.api.models import Company
+
+    companies = []
+    for index in range(count):
+        symbol = make_symbol(prefix, index)
+        companies.append(Company(name=f'Bench {symbol}', description=SEED_DESCRIPTION, symbol=symbol))
+    Company.objects.bulk_create(companies, batch_size=batch_size)
+    return [str(company.id) for company in companies]
+
+
+def cleanup_companies():
+    from _apps.api.models import Company
+    Company.objects.filter(description=SEED_DESCRIPTION).delete()
+
+
+def summarize(latencies, elapsed, errors=0):
+    """
+    Resume las latencias (en segundos) de una tanda de peticiones.
+
+    Returns:
+        dict: Peticiones, errores, peticiones por segundo y percentiles 50, 95 y 99 en milisegundos.
+    """
+    quantiles = statistics.quantiles(latencies, n=100, method='inclusive') if len(latencies) > 1 else latencies * 99
+    return {
+        'requests': len(latencies), 'errors': errors, 'seconds': round(elapsed, 3),
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else None,
+        'p50_ms': round(quantiles[49] * 1000, 2), 'p95_ms': round(quantiles[94] * 1000, 2),
+        'p99_ms': round(quantiles[98] * 1000, 2),
+    }
+
+
+def start_server(command, port, env, cwd, headers=None):
+    """
+    Arranca un servidor de la aplicación y espera a que responda en ``port``.
+
+    Returns:
+        subprocess.Popen: El proceso del servidor.
+    """
+    process = subprocess.Popen(command, cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f'http://localhost:{port}/api/companies/', headers=headers, timeout=1)
+            return process
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f'El servidor {" ".join(command)} no arrancó a tiempo.')
+
+
+async def run_load(urls, concurrency, headers=None):
+    """
+    Lanza todas las URLs con como máximo ``concurrency`` peticiones en vuelo.
+
+    Returns:
+        dict: Peticiones por segundo, latencias y número de errores.
+    """
+    latencies, errors = [], 0
+    queue = asyncio.Queue()
+    for url in urls:
+        queue.put_nowait(url)
+
+    async def worker(client):
+        nonlocal errors
+        while not queue.empty():
+            url = queue.get_nowait()
+            started = time.perf_counter()
+            try:
+                response = await client.get(url)
+                if response.status_code != 200:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=120, headers=headers) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return summarize(latencies, elapsed, errors)
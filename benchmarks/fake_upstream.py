@@ -0,0 +1,147 @@
+"""
+Servidor local que imita los endpoints de polygon.io usados por la API.
+
+Permite inyectar latencia y una tasa de errores para medir el comportamiento
+de la aplicación sin depender de la red ni de los límites del plan.
+
+Uso:
+    python benchmarks/fake_upstream.py --port 9100 --latency 0.2 --error-rate 0.0
+
+y arrancar la aplicación con ``POLYGON_API_URL=http://127.0.0.1:9100``.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+AGGS_PATH = re.compile(r'^/v2/aggs/ticker/(?P<symbol>[^/]+)/range/1/day/(?P<start>[\d-]+)/(?P<end>[\d-]+)$')
+TICKER_PATH = re.compile(r'^/v3/reference/tickers/(?P<symbol>[^/]+)$')
+SNAPSHOT_PATH = re.compile(r'^/v2/snapshot/locale/us/markets/stocks/tickers/(?P<symbol>[^/]+)$')
+
+
+def daily_bars(symbol, start_date, end_date):
+    """
+    Genera barras diarias deterministas (por símbolo y fecha) para los días hábiles del rango.
+    """
+    results, day = [], start_date
+    while day <= end_date:
+        if day.weekday() < 5:
+            seed = random.Random(f'{symbol}:{day}')
+            close = round(50 + seed.random() * 100, 2)
+            t = int(datetime(day.year, day.month, day.day, 4, tzinfo=timezone.utc).timestamp() * 1000)
+            results.append({
+                'v': float(seed.randint(10_000, 1_000_000)), 'vw': close, 'o': close, 'c': close,
+                'h': round(close * 1.01, 2), 'l': round(close * 0.99, 2), 't': t, 'n': seed.randint(100, 5000),
+            })
+        day += timedelta(days=1)
+    return results
+
+
+def ticker_details(symbol):
+    """
+    Genera los datos de referencia de un símbolo con la forma de ``/v3/reference/tickers``.
+    """
+    seed = random.Random(symbol)
+    return {
+        'ticker': symbol, 'name': f'{symbol} Inc.', 'market': 'stocks', 'locale': 'us',
+        'primary_exchange': seed.choice(['XNYS', 'XNAS']), 'type': 'CS', 'active': True,
+        'currency_name': 'usd', 'market_cap': seed.randint(10**8, 10**12), 'sic_code': '3571',
+        'list_date': '1990-01-02', 'share_class_shares_outstanding': seed.randint(10**6, 10**10),
+    }
+
+
+def ticker_snapshot(symbol, now=None):
+    """
+    Genera la instantánea intradía de un símbolo con la forma de ``/v2/snapshot``; el precio cambia cada segundo.
+    """
+    now = time.time() if now is None else now
+    seed = random.Random(f'{symbol}:{int(now)}')
+    price = round(50 + seed.random() * 100, 2)
+    updated = int(now) * 10**9
+    return {
+        'ticker': symbol, 'todaysChange': round(seed.uniform(-2, 2), 2), 'updated': updated,
+        'lastTrade': {'p': price, 's': seed.randint(1, 500), 't': updated},
+        'day': {'o': price, 'h': round(price * 1.01, 2), 'l': round(price * 0.99, 2), 'c': price,
+                'v': float(seed.randint(10_000, 1_000_000)), 'vw': price},
+    }
+
+
+class FakeUpstreamHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        with server.stats_lock:
+            server.requests += 1
+        if server.latency:
+            time.sleep(server.latency)
+        if server.error_rate and random.random() < server.error_rate:
+            return self.send_json(429, {'status': 'ERROR', 'message': 'You have exceeded the maximum requests per minute.'})
+
+        path = self.path.split('?', 1)[0]
+        match = AGGS_PATH.match(path)
+        if match:
+            results = daily_bars(match['symbol'], date.fromisoformat(match['start']), date.fromisoformat(match['end']))
+            return self.send_json(200, {'ticker': match['symbol'], 'status': 'OK', 'resultsCount': len(results),
+                                        'results': results})
+        match = TICKER_PATH.match(path)
+        if match:
+            if match['symbol'].startswith('INV'):
+                return self.send_json(404, {'status': 'NOT_FOUND', 'message': 'Ticker not found.'})
+            return self.send_json(200, {'status': 'OK', 'results': ticker_details(match['symbol'])})
+        match = SNAPSHOT_PATH.match(path)
+        if match:
+            return self.send_json(200, {'status': 'OK', 'ticker': ticker_snapshot(match['symbol'])})
+        return self.send_json(404, {'status': 'NOT_FOUND', 'message': 'Not found.'})
+
+
+def start_fake_upstream(port=0, latency=0.0, error_rate=0.0):
+    """
+    Arranca el servidor falso en un hilo en segundo plano.
+
+    Args:
+        port (int): Puerto de escucha; 0 elige uno libre.
+        latency (float): Segundos de latencia añadidos a cada respuesta.
+        error_rate (float): Proporción (0-1) de respuestas 429.
+
+    Returns:
+        ThreadingHTTPServer: El servidor; su URL base es ``http://127.0.0.1:{server.server_port}``.
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', port), FakeUpstreamHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.error_rate = error_rate
+    server.requests = 0
+    server.stats_lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=9100)
+    parser.add_argument('--latency', type=float, default=0.2)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = start_fake_upstream(args.port, args.latency, args.error_rate)
+    print(f'Fake polygon.io escuchando en http://127.0.0.1:{server.server_port}')
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,87 @@
+"""
+Benchmark del perfil de servidor: ``runserver`` frente a gunicorn con ``gunicorn.conf.py``.
+
+Levanta la aplicación de dos formas contra la misma base de datos:
+
+- ``runserver``: la forma de servirla anterior, con ``Dev`` (DEBUG activo) y
+  sin conexiones persistentes (``CONN_MAX_AGE=0``).
+- ``gunicorn``: el perfil de producción, con ``Prod`` (sin DEBUG, solo JSON),
+  conexiones persistentes y los workers calculados por ``gunicorn.conf.py``.
+
+y lanza la misma carga concurrente de listados y lecturas detalladas sin
+``time_serie`` (``?fields=``), de modo que se mide el coste del servidor y de
+la base de datos y no el del upstream.
+
+Uso (con la base de datos configurada en el entorno, como en ``.env``):
+    python benchmarks/server_profile.py --requests 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from benchmarks.common import (  # noqa: E402
+    cleanup_companies, run_load, seed_companies, setup_django, start_server,
+)
+
+# Prod redirige a HTTPS salvo que el proxy indique que la petición ya llegó cifrada
+PROD_HEADERS = {'X-Forwarded-Proto': 'https'}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--companies', type=int, default=200)
+    parser.add_argument('--worker-class', default='gthread', help='GUNICORN_WORKER_CLASS del perfil de producción.')
+    parser.add_argument('--runserver-port', type=int, default=8103)
+    parser.add_argument('--gunicorn-port', type=int, default=8104)
+    parser.add_argument('--output', help='Fichero JSON en el que guardar los resultados.')
+    args = parser.parse_args()
+
+    setup_django()
+    cleanup_companies()
+    ids = seed_companies(args.companies, 'S')
+
+    def urls(port):
+        base = f'http://localhost:{port}/api/companies/'
+        paths = ['?page_size=50', *(f'{pk}/?fields=id,name,symbol' for pk in ids)]
+        return [f'{base}{paths[index % len(paths)]}' for index in range(args.requests)]
+
+    servers = {
+        'runserver': (
+            [sys.executable, 'manage.py', 'runserver', '--noreload', f'127.0.0.1:{args.runserver_port}'],
+            args.runserver_port, {'DJANGO_CONFIGURATION': 'Dev', 'CONN_MAX_AGE': '0'}, None,
+        ),
+        'gunicorn': (
+            ['gunicorn', '-c', 'gunicorn.conf.py'], args.gunicorn_port,
+            {'DJANGO_CONFIGURATION': 'Prod', 'ALLOWED_HOSTS': 'localhost', 'PORT': str(args.gunicorn_port),
+             'GUNICORN_WORKER_CLASS': args.worker_class, 'GUNICORN_LOG_LEVEL': 'warning'},
+            PROD_HEADERS,
+        ),
+    }
+
+    results = {}
+    try:
+        for name, (command, port, extra_env, headers) in servers.items():
+            process = start_server(command, port, {**os.environ, **extra_env}, BASE_DIR, headers)
+            try:
+                results[name] = asyncio.run(run_load(urls(port), args.concurrency, headers))
+            finally:
+                process.terminate()
+                process.wait()
+            print(f'{name}: {results[name]}')
+    finally:
+        cleanup_companies()
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2) + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""
+Benchmark del arranque de un worker y del coste fijo por petición: perfil
+``Common`` (todas las aplicaciones y el middleware) frente a ``Api`` (ver
+``core/settings.py``).
+
+Para cada perfil lanza ``--runs`` procesos nuevos, cada uno de los cuales mide:
+
+- ``boot_ms``: desde antes de importar Django hasta que termina la primera
+  petición, que es la que carga las rutas (lo que tarda un worker recién
+  creado en atender).
+- ``modules``: módulos importados tras la primera petición.
+- ``numpy``: si NumPy ya está cargado tras la primera petición (solo lo
+  necesitan los indicadores y el formato ``packed``).
+- ``request_us``: tiempo medio de ``--requests`` peticiones a ``/metrics``,
+  que no consulta la base de datos, de modo que se mide el middleware, la
+  resolución de rutas y la respuesta.
+- ``schema_first_ms`` y ``schema_cached_ms``: la primera petición a
+  ``/swagger.json``, que genera el esquema, y la media de las siguientes.
+
+Se informa la mediana de los procesos. No necesita base de datos ni upstream.
+
+Uso:
+    python benchmarks/startup.py --runs 5 --requests 2000 [--configuration Common --configuration Api]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# Prod y Api redirigen a HTTPS salvo que el proxy indique que la petición ya llegó cifrada
+HEADERS = {'HTTP_HOST': 'localhost', 'HTTP_X_FORWARDED_PROTO': 'https', 'HTTP_AUTHORIZATION': 'Bearer benchmark'}
+
+
+def measure(requests):
+    """
+    Mide el perfil de ``DJANGO_CONFIGURATION`` en el proceso actual, que debe ser nuevo.
+
+    Returns:
+        dict: Las medidas descritas en el docstring del módulo.
+    """
+    started = time.perf_counter()
+    sys.path.insert(0, str(BASE_DIR))
+    from core.wsgi import application  # noqa: F401
+    from django.conf import settings
+    from django.test import Client
+
+    # Common no admite ningún host: se permite el de las peticiones del benchmark
+    settings.ALLOWED_HOSTS = ['localhost']
+    client = Client(**HEADERS)
+    assert client.get('/metrics').status_code == 200
+    boot = time.perf_counter() - started
+    modules = len(sys.modules)
+    numpy_loaded = 'numpy' in sys.modules
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        client.get('/metrics')
+    per_request = (time.perf_counter() - started) / requests
+
+    started = time.perf_counter()
+    assert client.get('/swagger.json').status_code == 200
+    schema_first = time.perf_counter() - started
+    started = time.perf_counter()
+    for _ in range(10):
+        client.get('/swagger.json')
+    schema_cached = (time.perf_counter() - started) / 10
+
+    return {
+        'boot_ms': round(boot * 1000, 1),
+        'modules': modules,
+        'numpy': numpy_loaded,
+        'installed_apps': len(settings.INSTALLED_APPS),
+        'middleware': len(settings.MIDDLEWARE),
+        'request_us': round(per_request * 1e6, 1),
+        'schema_first_ms': round(schema_first * 1000, 1),
+        'schema_cached_ms': round(schema_cached * 1000, 2),
+    }
+
+
+def run(configuration, requests):
+    """
+    Mide ``configuration`` en un proceso nuevo.
+
+    Returns:
+        dict: Las medidas del proceso y su duración total (``process_ms``), que incluye el arranque del intérprete.
+    """
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': 'core.settings', 'DJANGO_CONFIGURATION': configuration}
+    env.setdefault('SECRET_KEY', 'benchmark')
+    env['METRICS_TOKEN'] = 'benchmark'
+    started = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, __file__, '--measure', '--requests', str(requests)],
+        env=env, cwd=BASE_DIR, check=True, capture_output=True, text=True,
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result['process_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--configuration', action='append', dest='configurations',
+                        help='Perfiles de core/settings.py a comparar (por defecto, Common y Api).')
+    parser.add_argument('--measure', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--output', help='Fichero JSON en el que guardar los resultados.')
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(args.requests)))
+        return
+
+    results = {}
+    for configuration in args.configurations or ['Common', 'Api']:
+        runs = [run(configuration, args.requests) for _ in range(args.runs)]
+        results[configuration] = {name: statistics.median(run[name] for run in runs) for name in runs[0]}
+        print(f'{configuration}: {results[configuration]}')
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2) + '\n')
+
+
+if __name__ == '__main__':
+    main()
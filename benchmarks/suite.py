@@ -0,0 +1,215 @@
+"""
+Suite de benchmarks de ``CompanyViewSet`` contra un polygon.io falso.
+
+Las peticiones se lanzan en proceso con ``django.test.Client`` (sin servidor
+HTTP, para medir solo la aplicación) sobre una base de datos de test creada
+para la ocasión y destruida al terminar, de modo que no toca los datos reales.
+El upstream es ``benchmarks/fake_upstream.py`` con latencia y tasa de errores
+configurables. Escenarios:
+
+- ``list_{N}``: primera página del listado con N filas (``--sizes``).
+- ``list_deep_{N}``: una página a mitad del listado, con cursor.
+- ``export_{N}``: exportación NDJSON completa con N filas.
+- ``retrieve_cold``: lectura detallada de empresas sin barras ni caché (paga el upstream).
+- ``retrieve_warm``: lectura detallada repetida de una misma empresa.
+- ``series_{formato}``: series de un año de 20 empresas en caché (``json``,
+  ``columnar`` y ``packed``), con el tamaño de la respuesta en ``bytes``.
+- ``create``: creación individual, con validación del símbolo contra el upstream.
+- ``bulk``: importación masiva de ``--bulk-size`` empresas por petición.
+
+Los resultados (peticiones por segundo y percentiles p50/p95/p99) se escriben
+en JSON junto con el commit actual. Con ``--compare`` se muestran las
+diferencias con otro resultado y el script termina con error si algún p95
+empeora más de ``--fail-threshold`` por ciento.
+
+Uso (con la base de datos configurada en el entorno, como en ``.env``):
+    python benchmarks/suite.py --output bench-main.json
+    python benchmarks/suite.py --output bench-branch.json --compare bench-main.json
+"""
+import argparse
+import base64
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from benchmarks.common import make_symbol, seed_companies, setup_django, summarize  # noqa: E402
+from benchmarks.fake_upstream import start_fake_upstream  # noqa: E402
+
+# Prefijos de símbolo de cada grupo de empresas sembradas, para que no colisionen
+SIZE_PREFIXES = 'KLMNOQ'
+
+
+def run(make_request, count):
+    """
+    Lanza ``count`` peticiones secuenciales y resume sus latencias.
+
+    Args:
+        make_request (callable): Recibe el índice de la petición y retorna la respuesta.
+        count (int): Número de peticiones.
+
+    Returns:
+        dict: El resumen de ``benchmarks.common.summarize``.
+    """
+    latencies, errors = [], 0
+    started = time.perf_counter()
+    for index in range(count):
+        request_started = time.perf_counter()
+        response = make_request(index)
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        latencies.append(time.perf_counter() - request_started)
+        if response.status_code >= 400:
+            errors += 1
+    return summarize(latencies, time.perf_counter() - started, errors)
+
+
+def middle_cursor(size):
+    """
+    Construye el cursor de la página que empieza a mitad del listado ordenado por nombre.
+    """
+    from _apps.api.models import Company
+
+    company = Company.objects.order_by('name', 'pk').only('id', 'name')[size // 2]
+    payload = {'v': company.name, 'id': str(company.pk), 'r': 0}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def run_suite(client, args):
+    results = {}
+    url = '/api/companies/'
+
+    seeded = 0
+    for prefix, size in zip(SIZE_PREFIXES, sorted(args.sizes)):
+        seed_companies(size - seeded, prefix)
+        seeded = size
+        print(f'{size} empresas sembradas', file=sys.stderr)
+
+        results[f'list_{size}'] = run(lambda _: client.get(url, {'page_size': 50}), args.requests)
+        cursor = middle_cursor(size)
+        results[f'list_deep_{size}'] = run(lambda _: client.get(url, {'page_size': 50, 'cursor': cursor}),
+                                           args.requests)
+        results[f'export_{size}'] = run(lambda _: client.get(f'{url}export/', {'format': 'ndjson'}),
+                                        args.export_requests)
+
+    cold_ids = seed_companies(args.requests, 'C')
+    results['retrieve_cold'] = run(lambda index: client.get(f'{url}{cold_ids[index]}/'), args.requests)
+    results['retrieve_warm'] = run(lambda _: client.get(f'{url}{cold_ids[0]}/'), args.requests)
+
+    end = datetime.now(timezone.utc).date()
+    params = {'ids': ','.join(map(str, cold_ids[:20])), 'start': end - timedelta(days=365), 'end': end}
+    client.get(f'{url}time-series/', params)
+    for renderer_format in ('json', 'columnar', 'packed'):
+        query = {**params, 'format': renderer_format}
+        results[f'series_{renderer_format}'] = run(lambda _: client.get(f'{url}time-series/', query), args.requests)
+        results[f'series_{renderer_format}']['bytes'] = len(client.get(f'{url}time-series/', query).content)
+
+    results['create'] = run(
+        lambda index: client.post(url, {'name': 'Bench create', 'description': 'benchmark',
+                                        'symbol': make_symbol('P', index)}, content_type='application/json'),
+        args.requests,
+    )
+    results['bulk'] = run(
+        lambda index: client.post(f'{url}bulk/', [
+            {'name': 'Bench bulk', 'description': 'benchmark', 'symbol': make_symbol('B', index * args.bulk_size + row)}
+            for row in range(args.bulk_size)
+        ], content_type='application/json'),
+        args.bulk_requests,
+    )
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """
+    Muestra la variación de cada escenario frente a ``baseline``.
+
+    Returns:
+        list: Los escenarios cuyo p95 empeoró más de ``threshold`` por ciento.
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        changes = {
+            metric: (current[metric] - previous[metric]) / previous[metric] * 100
+            for metric in ('rps', 'p50_ms', 'p95_ms', 'p99_ms') if previous.get(metric)
+        }
+        print(f'{name:>20}: ' + ', '.join(f'{metric} {change:+.1f}%' for metric, change in changes.items()))
+        if changes.get('p95_ms', 0) > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=lambda value: [int(size) for size in value.split(',')],
+                        default=[1000, 10000, 100000], help='Filas del listado, separadas por comas.')
+    parser.add_argument('--requests', type=int, default=200, help='Peticiones por escenario.')
+    parser.add_argument('--export-requests', type=int, default=5)
+    parser.add_argument('--bulk-requests', type=int, default=20)
+    parser.add_argument('--bulk-size', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.05, help='Latencia del upstream falso en segundos.')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Proporción de respuestas 429 del upstream.')
+    parser.add_argument('--output', default='benchmark-results.json')
+    parser.add_argument('--compare', help='Resultado anterior con el que comparar.')
+    parser.add_argument('--fail-threshold', type=float, default=10.0,
+                        help='Empeoramiento máximo admitido del p95, en porcentaje.')
+    args = parser.parse_args()
+
+    upstream = start_fake_upstream(latency=args.latency, error_rate=args.error_rate)
+    os.environ['POLYGON_API_URL'] = f'http://127.0.0.1:{upstream.server_port}'
+    os.environ.setdefault('ALPHAVANTAGE_KEY', 'benchmark')
+    setup_django()
+
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    database_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        results = run_suite(Client(), args)
+    finally:
+        connection.creation.destroy_test_db(database_name, verbosity=0)
+        teardown_test_environment()
+        upstream.shutdown()
+
+    report = {
+        'commit': git_commit(),
+        'date': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'database': connection.vendor,
+        'options': {name: value for name, value in vars(args).items() if name not in ('output', 'compare')},
+        'upstream_requests': upstream.requests,
+        'results': results,
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2) + '\n')
+    for name, result in results.items():
+        print(f'{name:>20}: {result}')
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())['results']
+        regressions = compare(results, baseline, args.fail_threshold)
+        if regressions:
+            sys.exit(f'p95 empeorado más de un {args.fail_threshold}% en: {", ".join(regressions)}')
+
+
+if __name__ == '__main__':
+    main()
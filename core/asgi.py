@@ -9,8 +9,10 @@ https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
-
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+os.environ.setdefault("DJANGO_CONFIGURATION", "Prod")
+
+# django-configurations necesita las variables de entorno antes de importarse
+from configurations.asgi import get_asgi_application  # noqa: E402
 
 application = get_asgi_application()
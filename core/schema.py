@@ -0,0 +1,61 @@
+"""
+Esquema OpenAPI de la API, generado en la primera petición.
+
+drf_yasg solo se importa al generar el esquema, de modo que no alarga el
+arranque de los workers, y el resultado se reutiliza mientras vive el proceso
+(la API no cambia sin reiniciarlo). El esquema no incluye ``host`` ni
+``schemes``: los clientes usan los de la URL desde la que lo descargan, de
+modo que sirve igual detrás de cualquier dominio o proxy.
+"""
+import threading
+
+from django.http import HttpResponse
+from rest_framework.decorators import api_view, schema
+
+_schema = None
+_schema_lock = threading.Lock()
+
+
+def api_info():
+    """
+    Retorna los metadatos de la documentación de la API.
+    """
+    from drf_yasg import openapi
+
+    return openapi.Info(
+        title="NYSE API",  # Título de la documentación de la API
+        default_version='v1',  # Versión de la API
+        description="Django NYSE Crud API Documentation",  # Descripción de la API
+        terms_of_service="https://www.google.com/policies/terms/",  # Términos de servicio
+        contact=openapi.Contact(email="oblancomorales@gmail.com"),  # Información de contacto
+        license=openapi.License(name="BSD License"),  # Licencia de la API
+    )
+
+
+def schema_json(request):
+    """
+    Retorna el esquema en JSON, generándolo a partir de ``request`` si aún no existe.
+
+    Las peticiones que llegan mientras se genera esperan y reciben el mismo resultado.
+
+    Returns:
+        bytes: El esquema codificado.
+    """
+    global _schema
+    with _schema_lock:
+        if _schema is None:
+            from drf_yasg.codecs import OpenAPICodecJson
+            from drf_yasg.generators import OpenAPISchemaGenerator
+
+            generator = OpenAPISchemaGenerator(api_info(), url='')
+            _schema = OpenAPICodecJson(validators=[]).encode(generator.get_schema(request=request, public=True))
+        return _schema
+
+
+@api_view(['GET'])
+@schema(None)  # El esquema no se documenta a sí mismo
+def schema_view(request):
+    """
+    Retorna el esquema OpenAPI de la API en JSON.
+    """
+    return HttpResponse(schema_json(request), content_type='application/json')
@@ -1,6 +1,19 @@
 import os
 from pathlib import Path
 from configurations import Configuration
+from corsheaders.defaults import default_headers
+
+
+def replica_databases(primary, hosts):
+    """
+    Retorna la configuración de las réplicas de solo lectura de ``primary``, una por host.
+
+    En los tests las réplicas apuntan a la base de datos de ``default`` (``MIRROR``).
+    """
+    return {
+        f'replica_{index}': {**primary, 'HOST': host, 'TEST': {'MIRROR': 'default'}}
+        for index, host in enumerate(hosts)
+    }
 
 # Global Settings
 class Common(Configuration):
@@ -21,6 +34,7 @@ class Common(Configuration):
         'django.contrib.sessions',
         'django.contrib.messages',
         'django.contrib.staticfiles',
+        'django.contrib.postgres',  # Búsqueda de texto completo y trigramas
         'corsheaders', # Django Cors Headers
         'rest_framework',  # Django REST Framework para construir APIs
         'drf_yasg',  # Herramienta para generar documentación de API con Swagger
@@ -28,6 +42,7 @@ class Common(Configuration):
     ]
     
     MIDDLEWARE = [
+        '_apps.api.middleware.MetricsMiddleware',  # Primero, para medir la petición completa
         'corsheaders.middleware.CorsMiddleware',
         'django.middleware.security.SecurityMiddleware',
         'django.contrib.sessions.middleware.SessionMiddleware',
@@ -36,6 +51,7 @@ class Common(Configuration):
         'django.contrib.auth.middleware.AuthenticationMiddleware',
         'django.contrib.messages.middleware.MessageMiddleware',
         'django.middleware.clickjacking.XFrameOptionsMiddleware',
+        '_apps.api.middleware.ReadYourWritesMiddleware',
     ]
 
     ROOT_URLCONF = 'core.urls'
@@ -78,20 +94,170 @@ class Common(Configuration):
         },
     }
     
-    # Configuración de la Base de Datos usando PostgreSQL
+    # Caché de series temporales de polygon.io (ver _apps/api/cache.py).
+    # Para compartirla entre procesos usar '_apps.api.cache.DjangoCacheBackend'
+    # con OPTIONS={'alias': 'default'} y un backend de CACHES adecuado. La precarga
+    # (manage.py prewarm_time_series) solo llega a los workers con una caché compartida
+    TIME_SERIES_CACHE = {
+        'BACKEND': '_apps.api.cache.LocMemBackend',
+        'OPTIONS': {'max_entries': 5000},
+        'BAR_CLOSE': '21:15',  # Hora UTC, tras el cierre del mercado de EE. UU.
+        'STALE_TTL': 60 * 60 * 24,
+    }
+
+    # Accesos diarios por símbolo, que priorizan la precarga. Deben compartirse entre los
+    # workers y el proceso de precarga, y tienen su propio backend para no desalojar series
+    ACCESS_COUNTS = {
+        'BACKEND': '_apps.api.cache.DatabaseBackend',
+        'OPTIONS': {'key_prefix': 'hits'},
+        'DAYS': 7,
+        'FLUSH_INTERVAL': 10,
+    }
+
+    # Caché de datos de referencia por símbolo, con caché negativa para símbolos inválidos
+    REFERENCE_DATA_CACHE = {
+        'BACKEND': '_apps.api.cache.LocMemBackend',
+        'OPTIONS': {'max_entries': 10000},
+        'TTL': 60 * 60 * 24 * 7,
+        'NEGATIVE_TTL': 60 * 60,
+    }
+
+    # Coalescencia de las llamadas concurrentes al upstream (ver _apps/api/singleflight.py).
+    # ADVISORY_LOCK coalesce también entre procesos con un advisory lock de PostgreSQL;
+    # requiere cachés compartidas (DjangoCacheBackend)
+    SINGLE_FLIGHT = {
+        'ADVISORY_LOCK': os.getenv('SINGLE_FLIGHT_ADVISORY_LOCK', 'false').lower() in ('1', 'true', 'yes'),
+        'LOCK_TIMEOUT': 10.0,
+        'POLL_INTERVAL': 0.05,
+    }
+
+    # Precios en directo por SSE (GET /api/async/companies/symbol/<symbol>/stream/, ver _apps/api/live.py)
+    LIVE_STREAM = {
+        'FETCHER': '_apps.api.upstream.afetch_snapshot',
+        'INTERVAL': 5.0,
+        'QUEUE_SIZE': 16,
+        'HEARTBEAT': 15.0,
+    }
+
+    # Respuestas guardadas por Idempotency-Key en las escrituras (ver _apps/api/idempotency.py).
+    # Deben compartirse entre procesos: por defecto, en la tabla api_cacheentry de la base de
+    # datos; también admite '_apps.api.cache.DjangoCacheBackend' con una caché compartida
+    # (Redis, Memcached). Un backend en memoria del proceso solo se admite con DEBUG
+    IDEMPOTENCY = {
+        'BACKEND': '_apps.api.cache.DatabaseBackend',
+        'OPTIONS': {},
+        'TTL': 60 * 60 * 24,
+        'LOCK_TTL': 60,
+    }
+
+    # API de polygon.io. Puede apuntarse a un servidor local para pruebas y benchmarks
+    POLYGON_API_URL = os.getenv('POLYGON_API_URL', 'https://api.polygon.io')
+    # Cliente HTTP del upstream (ver _apps/api/upstream.py): timeouts en segundos,
+    # reintentos con backoff ante 429/5xx y circuit breaker
+    UPSTREAM = {
+        'CONNECT_TIMEOUT': 3.05,
+        'READ_TIMEOUT': 10.0,
+        'MAX_RETRIES': 2,
+        'BACKOFF_BASE': 0.25,
+        'BACKOFF_MAX': 4.0,
+        'POOL_MAXSIZE': 20,  # Conexiones keep-alive por proceso
+        'ASYNC_MAX_CONNECTIONS': 200,  # Conexiones del cliente asíncrono por event loop
+        'BREAKER_FAILURE_THRESHOLD': 5,
+        'BREAKER_RESET_TIMEOUT': 30.0,
+    }
+
+    # Importación masiva de empresas (POST /api/companies/bulk/)
+    BULK_IMPORT = {
+        'MAX_ROWS': 1000,
+        'MAX_WORKERS': 16,  # Validaciones simultáneas contra la API
+    }
+
+    # Eliminación lógica de empresas (DELETE /api/companies/{id}/ y POST /api/companies/bulk-delete/)
+    # y su purga por lotes con el comando purge_deleted_companies
+    SOFT_DELETE = {
+        'MAX_IDS': 1000,  # Empresas por petición de eliminación masiva
+        'RETENTION': 60 * 60,  # Segundos que se conserva una empresa eliminada antes de purgarla
+        'BATCH_SIZE': 5000,  # Filas borradas por sentencia DELETE
+        'PAUSE': 0.1,  # Segundos entre lotes, para no saturar el WAL ni las réplicas
+        'INTERVAL': 5 * 60,  # Segundos entre pasadas con --loop
+    }
+
+    # Series temporales de varias empresas (GET /api/companies/time-series/)
+    TIME_SERIES_BATCH = {
+        'MAX_COMPANIES': 100,
+        'MAX_DAYS': 366,
+        'MAX_WORKERS': 8,  # Llamadas simultáneas a la API para las series que faltan
+    }
+
+    # Precarga de series tras el cierre de barra (manage.py prewarm_time_series)
+    PREWARM = {
+        'CALLS_PER_MINUTE': 5,  # Límite del plan gratuito de polygon.io
+        'DELAY': 60,  # Segundos tras el cierre de barra antes de cada pasada
+    }
+
+    # Guarda los datos de referencia en bruto de cada empresa (tabla CompanyReference, campo alpha_vantage
+    # del detalle). Las columnas de mercado (market_cap, exchange, ...) se extraen siempre
+    STORE_RAW_REFERENCE_DATA = os.getenv('STORE_RAW_REFERENCE_DATA', 'true').lower() in ('1', 'true', 'yes')
+
+    # Cabecera Server-Timing con el desglose de cada petición (solo en desarrollo)
+    METRICS_SERVER_TIMING = False
+
+    # Con varios workers, directorio compartido en el que cada proceso vuelca sus métricas cada
+    # METRICS_EXPORT_INTERVAL segundos para que /metrics las sume (gunicorn.conf.py lo fija por defecto)
+    METRICS_MULTIPROCESS_DIR = os.getenv('METRICS_MULTIPROCESS_DIR', '')
+    METRICS_EXPORT_INTERVAL = 5
+
+    # Token que exige GET /metrics (Authorization: Bearer <token>). Sin token, /metrics solo responde con DEBUG
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+    # Límite de max-age (segundos) de las lecturas de empresas; nunca supera el próximo cierre de barra
+    HTTP_CACHE_MAX_AGE = 60
+
+    # Filas por lote del cursor del servidor en la exportación (GET /api/companies/export/)
+    EXPORT_CHUNK_SIZE = 2000
+
+    # Configuración de la Base de Datos usando PostgreSQL.
+    # Las conexiones se reutilizan durante CONN_MAX_AGE segundos y se validan antes
+    # de reutilizarlas. Con DB_POOL=true se usa el pool de psycopg 3 (requiere el
+    # extra "pool": psycopg[binary,pool]), recomendado con workers ASGI; el pool
+    # sustituye a las conexiones persistentes, así que CONN_MAX_AGE pasa a 0.
+    DB_POOL = os.getenv('DB_POOL', '').lower() in ('1', 'true', 'yes')
     DATABASES = {
         'default': {
-            'ENGINE': 'django.db.backends.postgresql_psycopg2',
+            'ENGINE': 'django.db.backends.postgresql',
             'NAME': os.getenv('POSTGRES_DB', ''),
             'USER': os.getenv('POSTGRES_USER', ''),
             'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
             'HOST': os.getenv('POSTGRES_HOST', ''),
             'PORT': os.getenv('POSTGRES_PORT', ''),
+            'CONN_MAX_AGE': 0 if DB_POOL else int(os.getenv('CONN_MAX_AGE', '60')),
+            'CONN_HEALTH_CHECKS': True,
             'OPTIONS': {
-                'options': '-c search_path=public'  # Define el esquema por defecto
+                'options': '-c search_path=public',  # Define el esquema por defecto
+                **({'pool': {
+                    'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+                    'max_size': int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+                    'timeout': 10,
+                }} if DB_POOL else {}),
             },
-        }        
+        }
+    }
+
+    # Réplicas de solo lectura para el listado, el detalle y la exportación
+    # (POSTGRES_REPLICA_HOSTS=host1,host2, con las credenciales de default; ver _apps/api/routers.py).
+    # Tras una escritura, las lecturas del mismo cliente van a default durante READ_YOUR_WRITES['WINDOW'] segundos
+    DATABASES.update(replica_databases(
+        DATABASES['default'], [host.strip() for host in os.getenv('POSTGRES_REPLICA_HOSTS', '').split(',') if host.strip()],
+    ))
+    DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+    DATABASE_ROUTERS = ['_apps.api.routers.PrimaryReplicaRouter']
+    READ_YOUR_WRITES = {
+        'HEADER': 'Primary-Until',
+        'WINDOW': int(os.getenv('READ_YOUR_WRITES_WINDOW', '5')),
     }
+    # El cliente web es de otro origen: lee la cabecera de las escrituras y la reenvía en sus lecturas
+    CORS_EXPOSE_HEADERS = ['Primary-Until']
+    CORS_ALLOW_HEADERS = [*default_headers, 'primary-until']
 
     # Validación de contraseñas
     AUTH_PASSWORD_VALIDATORS = [
@@ -130,6 +296,7 @@ class Dev(Common):
     CORS_ALLOWED_ORIGINS = ['http://localhost:5173', 'https://main.dlz6ua40g7mkh.amplifyapp.com']
     ALLOWED_HOSTS = ['localhost', 'flk-crud-backend.up.railway.app']
     DEBUG = True  # Habilita el modo de depuración
+    METRICS_SERVER_TIMING = True
 
 # Configuración para entornos de producción
 class Prod(Common):
@@ -137,10 +304,55 @@ class Prod(Common):
     Configuración específica para el entorno de producción.
     """
     CORS_ALLOWED_ORIGINS = ['https://main.dlz6ua40g7mkh.amplifyapp.com']
-    ALLOWED_HOSTS = ['flk-crud-backend.up.railway.app']
-    DEBUG = True
+    ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS', 'flk-crud-backend.up.railway.app').split(',')
+    # Sin DEBUG no se guardan en memoria todas las consultas ni se generan páginas de error detalladas
+    DEBUG = False
+
+    # Solo JSON: el renderizador navegable de DRF añade plantillas y formularios a cada respuesta
+    REST_FRAMEWORK = {
+        'DEFAULT_RENDERER_CLASSES': ['rest_framework.renderers.JSONRenderer'],
+    }
 
     SECURE_SSL_REDIRECT = True
     SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
     SESSION_COOKIE_SECURE = True
     CSRF_COOKIE_SECURE = True
+
+
+# Configuración de producción para los workers que solo sirven la API
+class Api(Prod):
+    """
+    Perfil de producción para los workers que solo sirven la API.
+
+    Prescinde del admin, las sesiones, los mensajes, las plantillas, los
+    ficheros estáticos y las interfaces de drf_yasg (``core/urls_api.py``), que
+    la API no usa, de modo que los workers arrancan antes y cada petición
+    atraviesa menos middleware. La API no autentica a los clientes, así que
+    tampoco se cargan ``django.contrib.auth`` ni ``contenttypes``.
+
+    Las migraciones deben ejecutarse con ``Prod``, que incluye todas las aplicaciones.
+    """
+    INSTALLED_APPS = [
+        'django.contrib.postgres',  # Búsqueda de texto completo y trigramas
+        'corsheaders',
+        'rest_framework',
+        '_apps.api',
+    ]
+
+    MIDDLEWARE = [
+        '_apps.api.middleware.MetricsMiddleware',  # Primero, para medir la petición completa
+        'corsheaders.middleware.CorsMiddleware',
+        'django.middleware.security.SecurityMiddleware',
+        'django.middleware.common.CommonMiddleware',
+        '_apps.api.middleware.ReadYourWritesMiddleware',
+    ]
+
+    ROOT_URLCONF = 'core.urls_api'
+    TEMPLATES = []
+
+    REST_FRAMEWORK = {
+        **Prod.REST_FRAMEWORK,
+        # Sin django.contrib.auth: las peticiones no se autentican y ``request.user`` es ``None``
+        'DEFAULT_AUTHENTICATION_CLASSES': [],
+        'UNAUTHENTICATED_USER': None,
+    }
@@ -0,0 +1,19 @@
+"""
+Rutas del perfil ``Api`` (ver ``core/settings.py``): solo la API, las métricas
+y el esquema OpenAPI en JSON, sin las interfaces Swagger UI y Redoc.
+"""
+from django.urls import path, include
+from _apps.api.views import metrics_view
+from core.schema import schema_view
+
+# Definición de las rutas
+urlpatterns = [
+    # Ruta para obtener el esquema de la API en formato JSON, generado en la primera petición
+    path('swagger.json', schema_view, name='schema-json'),
+
+    # Incluye las rutas de la aplicación API
+    path('api/', include('_apps.api.urls')),
+
+    # Métricas en formato de texto de Prometheus
+    path('metrics', metrics_view, name='metrics'),
+]
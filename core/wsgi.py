@@ -1,7 +1,9 @@
 import os
-from configurations.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 os.environ.setdefault("DJANGO_CONFIGURATION", "Prod")
 
+# django-configurations necesita las variables de entorno antes de importarse
+from configurations.wsgi import get_wsgi_application  # noqa: E402
+
 application = get_wsgi_application()
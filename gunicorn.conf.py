@@ -0,0 +1,82 @@
+"""
+Configuración de gunicorn para producción.
+
+Uso:
+    gunicorn -c gunicorn.conf.py
+
+Todos los valores pueden ajustarse con variables de entorno:
+
+- ``GUNICORN_WORKER_CLASS``: ``gthread`` (WSGI, por defecto) o
+  ``uvicorn.workers.UvicornWorker`` (ASGI, necesario para que las vistas
+  asíncronas no ocupen un hilo mientras esperan al upstream, e imprescindible
+  para los flujos en directo, que con WSGI responden 501). La aplicación
+  servida (``core.wsgi`` o ``core.asgi``) se elige según la clase.
+- ``WEB_CONCURRENCY``: número de workers; por defecto ``2 * CPUs + 1`` con
+  ``gthread`` y uno por CPU con uvicorn, cuyo event loop ya atiende muchas
+  peticiones a la vez.
+- ``GUNICORN_THREADS``: hilos por worker ``gthread``.
+- ``PORT``, ``GUNICORN_TIMEOUT``, ``GUNICORN_MAX_REQUESTS``.
+
+Con workers ASGI se recomienda ``DB_POOL=true`` en lugar de ``CONN_MAX_AGE``
+(ver ``core/settings.py``).
+
+Métricas: cada worker tiene su propio registro, así que se fija por defecto
+``METRICS_MULTIPROCESS_DIR`` (en ``/dev/shm``, uno por puerto) para que
+``/metrics`` sume los de todos los workers (ver ``_apps.api.metrics``). El
+directorio se vacía al arrancar, cada worker vuelca sus métricas al terminar
+y el maestro las acumula en ``archive.json``.
+"""
+import glob
+import multiprocessing
+import os
+import tempfile
+
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+asgi = 'uvicorn' in worker_class.lower()
+wsgi_app = 'core.asgi:application' if asgi else 'core.wsgi:application'
+
+cpus = multiprocessing.cpu_count()
+workers = int(os.getenv('WEB_CONCURRENCY', cpus if asgi else 2 * cpus + 1))
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+# Mayor que el timeout de lectura del upstream más los reintentos
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
+graceful_timeout = 30
+keepalive = 5
+
+# Reciclar los workers acota el crecimiento de memoria; el jitter evita que se reinicien a la vez
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = max_requests // 10
+
+# El latido de los workers en memoria compartida evita bloqueos con discos lentos en contenedores
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+# Los workers heredan el entorno del maestro
+metrics_dir = os.environ.setdefault(
+    'METRICS_MULTIPROCESS_DIR',
+    os.path.join(worker_tmp_dir or tempfile.gettempdir(), f"api-metrics-{os.getenv('PORT', '8000')}"),
+)
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+
+def on_starting(server):
+    # Las métricas de una ejecución anterior no deben sumarse a las nuevas
+    os.makedirs(metrics_dir, exist_ok=True)
+    for path in glob.glob(os.path.join(metrics_dir, '*.json')):
+        os.remove(path)
+
+
+def worker_exit(server, worker):
+    from _apps.api import metrics
+
+    metrics.write_snapshot(metrics_dir)
+
+
+def child_exit(server, worker):
+    from _apps.api import metrics
+
+    metrics.archive_snapshot(metrics_dir, worker.pid)